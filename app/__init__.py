@@ -2,12 +2,30 @@
 """app package init"""
 
 from flask import Flask
+from flask import json as flask_json
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
 from pymongo import MongoClient, errors
 from pymongo.collection import Collection
 from pymongo.database import Database
 from app.config import Config
 from app.config import RequestFormatter
+from app.utils.json_provider import MongoJSONProvider
+from app.utils.compression import init_compression
+from app.utils.versions import CollectionVersions
+from app.utils.cache import ResponseCache
+from app.utils.metrics import Metrics
+from app.utils.singleflight import SingleFlight
+from app.utils.identity import IdentityCache
+from app.utils.ratelimit import RateLimiter
+from app.utils.bulkhead import Bulkheads, parse_bulkhead
+from app.utils.mongo_manager import MongoManager
+from app.utils.write_behind import WriteBehind
+from app.utils.emit_scheduler import EmitScheduler
+from app.utils.periodic import PeriodicTask
+from app.utils.lease import Lease
+from app.models.communication import apply_retention
+from app.models.unread import UnreadCounters
 from flask_mail import Mail, Message
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
@@ -22,9 +40,9 @@ revoked_tokens = set()  # Set to store revoked JWT tokens
 
 
 # Function to initialize MongoDB client
-def init_mongo_client(connection_string: str) -> MongoClient:
+def init_mongo_client(connection_string: str, **options) -> MongoClient:
     try:
-        client = MongoClient(connection_string)
+        client = MongoClient(connection_string, **options)
         print("MongoDB client initialized successfully.")
         return client
     except errors.ConnectionFailure as e:
@@ -47,10 +65,32 @@ def initialize_collections(client: MongoClient, db_name: str):
     logRequestsCollection: Collection = database.get_collection("logRequests")
     adminsCollection: Collection = database.get_collection("admins")
     messagesCollection: Collection = database.get_collection("messages")
+    versionsCollection: Collection = database.get_collection(
+        "collectionVersions"
+    )
+    identitiesCollection: Collection = database.get_collection("identities")
+    rateLimitsCollection: Collection = database.get_collection("rateLimits")
+    messagesArchiveCollection: Collection = database.get_collection(
+        "messagesArchive"
+    )
+    roomCountersCollection: Collection = database.get_collection(
+        "roomCounters"
+    )
+    readCursorsCollection: Collection = database.get_collection(
+        "readCursors"
+    )
+    inboxCollection: Collection = database.get_collection("inbox")
+    campaignsCollection: Collection = database.get_collection(
+        "emailCampaigns"
+    )
+    leasesCollection: Collection = database.get_collection("leases")
     return (
         tenantsCollection, adminMessagesCollection, propertiesCollection,
         listingCollection, logRequestsCollection, adminsCollection,
-        messagesCollection
+        messagesCollection, versionsCollection, identitiesCollection,
+        rateLimitsCollection, messagesArchiveCollection,
+        roomCountersCollection, readCursorsCollection, inboxCollection,
+        campaignsCollection, leasesCollection
     )
 
 
@@ -88,10 +128,18 @@ def create_app(config_name='default'):
     else:
         app.config.from_object(Config)
 
+    # the client address behind the reverse proxy, see PROXY_FIX_X_FOR
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR']
+        )
+
+    # Serialize ObjectId, datetime and Decimal natively (orjson if present)
+    app.json = MongoJSONProvider(app)
+
     mail.init_app(app)
     app.mail = mail
     jwt = JWTManager(app)
-    socketio.init_app(app)
 
     # create SMTP handler to be added to the root logger
     mail_handler = SMTPHandler(
@@ -115,6 +163,9 @@ def create_app(config_name='default'):
         allow_headers=["Content-Type", "Authorization"]
     )
 
+    # gzip/brotli compress JSON responses above COMPRESS_MIN_SIZE
+    init_compression(app)
+
     # JWT blocklist loader function
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload):
@@ -126,10 +177,23 @@ def create_app(config_name='default'):
     DB_NAME = app.config['MONGO_DB_NAME']
 
     try:
-        mongo_client: MongoClient = init_mongo_client(CONNECTION_STRING)
+        mongo_client: MongoClient = init_mongo_client(
+            CONNECTION_STRING,
+            serverSelectionTimeoutMS=app.config[
+                'MONGO_SERVER_SELECTION_TIMEOUT_MS'
+            ],
+            connectTimeoutMS=app.config['MONGO_CONNECT_TIMEOUT_MS'],
+            socketTimeoutMS=app.config['MONGO_SOCKET_TIMEOUT_MS']
+        )
         (tenantsCollection, adminMessagesCollection, propertiesCollection,
             listingCollection, logRequestsCollection, adminsCollection,
-            messagesCollection) = initialize_collections(mongo_client, DB_NAME)
+            messagesCollection, versionsCollection, identitiesCollection,
+            rateLimitsCollection, messagesArchiveCollection,
+            roomCountersCollection, readCursorsCollection,
+            inboxCollection, campaignsCollection,
+            leasesCollection) = initialize_collections(
+                mongo_client, DB_NAME
+            )
     except (errors.ConnectionFailure, errors.ConfigurationError) as e:
         mongo_client = None
         tenantsCollection = None
@@ -139,6 +203,15 @@ def create_app(config_name='default'):
         logRequestsCollection = None
         adminsCollection = None
         messagesCollection = None
+        versionsCollection = None
+        identitiesCollection = None
+        rateLimitsCollection = None
+        messagesArchiveCollection = None
+        roomCountersCollection = None
+        readCursorsCollection = None
+        inboxCollection = None
+        campaignsCollection = None
+        leasesCollection = None
         print(f"Database initialization failed: {e}")
 
     # Store collections in the app context
@@ -149,6 +222,122 @@ def create_app(config_name='default'):
     app.logRequestsCollection = logRequestsCollection
     app.adminsCollection = adminsCollection
     app.messagesCollection = messagesCollection
+    app.versionsCollection = versionsCollection
+    app.identitiesCollection = identitiesCollection
+    app.rateLimitsCollection = rateLimitsCollection
+    app.messagesArchiveCollection = messagesArchiveCollection
+    app.roomCountersCollection = roomCountersCollection
+    app.readCursorsCollection = readCursorsCollection
+    app.inboxCollection = inboxCollection
+    app.campaignsCollection = campaignsCollection
+    app.leasesCollection = leasesCollection
+
+    # Socket.IO packets go through the same JSON provider as the routes,
+    # emits reach the clients of every worker through the message queue
+    socketio_options = {}
+    if app.config['SOCKETIO_MESSAGE_QUEUE'] == 'mongodb' \
+            and mongo_client is not None:
+        socketio_options['client_manager'] = MongoManager(
+            mongo_client.get_database(DB_NAME),
+            app.config['SOCKETIO_QUEUE_COLLECTION'],
+            size=app.config['SOCKETIO_QUEUE_SIZE'],
+            await_ms=app.config['SOCKETIO_QUEUE_AWAIT_MS'],
+            logger=app.logger, json=flask_json
+        )
+    socketio.init_app(app, json=flask_json, **socketio_options)
+    # bursts of events to a room leave as one frame per client
+    app.emit_scheduler = EmitScheduler(
+        socketio, app, window=app.config['SOCKETIO_EMIT_WINDOW_MS'] / 1000,
+        max_batch=app.config['SOCKETIO_EMIT_MAX_BATCH'], logger=app.logger
+    )
+
+    # catalog responses are cached per worker, writes bump the version
+    # counter of their collection so every worker drops its entries
+    app.versions = CollectionVersions(
+        versionsCollection, app.config['CACHE_VERSION_CHECK_INTERVAL'],
+        logger=app.logger
+    )
+    app.response_cache = ResponseCache(
+        app.versions, maxsize=app.config['CACHE_MAXSIZE'],
+        ttl=app.config['CACHE_TTL'],
+        stale_ttl=app.config['CACHE_STALE_TTL'], logger=app.logger
+    )
+
+    # identical concurrent list reads share one query and serialization
+    app.metrics = Metrics()
+    app.singleflight = SingleFlight(
+        app.config['SINGLEFLIGHT_TIMEOUT'], logger=app.logger
+    )
+    app.metrics.register("singleflight", app.singleflight.stats)
+
+    # JWT identity -> user id and display name, for tokens without claims
+    app.identity_cache = IdentityCache(
+        app.versions,
+        {"admin": adminsCollection, "tenant": tenantsCollection},
+        maxsize=app.config['IDENTITY_CACHE_MAXSIZE'],
+        ttl=app.config['IDENTITY_CACHE_TTL']
+    )
+
+    # token buckets of the unauthenticated, expensive routes
+    app.rate_limiter = RateLimiter(
+        rateLimitsCollection if app.config['RATELIMIT_SHARED'] else None,
+        enabled=app.config['RATELIMIT_ENABLED'],
+        max_keys=app.config['RATELIMIT_MAX_KEYS'],
+        metrics=app.metrics, logger=app.logger
+    )
+
+    # concurrency limits per route group, so one saturated group cannot
+    # starve the others of worker threads
+    app.bulkheads = Bulkheads(
+        {
+            group: parse_bulkhead(app.config[f'BULKHEAD_{group.upper()}'])
+            for group in ("auth", "bulk_reads", "writes", "chat")
+        },
+        timeout=app.config['BULKHEAD_QUEUE_TIMEOUT'],
+        enabled=app.config['BULKHEADS_ENABLED']
+    )
+    app.metrics.register("bulkheads", app.bulkheads.stats)
+
+    # chat messages are emitted at once and inserted in batches
+    app.message_writer = None
+    if app.config['MESSAGES_WRITE_BEHIND'] and messagesCollection is not None:
+        app.message_writer = WriteBehind(
+            messagesCollection,
+            interval=app.config['MESSAGES_FLUSH_INTERVAL_MS'] / 1000,
+            batch_size=app.config['MESSAGES_FLUSH_BATCH_SIZE'],
+            max_pending=app.config['MESSAGES_MAX_PENDING'],
+            # unread counters follow each batch of written messages
+            on_written=UnreadCounters(
+                roomCountersCollection, readCursorsCollection
+            ).count,
+            logger=app.logger
+        )
+        app.metrics.register("messages_writer", app.message_writer.stats)
+
+    # chat retention in the background, `flask messages archive` otherwise
+    app.retention = None
+    if app.config['MESSAGES_ARCHIVE_INTERVAL'] and \
+            app.config['MESSAGES_RETENTION_DAYS'] and \
+            messagesCollection is not None:
+        # every worker runs the task, the lease elects the one archiving;
+        # it outlives an interval so its holder keeps it between passes
+        interval = app.config['MESSAGES_ARCHIVE_INTERVAL']
+        retention_lease = Lease(
+            leasesCollection, "messages-retention", ttl=2 * interval
+        )
+
+        def archive_pass():
+            if retention_lease.acquire():
+                apply_retention(
+                    messagesCollection, messagesArchiveCollection,
+                    app.config['MESSAGES_RETENTION_DAYS'],
+                    app.config['MESSAGES_ARCHIVE_BATCH_SIZE'],
+                    renew=retention_lease.acquire
+                )
+
+        app.retention = PeriodicTask(
+            "messages-retention", interval, archive_pass, logger=app.logger
+        ).start()
 
     with app.app_context():
         # Import routes here to avoid circular imports
@@ -157,4 +346,10 @@ def create_app(config_name='default'):
         # Register blueprints
         app.register_blueprint(bp)
 
+    # `flask identities backfill`, `flask messages migrate-timestamps`,
+    # `flask messages archive`
+    from app.commands import identities_cli, messages_cli
+    app.cli.add_command(identities_cli)
+    app.cli.add_command(messages_cli)
+
     return app
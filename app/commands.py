@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Flask CLI commands, e.g. `flask identities backfill`"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.models.identity import IdentityDirectory
+from app.models.communication import (
+    CommunicationModel, MessageArchive, apply_retention
+)
+from app.utils.lease import Lease
+
+identities_cli = AppGroup('identities', help="Identity directory commands.")
+messages_cli = AppGroup('messages', help="Chat messages commands.")
+
+# fields of the tenant/admin documents copied into the directory
+IDENTITY_SOURCE_PROJECTION = {
+    "name": 1, "contact_details.email": 1, "contact_details.phone": 1,
+    "password": 1, "active": 1, "version": 1
+}
+
+
+def _batches(cursor, size):
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@identities_cli.command('backfill')
+@click.option('--batch-size', default=500, show_default=True,
+              help="Users upserted per bulk write.")
+def backfill_identities(batch_size):
+    """Create the directory indexes and (re)build its entries from the
+    tenants and admins collections. Safe to run repeatedly.
+
+    The unique email index is created first, so users sharing an email
+    are reported rather than written.
+    """
+    directory = IdentityDirectory(current_app.identitiesCollection)
+    try:
+        directory.ensure_indexes()
+    except OperationFailure as e:
+        for duplicate in directory.duplicate_emails():
+            ids = ", ".join(str(id_) for id_ in duplicate["ids"])
+            click.echo(f"{duplicate['_id']}: shared by {ids}")
+        raise click.ClickException(
+            f"Index creation failed, resolve the conflicts: {e}"
+        )
+    sources = (
+        ("tenant", current_app.tenantsCollection),
+        ("admin", current_app.adminsCollection)
+    )
+    for role, collection in sources:
+        written = conflicts = 0
+        cursor = collection.find({}, IDENTITY_SOURCE_PROJECTION)
+        for batch in _batches(cursor, batch_size):
+            try:
+                written += directory.add_many(batch, role)
+            except BulkWriteError as e:
+                # users sharing an email with a user already in the directory
+                for error in e.details.get("writeErrors", []):
+                    conflicts += 1
+                    click.echo(
+                        f"{role} {batch[error['index']]['_id']}: "
+                        f"{error.get('errmsg')}"
+                    )
+                written += e.details.get("nUpserted", 0) \
+                    + e.details.get("nModified", 0)
+        click.echo(f"{role}s: {written} written, {conflicts} conflicts")
+
+
+@messages_cli.command('migrate-timestamps')
+def migrate_message_timestamps():
+    """Convert the string timestamps of the messages to datetimes and
+    create the room history index. Safe to run repeatedly.
+    """
+    model = CommunicationModel(current_app.messagesCollection)
+    click.echo(f"{model.migrate_timestamps()} messages converted")
+    model.ensure_indexes()
+
+
+@messages_cli.command('archive')
+@click.option('--days', type=float, default=None,
+              help="Retention age, MESSAGES_RETENTION_DAYS by default.")
+def archive_messages(days):
+    """Move the messages past the retention age to the monthly archive
+    buckets and create the archive indexes.
+    """
+    config = current_app.config
+    MessageArchive(current_app.messagesArchiveCollection).ensure_indexes(
+        config['MESSAGES_ARCHIVE_TTL_DAYS']
+    )
+    # the background archiving of the workers holds the same lease
+    lease = Lease(
+        current_app.leasesCollection, "messages-retention",
+        ttl=max(2 * config['MESSAGES_ARCHIVE_INTERVAL'], 300)
+    )
+    if not lease.acquire():
+        raise click.ClickException("Messages are being archived elsewhere")
+    moved = apply_retention(
+        current_app.messagesCollection,
+        current_app.messagesArchiveCollection,
+        config['MESSAGES_RETENTION_DAYS'] if days is None else days,
+        config['MESSAGES_ARCHIVE_BATCH_SIZE'],
+        renew=lease.acquire
+    )
+    click.echo(f"{moved} messages archived")
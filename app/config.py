@@ -15,6 +15,19 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     MONGO_URI = os.environ.get('MONGO_URI')
     MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME')
+    # fail fast when MongoDB is unreachable, so routes fall back to stale
+    # cached responses within seconds instead of pymongo's 30s defaults;
+    # the socket timeout must exceed SOCKETIO_QUEUE_AWAIT_MS and the
+    # slowest query, set it to 0 (none) for long `flask messages` runs
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+        os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 2000)
+    )
+    MONGO_CONNECT_TIMEOUT_MS = int(
+        os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 2000)
+    )
+    MONGO_SOCKET_TIMEOUT_MS = int(
+        os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 10000)
+    )
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = os.environ.get('MAIL_PORT')
     MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL')
@@ -25,6 +38,135 @@ class Config:
     JWT_TOKEN_LOCATION = ast.literal_eval(os.environ.get('JWT_TOKEN_LOCATION'))
     JWT_COOKIE_SECURE = os.environ.get('JWT_COOKIE_SECURE')
     JWT_COOKIE_CSRF_PROTECT = False  # Add this line to disable CSRF protection
+    # number of documents serialized per chunk of a streamed list response
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+    # gzip/brotli response compression
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+    # per-worker response cache of the catalog routes
+    CACHE_MAXSIZE = int(os.environ.get('CACHE_MAXSIZE', 256))
+    CACHE_TTL = float(os.environ.get('CACHE_TTL', 60))
+    # how long past CACHE_TTL the routes allowing it may serve a response
+    # while it is rebuilt, or when MongoDB fails (bounded by CACHE_STALE_TTL)
+    CACHE_STALE_TTL = float(os.environ.get('CACHE_STALE_TTL', 300))
+    CACHE_STALE_WHILE_REVALIDATE = float(
+        os.environ.get('CACHE_STALE_WHILE_REVALIDATE', 30)
+    )
+    CACHE_STALE_IF_ERROR = float(os.environ.get('CACHE_STALE_IF_ERROR', 300))
+    # seconds a worker trusts the collection versions it read from MongoDB
+    CACHE_VERSION_CHECK_INTERVAL = float(
+        os.environ.get('CACHE_VERSION_CHECK_INTERVAL', 1)
+    )
+    # per-worker cache of the user behind a JWT identity
+    IDENTITY_CACHE_MAXSIZE = int(
+        os.environ.get('IDENTITY_CACHE_MAXSIZE', 1024)
+    )
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL', 30))
+    # token-bucket rate limits, shared by all workers through MongoDB
+    # when RATELIMIT_SHARED is true, per worker otherwise
+    RATELIMIT_ENABLED = \
+        os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_SHARED = \
+        os.environ.get('RATELIMIT_SHARED', 'false').lower() == 'true'
+    RATELIMIT_MAX_KEYS = int(os.environ.get('RATELIMIT_MAX_KEYS', 10000))
+    # reverse proxies in front of the app: the client address, which the
+    # per-IP rate limits key on, is read from the X-Forwarded-For entry
+    # they appended. Off by default, as a client reaching the app directly
+    # could pick its own address; set it where a proxy is deployed
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    # concurrency limit and wait queue ("limit:queue") of each route
+    # group per worker, requests beyond both are shed with a 503
+    BULKHEADS_ENABLED = \
+        os.environ.get('BULKHEADS_ENABLED', 'true').lower() == 'true'
+    BULKHEAD_AUTH = os.environ.get('BULKHEAD_AUTH', '8:16')
+    BULKHEAD_BULK_READS = os.environ.get('BULKHEAD_BULK_READS', '4:8')
+    BULKHEAD_WRITES = os.environ.get('BULKHEAD_WRITES', '8:16')
+    BULKHEAD_CHAT = os.environ.get('BULKHEAD_CHAT', '16:32')
+    # seconds a queued request waits for a slot before being shed
+    BULKHEAD_QUEUE_TIMEOUT = float(
+        os.environ.get('BULKHEAD_QUEUE_TIMEOUT', 1)
+    )
+    # comma separated origins, besides the app's own, whose Socket.IO
+    # handshakes may authenticate with the access cookie; the others
+    # send the token in the auth payload
+    SOCKETIO_COOKIE_ORIGINS = [
+        origin.strip() for origin in
+        os.environ.get('SOCKETIO_COOKIE_ORIGINS', '').split(',')
+        if origin.strip()
+    ]
+    # Socket.IO message queue shared by the workers: "mongodb" tails a
+    # capped collection of the database, empty keeps events per worker
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+    SOCKETIO_QUEUE_COLLECTION = os.environ.get(
+        'SOCKETIO_QUEUE_COLLECTION', 'socketioQueue'
+    )
+    SOCKETIO_QUEUE_SIZE = int(
+        os.environ.get('SOCKETIO_QUEUE_SIZE', 16 * 1024 * 1024)
+    )
+    # upper bound, in milliseconds, of the delivery latency of an idle bus
+    SOCKETIO_QUEUE_AWAIT_MS = int(
+        os.environ.get('SOCKETIO_QUEUE_AWAIT_MS', 1000)
+    )
+    # chat messages are inserted in batches by a background thread,
+    # every MESSAGES_FLUSH_INTERVAL_MS or MESSAGES_FLUSH_BATCH_SIZE
+    # messages; writers wait when MESSAGES_MAX_PENDING are queued
+    MESSAGES_WRITE_BEHIND = \
+        os.environ.get('MESSAGES_WRITE_BEHIND', 'false').lower() == 'true'
+    MESSAGES_FLUSH_INTERVAL_MS = float(
+        os.environ.get('MESSAGES_FLUSH_INTERVAL_MS', 5)
+    )
+    MESSAGES_FLUSH_BATCH_SIZE = int(
+        os.environ.get('MESSAGES_FLUSH_BATCH_SIZE', 100)
+    )
+    MESSAGES_MAX_PENDING = int(os.environ.get('MESSAGES_MAX_PENDING', 10000))
+    # messages older than MESSAGES_RETENTION_DAYS move to monthly archive
+    # buckets, by `flask messages archive` or, when
+    # MESSAGES_ARCHIVE_INTERVAL is set, every that many seconds in the
+    # background, by one worker at a time holding the "messages-retention"
+    # lease (taken over two intervals after its holder died); archive
+    # buckets expire
+    # MESSAGES_ARCHIVE_TTL_DAYS after their last message if set
+    MESSAGES_RETENTION_DAYS = float(
+        os.environ.get('MESSAGES_RETENTION_DAYS', 90)
+    )
+    MESSAGES_ARCHIVE_BATCH_SIZE = int(
+        os.environ.get('MESSAGES_ARCHIVE_BATCH_SIZE', 500)
+    )
+    MESSAGES_ARCHIVE_INTERVAL = float(
+        os.environ.get('MESSAGES_ARCHIVE_INTERVAL', 0)
+    )
+    MESSAGES_ARCHIVE_TTL_DAYS = float(
+        os.environ.get('MESSAGES_ARCHIVE_TTL_DAYS', 0)
+    )
+    # events emitted to the same room within this window, in
+    # milliseconds, are sent as one "batch" frame to the clients that
+    # connected with auth {"batch": true}; 0 emits each at once. Other
+    # clients always receive each event at once
+    SOCKETIO_EMIT_WINDOW_MS = float(
+        os.environ.get('SOCKETIO_EMIT_WINDOW_MS', 20)
+    )
+    SOCKETIO_EMIT_MAX_BATCH = int(
+        os.environ.get('SOCKETIO_EMIT_MAX_BATCH', 100)
+    )
+    # inbox entries inserted per insert_many when an admin message is
+    # fanned out to its tenants
+    INBOX_FANOUT_BATCH_SIZE = int(
+        os.environ.get('INBOX_FANOUT_BATCH_SIZE', 1000)
+    )
+    # email campaigns: emails sent over one SMTP connection, and emails
+    # per second at most (0 for no limit)
+    CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE', 50))
+    CAMPAIGN_RATE_PER_SECOND = float(
+        os.environ.get('CAMPAIGN_RATE_PER_SECOND', 10)
+    )
+    # seconds without progress after which a running campaign is deemed
+    # abandoned by its worker and taken over; must exceed a batch duration
+    CAMPAIGN_STALE_SECONDS = float(
+        os.environ.get('CAMPAIGN_STALE_SECONDS', 600)
+    )
+    # seconds a coalesced request waits for the identical one in flight
+    SINGLEFLIGHT_TIMEOUT = float(os.environ.get('SINGLEFLIGHT_TIMEOUT', 10))
 
 
 class TestingConfig(Config):
@@ -2,10 +2,35 @@
 """model for admins"""
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> admin document path
+ADMIN_FIELDS = FieldMap({
+    "adminId": "_id",
+    "dateCreated": "date_created",
+    "fname": "name.fname",
+    "lname": "name.lname",
+    "sex": "sex",
+    "DoB": "dob",
+    "phone": "contact_details.phone",
+    "email": "contact_details.email",
+    "address": "contact_details.address",
+    "emergencyContactName": "emergency_contact.name",
+    "emergencyContactPhone": "emergency_contact.phone",
+    "emergencyContactAddress": "emergency_contact.address"
+})
 
-class Admin:
+
+class Admin(Model):
     """class of the admin instance"""
+    __slots__ = (
+        "admin_id", "date_created", "name", "password", "dob", "sex",
+        "contact_details", "emergency_contact", "active", "role"
+    )
+    DOCUMENT_KEYS = {"admin_id": "_id"}
+    API_FIELDS = ADMIN_FIELDS
+
     def __init__(
         self, name, password, dob, sex, contact_details, emergency_contact, role, admin_id=None,
         active=True
@@ -29,18 +54,3 @@ class Admin:
         self.emergency_contact = emergency_contact
         self.role = role
         self.active = active
-
-    def to_dict(self):
-        """returns the dictionary of all the admin attributes"""
-        return {
-            "_id": self.admin_id,
-            "date_created": self.date_created,
-            "name": self.name,
-            "password": self.password,
-            "dob": self.dob,
-            "sex": self.sex,
-            "contact_details": self.contact_details,
-            "emergency_contact": self.emergency_contact,
-            "active": self.active,
-            "role": self.role
-        }
@@ -2,10 +2,26 @@
 """model for admin messages"""
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> admin message document path
+ADMIN_MESSAGE_FIELDS = FieldMap({
+    "messageId": "_id",
+    "dateCreated": "date_created",
+    "message": "message",
+    "title": "title"
+})
 
-class AdminMessage:
+
+class AdminMessage(Model):
     """Class of the admin message instance"""
+    __slots__ = (
+        "message_id", "date_created", "message", "title"
+    )
+    DOCUMENT_KEYS = {"message_id": "_id"}
+    API_FIELDS = ADMIN_MESSAGE_FIELDS
+
     def __init__(self, message, title, message_id=None):
         """Initializer/object constructor.
         Args:
@@ -18,14 +34,3 @@ class AdminMessage:
         self.date_created = datetime.now()
         self.message = message
         self.title = title
-
-    def to_dict(self):
-        """returns the dictionary of all
-        the AdminMessage attricutes
-        """
-        return {
-            "_id": self.message_id,
-            "date_created": self.date_created,
-            "message": self.message,
-            "title": self.title
-        }
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""base class of the document models"""
+
+
+class Model:
+    """Base class of the document models.
+
+    Subclasses list their attributes in ``__slots__``, the document keys
+    that differ from the attribute name in ``DOCUMENT_KEYS`` and their API
+    representation in ``API_FIELDS``. The attribute/document key pairs are
+    compiled once per class.
+    """
+    __slots__ = ()
+    DOCUMENT_KEYS = {}
+    API_FIELDS = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._document_items = tuple(
+            (attr, cls.DOCUMENT_KEYS.get(attr, attr))
+            for attr in cls.__slots__
+        )
+
+    @classmethod
+    def from_doc(cls, doc):
+        """Build an instance from a MongoDB document, bypassing __init__"""
+        instance = cls.__new__(cls)
+        for attr, key in cls._document_items:
+            setattr(instance, attr, doc.get(key))
+        return instance
+
+    @classmethod
+    def serializer(cls, names=None):
+        """Return a function mapping a document straight to its API dict"""
+        return cls.API_FIELDS.serializer(names)
+
+    def to_dict(self):
+        """returns the MongoDB document of the instance"""
+        return {key: getattr(self, attr) for attr, key in self._document_items}
+
+    def to_api(self, names=None):
+        """returns the API representation of the instance"""
+        return self.API_FIELDS.to_api(self.to_dict(), names)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Email campaign model.
+
+A campaign emails an admin message to its tenants in the background; its
+document tracks the progress so admins can follow a long send:
+
+    {_id, message_id, title, status, active, runner, sent, failed,
+     failures, last_tenant_id, date_created, started, updated, finished,
+     seconds, error}
+
+``status`` goes pending -> running -> done | failed, ``failures`` keeps
+the last MAX_FAILURES recipients that could not be emailed.
+
+A message has one active (pending or running) campaign at most, enforced
+by a partial unique index on ``message_id``. Recipients are sent in _id
+order and every batch moves ``last_tenant_id`` and the ``updated``
+heartbeat forward: a campaign whose worker died stops beating and is
+taken over, resuming after its last recorded tenant. A batch sent but
+not recorded before the crash is sent again. Taking over changes the
+``runner`` token every write of the sender matches, so a sender that was
+only slow finds itself superseded and stops.
+"""
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.collection import Collection
+
+MAX_FAILURES = 100
+
+
+class Campaigns:
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self._indexed = False
+
+    def ensure_indexes(self):
+        """Create the index allowing one active campaign per message"""
+        self.collection.create_index(
+            [("message_id", ASCENDING)], name="active_message",
+            unique=True, partialFilterExpression={"active": True}
+        )
+        self._indexed = True
+
+    def create(self, message: dict):
+        """Store a pending campaign of the admin ``message``, return it.
+        Raises:
+            DuplicateKeyError: if the message has an active campaign
+        """
+        if not self._indexed:
+            self.ensure_indexes()
+        now = datetime.now()
+        campaign = {
+            "message_id": message["_id"],
+            "title": message.get("title"),
+            "status": "pending",
+            "active": True,
+            "runner": ObjectId(),
+            "sent": 0,
+            "failed": 0,
+            "failures": [],
+            "last_tenant_id": None,
+            "date_created": now,
+            "updated": now
+        }
+        self.collection.insert_one(campaign)
+        return campaign
+
+    def active(self, message_id):
+        """Return the pending or running campaign of ``message_id``, if any"""
+        return self.collection.find_one(
+            {"message_id": message_id, "active": True}, {"_id": 1}
+        )
+
+    def take_over(self, message_id, stale_seconds):
+        """Claim the active campaign of ``message_id`` if it has not beaten
+        for ``stale_seconds``, return it or None
+        """
+        now = datetime.now()
+        return self.collection.find_one_and_update(
+            {"message_id": message_id, "active": True,
+             "updated": {"$lt": now - timedelta(seconds=stale_seconds)}},
+            {"$set": {"status": "pending", "updated": now,
+                      "runner": ObjectId()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def _owned(campaign):
+        """Query of ``campaign`` as long as its runner was not replaced"""
+        return {"_id": campaign["_id"], "runner": campaign["runner"]}
+
+    def start(self, campaign) -> bool:
+        """Mark ``campaign`` running, False if it was taken over"""
+        now = datetime.now()
+        result = self.collection.update_one(
+            self._owned(campaign),
+            {"$set": {"status": "running", "updated": now},
+             "$min": {"started": now}}
+        )
+        return result.matched_count == 1
+
+    def progress(self, campaign, sent, failures, last_tenant_id) -> bool:
+        """Count ``sent`` more emails and the ``failures``, a list of
+        {"tenant_id", "email", "error"}, of a batch ending at
+        ``last_tenant_id``. False if ``campaign`` was taken over.
+        """
+        update = {
+            "$inc": {"sent": sent, "failed": len(failures)},
+            "$set": {"last_tenant_id": last_tenant_id,
+                     "updated": datetime.now()}
+        }
+        if failures:
+            update["$push"] = {
+                "failures": {"$each": failures, "$slice": -MAX_FAILURES}
+            }
+        result = self.collection.update_one(self._owned(campaign), update)
+        return result.matched_count == 1
+
+    def finish(self, campaign, seconds, error=None):
+        """Close ``campaign``, failed if ``error`` stopped it, unless it
+        was taken over
+        """
+        now = datetime.now()
+        self.collection.update_one(
+            self._owned(campaign),
+            {"$set": {
+                "status": "failed" if error else "done",
+                "error": error,
+                "finished": now,
+                "updated": now,
+                "seconds": round(seconds, 3)
+            }, "$unset": {"active": ""}}
+        )
+
+    def get(self, campaign_id):
+        return self.collection.find_one({"_id": campaign_id})
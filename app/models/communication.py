@@ -1,14 +1,252 @@
 #!/usr/bin/env python3
-"""Communication models module"""
+"""Communication models module.
+
+Every message belongs to a room:
+
+- ``general``: the board every user reads (messages without room_id)
+- ``tenant:<tenant id>``: the thread of a tenant with the admins
+- ``property:<property id>``: the tenants of a property and the admins
+
+Admins take part in every room through the ``admins`` room.
+
+Messages older than the retention age move to the archive, one bucket
+document per room and month holding up to ARCHIVE_BUCKET_SIZE messages:
+
+    {room_id, month: "YYYY-MM", count, last, messages: [...]}
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 from pymongo.collection import Collection
 
+GENERAL_ROOM = "general"
+ADMINS_ROOM = "admins"
+# counts the admin messages in the unread counters of the tenants
+ANNOUNCEMENTS_ROOM = "announcements"
+# format of the string timestamps stored before datetimes
+LEGACY_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# messages per archive bucket, far below the 16MB document limit
+ARCHIVE_BUCKET_SIZE = 1000
+
+
+def tenant_room(tenant_id):
+    return f"tenant:{tenant_id}"
+
+
+def property_room(property_id):
+    return f"property:{property_id}"
+
+
+def user_rooms(role, uid, property_id=None):
+    """Return the rooms of a user"""
+    if role == 'admin':
+        return [GENERAL_ROOM, ADMINS_ROOM]
+    rooms = [GENERAL_ROOM, tenant_room(uid)]
+    if property_id:
+        rooms.append(property_room(property_id))
+    return rooms
+
+
+def can_access(role, rooms, room_id):
+    """Return True if a user in ``rooms`` may read and post in room_id"""
+    if role == 'admin':
+        return room_id == GENERAL_ROOM or \
+            room_id.startswith(("tenant:", "property:"))
+    return room_id in rooms
+
+
 class CommunicationModel:
-    def __init__(self, collection: Collection):
+    def __init__(self, collection: Collection, writer=None):
+        """Initializer/object constructor.
+        Args:
+            collection (Collection): the messages
+            writer (WriteBehind): batches the inserts, None to insert
+                each message synchronously
+        """
         self.collection = collection
+        self.writer = writer
+        self._indexed = False
+
+    def ensure_indexes(self):
+        """Create the indexes serving the history of a room and the
+        archiving of the oldest messages across rooms
+        """
+        self.collection.create_index(
+            [("room_id", ASCENDING), ("timestamp", ASCENDING),
+             ("_id", ASCENDING)],
+            name="room_timestamp_id"
+        )
+        self.collection.create_index(
+            [("timestamp", ASCENDING)], name="timestamp"
+        )
+        self._indexed = True
 
-    def add_message(self, message: dict):
+    def add_message(self, message: dict, meta=None):
+        """Store ``message``, return its _id. ``meta`` goes to the
+        on_written callback of the writer once the message is written.
+        Raises:
+            BufferFull: if the write-behind buffer stays full
+        """
+        if not self._indexed:
+            self.ensure_indexes()
+        if self.writer is not None:
+            return self.writer.insert(message, meta)
         result = self.collection.insert_one(message)
         return result.inserted_id
 
     def get_all_messages(self):
         return list(self.collection.find().sort("timestamp", 1))
+
+    @staticmethod
+    def room_query(room_id):
+        """Query of the messages of ``room_id``, the general room includes
+        the messages posted before rooms
+        """
+        room = [GENERAL_ROOM, None] if room_id == GENERAL_ROOM else [room_id]
+        return {"room_id": {"$in": room}}
+
+    @staticmethod
+    def _after(bound, bound_id, op):
+        """Condition on the messages strictly ``op`` ("$gt" or "$lt") the
+        cursor (``bound``, ``bound_id``), or ``bound`` alone without _id
+        """
+        if bound_id is None:
+            return {"timestamp": {op: bound}}
+        return {"$or": [
+            {"timestamp": {op: bound}},
+            {"timestamp": bound, "_id": {op: bound_id}}
+        ]}
+
+    def page(self, room_id, before=None, since=None, limit=50,
+             before_id=None, since_id=None):
+        """Return up to ``limit`` messages of ``room_id`` in posting order:
+        the last ones before the cursor (``before``, ``before_id``), the
+        latest by default, or the first ones after (``since``,
+        ``since_id``). Cursors are exclusive; the _id, of the last message
+        seen, breaks the ties between messages of the same timestamp.
+        """
+        query = self.room_query(room_id)
+        if since is not None:
+            query.update(self._after(since, since_id, "$gt"))
+            return list(self.collection.find(query).sort(
+                [("timestamp", ASCENDING), ("_id", ASCENDING)]
+            ).limit(limit))
+        if before is not None:
+            query.update(self._after(before, before_id, "$lt"))
+        messages = list(self.collection.find(query).sort(
+            [("timestamp", DESCENDING), ("_id", DESCENDING)]
+        ).limit(limit))
+        messages.reverse()
+        return messages
+
+    def migrate_timestamps(self):
+        """Convert the string timestamps to datetimes, in place.
+        Return the number of messages converted.
+        """
+        result = self.collection.update_many(
+            {"timestamp": {"$type": "string"}},
+            [{"$set": {"timestamp": {"$dateFromString": {
+                "dateString": "$timestamp",
+                "format": LEGACY_TIMESTAMP_FORMAT,
+                "timezone": "UTC",
+                "onError": "$timestamp"
+            }}}}]
+        )
+        return result.modified_count
+
+    def archive_before(self, cutoff, archive, batch_size=500, renew=None):
+        """Move the messages posted before ``cutoff`` to ``archive``, oldest
+        first, ``batch_size`` at a time. Return the number moved.
+
+        Messages are deleted once their batch is archived; a run stopped
+        in between archives that batch again at the next run, and the
+        archive reads drop the duplicates. ``renew()`` is called before
+        each batch, the run stops when it returns False.
+        """
+        if not self._indexed:
+            self.ensure_indexes()
+        moved = 0
+        while True:
+            if renew is not None and not renew():
+                return moved
+            batch = list(self.collection.find(
+                {"timestamp": {"$lt": cutoff}}
+            ).sort("timestamp", ASCENDING).limit(batch_size))
+            if not batch:
+                return moved
+            archive.add_many(batch)
+            self.collection.delete_many(
+                {"_id": {"$in": [message["_id"] for message in batch]}}
+            )
+            moved += len(batch)
+
+
+class MessageArchive:
+    """Monthly buckets of the messages past the retention age"""
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self, ttl_days=0):
+        """Create the bucket lookup index, and a TTL index dropping the
+        buckets whose last message is older than ``ttl_days`` if set
+        """
+        self.collection.create_index(
+            [("room_id", ASCENDING), ("month", ASCENDING),
+             ("count", ASCENDING)],
+            name="room_month"
+        )
+        if ttl_days:
+            self.collection.create_index(
+                [("last", ASCENDING)], name="last_ttl",
+                expireAfterSeconds=int(ttl_days * 86400)
+            )
+
+    @staticmethod
+    def month(timestamp: datetime) -> str:
+        return timestamp.strftime("%Y-%m")
+
+    def add_many(self, messages):
+        """Push ``messages`` into the buckets of their room and month, a
+        full bucket is followed by a new one
+        """
+        buckets = defaultdict(list)
+        for message in messages:
+            room_id = message.get("room_id") or GENERAL_ROOM
+            buckets[(room_id, self.month(message["timestamp"]))] \
+                .append(message)
+        requests = []
+        for (room_id, month), bucket in buckets.items():
+            for start in range(0, len(bucket), ARCHIVE_BUCKET_SIZE):
+                chunk = bucket[start:start + ARCHIVE_BUCKET_SIZE]
+                requests.append(UpdateOne(
+                    {"room_id": room_id, "month": month,
+                     "count": {"$lte": ARCHIVE_BUCKET_SIZE - len(chunk)}},
+                    {"$push": {"messages": {"$each": chunk}},
+                     "$inc": {"count": len(chunk)},
+                     "$max": {"last": chunk[-1]["timestamp"]}},
+                    upsert=True
+                ))
+        if requests:
+            self.collection.bulk_write(requests, ordered=True)
+
+    def find_month(self, room_id, month):
+        """Return the archived messages of ``room_id`` in ``month``
+        ("YYYY-MM") in posting order
+        """
+        messages = {}
+        for bucket in self.collection.find(
+                {"room_id": room_id, "month": month}, {"messages": 1}):
+            for message in bucket.get("messages", []):
+                messages[message["_id"]] = message
+        return sorted(messages.values(), key=lambda m: m["timestamp"])
+
+
+def apply_retention(messages: Collection, archive: Collection, days,
+                    batch_size=500, renew=None):
+    """Archive the messages older than ``days``, return the number moved.
+    ``renew()`` is checked before each batch, see archive_before.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return CommunicationModel(messages).archive_before(
+        cutoff, MessageArchive(archive), batch_size, renew
+    )
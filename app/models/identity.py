@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Identity directory model.
+
+One compact document per tenant or admin, sharing the _id of the user
+document, so authentication flows find any user with a single indexed
+lookup regardless of role:
+
+    {_id, email, phone, role, name, password, active, version}
+"""
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.collection import Collection
+from app.utils.identity import display_name
+
+# fields read to authenticate a user and fill the token claims
+AUTH_PROJECTION = {"role": 1, "name": 1, "password": 1, "active": 1}
+
+
+class IdentityDirectory:
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """Create the lookup indexes, email is unique across roles"""
+        self.collection.create_index(
+            [("email", ASCENDING)], unique=True, name="email_unique"
+        )
+        self.collection.create_index([("phone", ASCENDING)], name="phone")
+
+    @staticmethod
+    def entry(user: dict, role: str) -> dict:
+        """Return the directory document of a tenant/admin document"""
+        contact_details = user.get("contact_details") or {}
+        email = contact_details.get("email")
+        return {
+            "_id": user["_id"],
+            "email": email.strip().lower() if email else email,
+            "phone": contact_details.get("phone"),
+            "role": role,
+            "name": display_name(user),
+            "password": user.get("password"),
+            "active": user.get("active", True),
+            "version": user.get("version") or 1
+        }
+
+    def add(self, user: dict, role: str):
+        """Insert the entry of a new tenant/admin document.
+        Raises:
+            DuplicateKeyError: if a user of any role has the same email
+        """
+        self.collection.insert_one(self.entry(user, role))
+
+    def remove(self, user_id):
+        """Delete the entry of ``user_id``"""
+        self.collection.delete_one({"_id": user_id})
+
+    def add_many(self, users, role: str) -> int:
+        """Upsert the entries of ``users`` in one bulk write.
+        Raises:
+            BulkWriteError: if users have the email of another entry, its
+                writeErrors index ``users``
+        """
+        requests = [
+            ReplaceOne({"_id": user["_id"]}, self.entry(user, role),
+                       upsert=True)
+            for user in users
+        ]
+        if not requests:
+            return 0
+        result = self.collection.bulk_write(requests, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def duplicate_emails(self):
+        """Return [{"_id": email, "ids": [user ids]}] of the emails shared
+        by several entries, which prevent the unique email index
+        """
+        return list(self.collection.aggregate([
+            {"$group": {"_id": "$email", "ids": {"$push": "$_id"},
+                        "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ]))
+
+    def update(self, user_id, fields: dict):
+        """Set ``fields`` on the entry of ``user_id``, bumping its version"""
+        self.collection.update_one(
+            {"_id": user_id}, {"$set": fields, "$inc": {"version": 1}}
+        )
+
+    def update_contact(self, user_id, user: dict):
+        """Resync the searchable fields after a tenant/admin update"""
+        entry = self.entry(dict(user, _id=user_id), None)
+        self.update(user_id, {
+            "email": entry["email"], "phone": entry["phone"],
+            "name": entry["name"]
+        })
+
+    def find_by_email(self, email: str, projection=None):
+        """Return the entry of ``email``, any role"""
+        return self.collection.find_one(
+            {"email": email.strip().lower()}, projection
+        )
+
+    def exists(self, email: str, phone: str, exclude_id=None) -> bool:
+        """Return True if a user of any role, other than ``exclude_id``,
+        has ``email`` or ``phone``
+        """
+        query = {"$or": [{"email": email.strip().lower()}, {"phone": phone}]}
+        if exclude_id is not None:
+            query["_id"] = {"$ne": exclude_id}
+        return self.collection.find_one(query, {"_id": 1}) is not None
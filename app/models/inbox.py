@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tenant inbox model.
+
+Admin messages are fanned out on write: every targeted tenant gets its
+own inbox entry, a copy of the announcement, so a tenant reads a page of
+its inbox with one indexed query and keeps a read flag per entry.
+
+    {_id, tenant_id, message_id, title, message, date_created, read}
+
+A tenant has one entry per message, enforced by a unique index: a
+delivery run again after a failure skips the tenants already served.
+Editing or deleting the admin message edits or deletes its entries.
+"""
+import time
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+# entry fields copied from the admin message
+ENTRY_FIELDS = ("title", "message")
+
+
+def audience_query(audience, property_id=None, tenant_ids=None):
+    """Return the query of the active tenants targeted by ``audience``:
+    "all", "property" (renting ``property_id``) or "tenants" (``tenant_ids``)
+    Raises:
+        ValueError: if the target of the audience is missing or invalid
+    """
+    query = {"active": True}
+    if audience == "property":
+        if not property_id:
+            raise ValueError("propertyId is required for a property audience")
+        query["tenancy_info.propertyId"] = property_id
+    elif audience == "tenants":
+        if not tenant_ids:
+            raise ValueError("tenantIds is required for a tenants audience")
+        try:
+            query["_id"] = {"$in": [ObjectId(id_) for id_ in tenant_ids]}
+        except Exception:
+            raise ValueError("Invalid tenant ID format")
+    return query
+
+
+class Inbox:
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self._indexed = False
+
+    def ensure_indexes(self):
+        """Create the indexes serving the pages and unread count of a
+        tenant, and the one entry per message of a tenant"""
+        self.collection.create_index(
+            [("tenant_id", ASCENDING), ("date_created", DESCENDING),
+             ("_id", DESCENDING)],
+            name="tenant_date_id"
+        )
+        self.collection.create_index(
+            [("tenant_id", ASCENDING), ("read", ASCENDING)],
+            name="tenant_read"
+        )
+        # message_id first, it also serves the edits of a message
+        self.collection.create_index(
+            [("message_id", ASCENDING), ("tenant_id", ASCENDING)],
+            name="message_tenant", unique=True
+        )
+        self._indexed = True
+
+    def _insert(self, batch):
+        """Insert a batch of entries, those already delivered are skipped"""
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+
+    def fan_out(self, message: dict, tenant_ids, batch_size=1000,
+                progress=None):
+        """Insert an entry of ``message`` for each of ``tenant_ids``, with
+        one insert_many per ``batch_size`` tenants; tenants who already
+        have it count as delivered.
+        Return {"delivered", "seconds", "per_second"}.
+
+        ``progress(delivered)`` is called after every batch.
+        """
+        if not self._indexed:
+            self.ensure_indexes()
+        started = time.monotonic()
+        entry = {
+            "message_id": message["_id"],
+            "title": message.get("title"),
+            "message": message.get("message"),
+            "date_created": message.get("date_created"),
+            "read": False
+        }
+        delivered = 0
+        batch = []
+        for tenant_id in tenant_ids:
+            batch.append(dict(entry, tenant_id=tenant_id))
+            if len(batch) >= batch_size:
+                self._insert(batch)
+                delivered += len(batch)
+                batch = []
+                if progress:
+                    progress(delivered)
+        if batch:
+            self._insert(batch)
+            delivered += len(batch)
+        seconds = time.monotonic() - started
+        return {
+            "delivered": delivered,
+            "seconds": round(seconds, 3),
+            "per_second": round(delivered / seconds, 1) if seconds else None
+        }
+
+    def update_message(self, message_id, fields: dict):
+        """Copy the edited ``fields`` of an admin message to its entries"""
+        update = {key: fields[key] for key in ENTRY_FIELDS if key in fields}
+        if update:
+            self.collection.update_many(
+                {"message_id": message_id}, {"$set": update}
+            )
+
+    def delete_message(self, message_id):
+        """Delete the entries of an admin message"""
+        self.collection.delete_many({"message_id": message_id})
+
+    def page(self, tenant_id, before=None, limit=20, before_id=None):
+        """Return the ``limit`` latest entries of ``tenant_id`` before the
+        cursor (``before``, ``before_id``), exclusive, newest first. The
+        entries of one delivery share their date, the _id of the last
+        entry seen breaks the ties.
+        """
+        query = {"tenant_id": tenant_id}
+        if before is not None:
+            if before_id is None:
+                query["date_created"] = {"$lt": before}
+            else:
+                query["$or"] = [
+                    {"date_created": {"$lt": before}},
+                    {"date_created": before, "_id": {"$lt": before_id}}
+                ]
+        return list(self.collection.find(query).sort(
+            [("date_created", DESCENDING), ("_id", DESCENDING)]
+        ).limit(limit))
+
+    def mark_read(self, tenant_id, entry_id) -> bool:
+        """Mark an entry of ``tenant_id`` read, False if it does not exist"""
+        result = self.collection.update_one(
+            {"_id": entry_id, "tenant_id": tenant_id},
+            {"$set": {"read": True}}
+        )
+        return result.matched_count == 1
+
+    def mark_all_read(self, tenant_id):
+        """Mark every entry of ``tenant_id`` read"""
+        self.collection.update_many(
+            {"tenant_id": tenant_id, "read": False}, {"$set": {"read": True}}
+        )
+
+    def unread_count(self, tenant_id) -> int:
+        return self.collection.count_documents(
+            {"tenant_id": tenant_id, "read": False}
+        )
@@ -4,10 +4,29 @@
 
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> listed property document path
+LISTING_FIELDS = FieldMap({
+    "propertyId": "_id",
+    "dateCreated": "date_created",
+    "address": "address",
+    "type": "type",
+    "unitAvailability": "unit_availability",
+    "rentalFees": "rental_fees"
+})
 
-class Listing:
+
+class Listing(Model):
     """Class of property listed"""
+    __slots__ = (
+        "property_id", "date_created", "address", "property_type",
+        "unit_availability", "rental_fees"
+    )
+    DOCUMENT_KEYS = {"property_id": "_id", "property_type": "type"}
+    API_FIELDS = LISTING_FIELDS
+
     def __init__(
         self, address, property_type, unit_availability,
         rental_fees, property_id=None
@@ -26,14 +45,3 @@ class Listing:
         self.property_type = property_type
         self.unit_availability = unit_availability
         self.rental_fees = rental_fees
-
-    def to_dict(self):
-        """Returns the dictionary of all the listed property attributes"""
-        return {
-            "_id": self.property_id,
-            "date_created": self.address,
-            "address": self.address,
-            "type": self.property_type,
-            "unit_availability": self.unit_availability,
-            "rental_fees": self.rental_fees
-        }
@@ -2,14 +2,37 @@
 """Model for log requests"""
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> log request document path
+LOG_REQUEST_FIELDS = FieldMap({
+    "requestId": "_id",
+    "loggedBy": "logged_by",
+    "submittedDate": "submitted_date",
+    "requestType": "request_type",
+    "urgencyLevel": "urgency_level",
+    "propertyAddress": "property_address",
+    "description": "description",
+    "status": "status",
+    "version": "version"
+})
 
-class LogRequest:
+
+class LogRequest(Model):
     """Class for the log request instance"""
+    __slots__ = (
+        "log_request_id", "submitted_date", "request_type", "urgency_level",
+        "property_address", "description", "logged_by", "status", "archive",
+        "version"
+    )
+    DOCUMENT_KEYS = {"log_request_id": "_id"}
+    API_FIELDS = LOG_REQUEST_FIELDS
+
     def __init__(
         self, request_type="", urgency_level="", property_address="",
         description="", submitted_date=None, status="pending",
-        logged_by="", log_request_id=None, archive=False
+        logged_by="", log_request_id=None, archive=False, version=1
     ):
         """Initializer/object constructor.
         Args:
@@ -21,6 +44,7 @@ class LogRequest:
             submitted_date  (datetime): Date the request was submitted
             status  (str): Status of the request
             archive (bool): Archive status of the request
+            version (int): incremented on every write
         """
         self.log_request_id = log_request_id if log_request_id else ObjectId()
         self.submitted_date = submitted_date if submitted_date \
@@ -32,18 +56,4 @@ class LogRequest:
         self.logged_by = logged_by
         self.status = status
         self.archive = archive
-
-    def to_dict(self):
-        """Returns the dictionary of all the LogRequest attribute
-        """
-        return {
-            "_id": self.log_request_id,
-            "submitted_date": self.submitted_date,
-            "request_type": self.request_type,
-            "urgency_level": self.urgency_level,
-            "property_address": self.property_address,
-            "description": self.description,
-            "logged_by": self.logged_by,
-            "status": self.status,
-            "archive": self.archive
-        }
+        self.version = version
@@ -4,13 +4,33 @@
 
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> property document path
+PROPERTY_FIELDS = FieldMap({
+    "propertyId": "_id",
+    "dateCreated": "date_created",
+    "address": "address",
+    "type": "type",
+    "unitAvailability": "unit_availability",
+    "rentalFees": "rental_fees",
+    "version": "version"
+})
 
-class Property:
+
+class Property(Model):
     """Class representing a property instance"""
+    __slots__ = (
+        "property_id", "date_created", "address", "property_type",
+        "unit_availability", "rental_fees", "version"
+    )
+    DOCUMENT_KEYS = {"property_id": "_id", "property_type": "type"}
+    API_FIELDS = PROPERTY_FIELDS
+
     def __init__(
         self, address, property_type, unit_availability,
-        rental_fees, property_id=None
+        rental_fees, property_id=None, version=1
     ):
         """
         Initializer/object constructor.
@@ -19,6 +39,7 @@ class Property:
             property_type (str): Type of the property
             unit_availability  (bool): Availability of units in the property
             rental_fees  (float): Rental fees for the property
+            version (int): incremented on every write
         """
         self.property_id = property_id if property_id else ObjectId()
         self.date_created = datetime.now()
@@ -26,14 +47,4 @@ class Property:
         self.property_type = property_type
         self.unit_availability = unit_availability
         self.rental_fees = rental_fees
-
-    def to_dict(self):
-        """Returns the dictionary of all the property attributes"""
-        return {
-            "_id": self.property_id,
-            "date_created": self.address,
-            "address": self.address,
-            "type": self.property_type,
-            "unit_availability": self.unit_availability,
-            "rental_fees": self.rental_fees
-        }
+        self.version = version
@@ -2,14 +2,49 @@
 """model for tenants"""
 from bson.objectid import ObjectId
 from datetime import datetime
+from app.models.base import Model
+from app.utils.fields import FieldMap
 
+# API field name -> tenant document path
+TENANT_FIELDS = FieldMap({
+    "tenantId": "_id",
+    "dateCreated": "date_created",
+    "lastUpdated": "date_updated",
+    "fname": "name.fname",
+    "lname": "name.lname",
+    "sex": "sex",
+    "DoB": "dob",
+    "phone": "contact_details.phone",
+    "email": "contact_details.email",
+    "address": "contact_details.address",
+    "rentageFee": "tenancy_info.fees",
+    "rentagePaid": "tenancy_info.paid",
+    "datePaid": "tenancy_info.datePaid",
+    "rantageStarted": "tenancy_info.start",
+    "rantageExpires": "tenancy_info.expires",
+    "rentageArrears": "tenancy_info.arrears",
+    "emergencyContactName": "emergency_contact.name",
+    "emergencyContactPhone": "emergency_contact.phone",
+    "emergencyContactAddress": "emergency_contact.address",
+    "leaseAgreementDetails": "lease_agreement_details",
+    "version": "version"
+})
 
-class Tenant:
+
+class Tenant(Model):
     """class of the tenant instance"""
+    __slots__ = (
+        "tenant_id", "date_created", "date_updated", "name", "password",
+        "dob", "sex", "contact_details", "emergency_contact", "tenancy_info",
+        "lease_agreement_details", "active", "role", "version"
+    )
+    DOCUMENT_KEYS = {"tenant_id": "_id"}
+    API_FIELDS = TENANT_FIELDS
+
     def __init__(
         self, name, password, dob, sex, contact_details, emergency_contact,
         tenancy_info, lease_agreement_details, role, date_updated=None,
-        tenant_id=None, active=True
+        tenant_id=None, active=True, version=1
     ):
         """Initializer/object constructor.
         Args:
@@ -20,6 +55,7 @@ class Tenant:
             emergency_contact (dict): dict name, phone, address
             lease_agreement_details (str): url of leease agreement
             active  (bool): Status of Tenancy. True by default
+            version (int): incremented on every write
         """
         self.tenant_id = tenant_id if tenant_id else ObjectId()
         self.date_created = datetime.now()
@@ -34,21 +70,4 @@ class Tenant:
         self.lease_agreement_details = lease_agreement_details
         self.active = active
         self.role = role
-
-    def to_dict(self):
-        """returns the dictionary of all the Tenant attributes"""
-        return {
-            "_id": self.tenant_id,
-            "date_created": self.date_created,
-            "date_updated": self.date_updated,
-            "name": self.name,
-            "password": self.password,
-            "dob": self.dob,
-            "sex": self.sex,
-            "contact_details": self.contact_details,
-            "emergency_contact": self.emergency_contact,
-            "tenancy_info": self.tenancy_info,
-            "lease_agreement_details": self.lease_agreement_details,
-            "active": self.active,
-            "role": self.role
-        }
+        self.version = version
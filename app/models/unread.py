@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Unread counters model.
+
+Every room has a counter of the messages ever posted to it, incremented
+with ``$inc`` on write, and every user a read cursor per room holding the
+counter value they last read, moved forward on read. Unread is counter
+minus cursor: a message costs one update whatever the number of members
+of its room, and the unread counts of a user are two indexed reads.
+
+Posted messages are counted in batches, after the write-behind flush
+when it is enabled: one ``$inc`` per room returning the new count, from
+which the cursor of each sender is set to its own message, not past the
+messages posted concurrently by others.
+
+A user first seen in a room has read its history: the first ``unread``
+without a cursor there seeds it at the current count.
+
+    roomCounters: {_id: room_id, count}
+    readCursors: {_id: "<user>|<room_id>", user, room_id, read}
+"""
+from collections import Counter
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.collection import Collection
+
+
+def user_key(role, uid):
+    """Identify a user across roles"""
+    return f"{role}:{uid}"
+
+
+def key_uid(key):
+    """Return the uid of a user_key"""
+    return key.split(":", 1)[1]
+
+
+class UnreadCounters:
+    def __init__(self, counters: Collection, cursors: Collection):
+        self.counters = counters
+        self.cursors = cursors
+
+    def incr(self, *room_ids):
+        """Count one more message in each of ``room_ids``"""
+        self.counters.bulk_write([
+            UpdateOne({"_id": room_id}, {"$inc": {"count": 1}}, upsert=True)
+            for room_id in room_ids
+        ], ordered=False)
+
+    def count(self, posts):
+        """Count posted messages; ``posts`` is a list of (room_ids, sender,
+        room_id) in posting order: one more message in each of room_ids,
+        read by its sender (None for nobody) in room_id up to itself
+        """
+        added = Counter(room for room_ids, _, _ in posts for room in room_ids)
+        counts = {}
+        for room_id, amount in added.items():
+            counter = self.counters.find_one_and_update(
+                {"_id": room_id}, {"$inc": {"count": amount}},
+                projection={"count": 1}, upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            # the count before this batch
+            counts[room_id] = counter["count"] - amount
+        read = {}
+        for room_ids, sender, room_id in posts:
+            for room in room_ids:
+                counts[room] += 1
+            if sender:
+                read[(sender, room_id)] = counts[room_id]
+        if read:
+            self.cursors.bulk_write([
+                UpdateOne(
+                    {"_id": f"{user}|{room_id}"},
+                    {"$max": {"read": position},
+                     "$setOnInsert": {"user": user, "room_id": room_id}},
+                    upsert=True
+                )
+                for (user, room_id), position in read.items()
+            ], ordered=False)
+
+    def mark_read(self, user, room_id):
+        """Move the cursor of ``user`` in ``room_id`` to the last message"""
+        counter = self.counters.find_one({"_id": room_id}, {"count": 1})
+        self.cursors.update_one(
+            {"_id": f"{user}|{room_id}"},
+            {"$max": {"read": counter["count"] if counter else 0},
+             "$setOnInsert": {"user": user, "room_id": room_id}},
+            upsert=True
+        )
+
+    def unread(self, user, room_ids):
+        """Return {room_id: unread messages} of ``user`` in ``room_ids``,
+        seeding the cursors of the rooms it has not seen yet
+        """
+        counts = {
+            counter["_id"]: counter["count"]
+            for counter in self.counters.find({"_id": {"$in": room_ids}})
+        }
+        read = {
+            cursor["room_id"]: cursor["read"]
+            for cursor in self.cursors.find({"_id": {"$in": [
+                f"{user}|{room_id}" for room_id in room_ids
+            ]}})
+        }
+        unseen = [room_id for room_id in room_ids if room_id not in read]
+        if unseen:
+            # $setOnInsert keeps a cursor written meanwhile
+            self.cursors.bulk_write([
+                UpdateOne(
+                    {"_id": f"{user}|{room_id}"},
+                    {"$setOnInsert": {"user": user, "room_id": room_id,
+                                      "read": counts.get(room_id, 0)}},
+                    upsert=True
+                )
+                for room_id in unseen
+            ], ordered=False)
+            for room_id in unseen:
+                read[room_id] = counts.get(room_id, 0)
+        return {
+            room_id: max(counts.get(room_id, 0) - read.get(room_id, 0), 0)
+            for room_id in room_ids
+        }
@@ -2,7 +2,7 @@
 """routes package init"""
 from flask import Blueprint
 from app.routes import tenant, auth, admin_message, \
-    property, listing, log_request, admin, communication,profile
+    property, listing, log_request, admin, communication,profile, metrics, inbox
 
 bp = Blueprint('main', __name__)
 
@@ -15,4 +15,6 @@ bp.register_blueprint(property.property_bp)
 bp.register_blueprint(listing.listing_bp)
 bp.register_blueprint(log_request.log_request_bp)
 bp.register_blueprint(communication.communication_bp)
-bp.register_blueprint(profile.profile_bp)
\ No newline at end of file
+bp.register_blueprint(profile.profile_bp)
+bp.register_blueprint(metrics.metrics_bp)
+bp.register_blueprint(inbox.inbox_bp)
\ No newline at end of file
@@ -1,19 +1,29 @@
 #!/usr/bin/env python3
 """All routes for admin CRUD operations"""
-from flask import Blueprint, request, jsonify, url_for, current_app
+from flask import Blueprint, request, jsonify, url_for, current_app, g
 from bson.objectid import ObjectId
 # from app import mail - use current_app instead
-from app.models.admin import Admin
-from pymongo.errors import PyMongoError
+from app.models.admin import Admin, ADMIN_FIELDS
+from app.models.identity import IdentityDirectory
+from pymongo.errors import PyMongoError, DuplicateKeyError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_mail import Message  # Mail - no need to import Mail
 import uuid
+from bson.errors import InvalidId
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.schemas import ADMIN_CREATE_SCHEMA, ADMIN_UPDATE_SCHEMA
+from app.utils.ratelimit import by_ip, by_json_field, by_view_arg
 
 admin_bp = Blueprint('admin', __name__)
 logger = current_app.logger
 mail = current_app.mail
 adminsCollection = current_app.adminsCollection
+directory = IdentityDirectory(current_app.identitiesCollection)
+rate_limiter = current_app.rate_limiter
+response_cache = current_app.response_cache
+bulkheads = current_app.bulkheads
 
 # In-memory store for reset tokens
 reset_tokens = {}
@@ -26,38 +36,59 @@ def send_email(subject, recipients, body):
     except Exception as e:
         logger.error(f"Failed to send email to {recipients}: {e}")
 
+def sync_identity(admin_id, update_data):
+    """Mirror an admin update in the identity directory.
+    A failure leaves the admin updated, `flask identities backfill`
+    repairs the directory.
+    """
+    try:
+        if 'contact_details' in update_data:
+            directory.update_contact(admin_id, update_data)
+        else:
+            directory.update(admin_id, update_data)
+    except PyMongoError as e:
+        logger.error(f"Identity directory out of sync for {admin_id}: {e}")
+
 # Create admin Account
 @admin_bp.route('/api/admin/admins', methods=['POST', 'OPTIONS'])
+@response_cache.invalidates("admins")
+@validate_json(ADMIN_CREATE_SCHEMA)
+@bulkheads.guard("writes")
 def create_admin():
     """create admin as instance of admin.
        post admin to mongodb database.
        Return: "msg": "admin created successfully"
        and success status
     """
-    data = request.json
+    data = g.payload
+    contact_details = data['contact_details']
+    admin = Admin(
+        password=generate_password_hash(data.pop('password')), **data
+    )
+
     try:
-        admin = Admin(
-            name=data['name'],
-            password=generate_password_hash(data['password']),
-            dob=data['DoB'],
-            sex=data['sex'],
-            contact_details=data['contactDetails'],
-            emergency_contact=data['emergencyContact'],
-            role=data['role']
-        )
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        # Check if a user of any role with same email or phone already exist
+        if directory.exists(
+            contact_details['email'], contact_details['phone']
+        ):
+            return jsonify(
+                {"error": "Admin with same email or phone exist"}
+            ), 409
+        directory.add(admin.to_dict(), "admin")
+    except DuplicateKeyError:
+        return jsonify({"error": "Admin with same email or phone exist"}), 409
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
 
     try:
         insert_result = adminsCollection.insert_one(admin.to_dict())
     except Exception as e:
+        directory.remove(admin.admin_id)
         return jsonify({"error": str(e)}), 500
     admin_id = insert_result.inserted_id
 
     # Send notification email with a reset password link
-    email = data['contactDetails']['email']
+    email = data['contact_details']['email']
     reset_token = str(uuid.uuid4())
     reset_tokens[reset_token] = email
     reset_url = url_for('main.admin.reset_password', token=reset_token, _external=True)
@@ -68,27 +99,21 @@ def create_admin():
 
 # Get all admins
 @admin_bp.route('/api/admin/admins', methods=['GET', 'OPTIONS'])
+@bulkheads.guard("bulk_reads")
 def get_all_admins():
     """find all admins fron mongodb and
     return list of all the admins
     """
     try:
-        admins = adminsCollection.find({"active": True})
-        admins_list = [{
-            "adminId": str(admin['_id']),
-            "dateCreated": admin['date_created'],
-            "fname": admin['name']['fname'],
-            "lname": admin['name']['lname'],
-            "sex": admin['sex'],
-            "DoB": admin['dob'],
-            "phone": admin['contact_details']['phone'],
-            "email": admin['contact_details']['email'],
-            "address": admin['contact_details']['address'],
-            "emergencyContactName": admin['emergency_contact']['name'],
-            "emergencyContactPhone": admin['emergency_contact']['phone'],
-            "emergencyContactAddress": admin['emergency_contact']['address'],
-        } for admin in admins]
+        fields = requested_fields(ADMIN_FIELDS)
+        admins = adminsCollection.find(
+            {"active": True}, ADMIN_FIELDS.projection(fields)
+        )
+        serialize = ADMIN_FIELDS.serializer(fields)
+        admins_list = [serialize(admin) for admin in admins]
         return jsonify(admins_list), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
@@ -96,24 +121,13 @@ def get_all_admins():
 @admin_bp.route('/api/admin/admins/<admin_id>', methods=['GET', 'OPTIONS'])
 def get_admin(admin_id):
     try:
+        fields = requested_fields(ADMIN_FIELDS)
         admin = adminsCollection.find_one(
-            {"_id": ObjectId(admin_id), "active": True}
+            {"_id": ObjectId(admin_id), "active": True},
+            ADMIN_FIELDS.projection(fields)
         )
-        if admin:
-            return jsonify({
-                "adminId": str(admin['_id']),
-                "dateCreated": admin['date_created'],
-                "fname": admin['name']['fname'],
-                "lname": admin['name']['lname'],
-                "sex": admin['sex'],
-                "DoB": admin['dob'],
-                "phone": admin['contact_details']['phone'],
-                "email": admin['contact_details']['email'],
-                "address": admin['contact_details']['address'],
-                "emergencyContactName": admin['emergency_contact']['name'],
-                "emergencyContactPhone": admin['emergency_contact']['phone'],
-                "emergencyContactAddress": admin['emergency_contact']['address']
-            }), 200
+        if admin is not None:
+            return jsonify(ADMIN_FIELDS.to_api(admin, fields)), 200
         else:
             return jsonify({"error": "admin not found"}), 404
     except InvalidId:
@@ -125,31 +139,31 @@ def get_admin(admin_id):
 
 # Update Specific admin Details
 @admin_bp.route('/api/admin/admins/<admin_id>', methods=['PUT', 'OPTIONS'])
+@response_cache.invalidates("admins")
+@validate_json(ADMIN_UPDATE_SCHEMA)
+@bulkheads.guard("writes")
 def update_admin(admin_id):
     """update a specific admin with a admin_id.
     Args:
         admin_id  (str): admin unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "name": data['name'],
-            "dob": data['DoB'],
-            "sex": data['sex'],
-            "contact_details": data['contactDetails'],
-            "emergency_contact": data['emergencyContact'],
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
+    contact_details = update_data['contact_details']
 
     try:
+        if directory.exists(
+            contact_details['email'], contact_details['phone'],
+            exclude_id=ObjectId(admin_id)
+        ):
+            return jsonify(
+                {"error": "Admin with same email or phone exist"}
+            ), 409
         result = adminsCollection.update_one(
             {"_id": ObjectId(admin_id)}, {"$set": update_data}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "admin not found"}), 404
+        sync_identity(ObjectId(admin_id), update_data)
         return jsonify({"msg": "admin updated successfully"}), 200
     except InvalidId:
         return jsonify({"error": "Invalid admin ID format"}), 400
@@ -158,7 +172,9 @@ def update_admin(admin_id):
 
 # Deactivate/Delete admin Account
 @admin_bp.route('/api/admin/admins/<admin_id>', methods=['DELETE', 'OPTIONS'])
+@response_cache.invalidates("admins")
 @jwt_required()
+@bulkheads.guard("writes")
 def delete_admin(admin_id):
     """update a specific admin with a admin_id.
     setting the active attribute to False
@@ -170,6 +186,7 @@ def delete_admin(admin_id):
             {"_id": ObjectId(admin_id)}, {"$set": {"active": False}}
         )
         if result.matched_count:
+            sync_identity(ObjectId(admin_id), {"active": False})
             return jsonify({"msg": "admin deactivated"}), 204
         return jsonify({"error": "admin not found"}), 404
     except InvalidId:
@@ -179,6 +196,11 @@ def delete_admin(admin_id):
 
 # Forgot Password
 @admin_bp.route('/api/admin/forgot_password', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit("forgot-password-ip", "10/hour", by_ip)
+@rate_limiter.limit(
+    "forgot-password-account", "3/hour", by_json_field('email')
+)
+@bulkheads.guard("auth")
 def forgot_password():
     if not request.is_json:
         return jsonify({"msg": "Missing JSON in request"}), 400
@@ -189,8 +211,8 @@ def forgot_password():
     if not email:
         return jsonify({"msg": "Missing email"}), 400
     
-    user = adminsCollection.find_one({"contact_details.email": email})
-    if not user:
+    user = directory.find_by_email(email, {"role": 1})
+    if not user or user.get('role') != 'admin':
         return jsonify({"msg": "Email not found"}), 404
     
     reset_token = str(uuid.uuid4())
@@ -209,6 +231,10 @@ def forgot_password():
 
 # Reset Password
 @admin_bp.route('/api/admin/reset_password/<token>', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit("reset-password-ip", "10/hour", by_ip)
+@rate_limiter.limit("reset-password-token", "5/hour", by_view_arg('token'))
+@response_cache.invalidates("admins")
+@bulkheads.guard("auth")
 def reset_password(token):
     if not request.is_json:
         return jsonify({"msg": "Missing JSON in request"}), 400
@@ -227,12 +253,13 @@ def reset_password(token):
     if not email:
         return jsonify({"msg": "Invalid or expired token"}), 400
     
-    user = adminsCollection.find_one({"contact_details.email": email})
-    if not user:
+    user = directory.find_by_email(email, {"role": 1})
+    if not user or user.get('role') != 'admin':
         return jsonify({"msg": "User not found"}), 404
     
     new_hashed_password = generate_password_hash(new_password)
-    adminsCollection.update_one({"contact_details.email": email}, {"$set": {"password": new_hashed_password}})
+    adminsCollection.update_one({"_id": user['_id']}, {"$set": {"password": new_hashed_password}})
+    sync_identity(user['_id'], {"password": new_hashed_password})
     
     del reset_tokens[token]  # Invalidate the token after use
     
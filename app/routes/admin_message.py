@@ -1,39 +1,125 @@
 #!/usr/bin/env python3
 """All routes for admin message CRUD operations"""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from bson.objectid import ObjectId
-from app.models.admin_message import AdminMessage
-from pymongo.errors import PyMongoError
+from app.models.admin_message import AdminMessage, ADMIN_MESSAGE_FIELDS
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.errors import InvalidId
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.schemas import ADMIN_MESSAGE_SCHEMA, ADMIN_MESSAGE_CREATE_SCHEMA
+from app.models.inbox import Inbox, audience_query
+from app.models.campaign import Campaigns
+from app.utils.campaign_sender import CampaignSender
+from app import socketio
 
 
 admin_message_bp = Blueprint('admin_message', __name__)
 
 adminMessagesCollection = current_app.adminMessagesCollection
+tenantsCollection = current_app.tenantsCollection
+response_cache = current_app.response_cache
+singleflight = current_app.singleflight
+bulkheads = current_app.bulkheads
+inbox = Inbox(current_app.inboxCollection)
+FANOUT_BATCH_SIZE = current_app.config['INBOX_FANOUT_BATCH_SIZE']
+campaigns = Campaigns(current_app.campaignsCollection)
+CAMPAIGN_BATCH_SIZE = current_app.config['CAMPAIGN_BATCH_SIZE']
+CAMPAIGN_STALE_SECONDS = current_app.config['CAMPAIGN_STALE_SECONDS']
+campaign_sender = CampaignSender(
+    current_app.mail, campaigns,
+    batch_size=CAMPAIGN_BATCH_SIZE,
+    rate=current_app.config['CAMPAIGN_RATE_PER_SECOND'],
+    sleep=socketio.sleep, logger=current_app.logger
+)
+
+
+def deliver(app, message, query):
+    """Fan ``message`` out to the inbox of the tenants matching ``query``,
+    streamed by _id, and record the progress and throughput of the
+    delivery on the admin message
+    """
+    message_id = message["_id"]
+
+    def progress(delivered):
+        adminMessagesCollection.update_one(
+            {"_id": message_id}, {"$set": {"delivery.delivered": delivered}}
+        )
+
+    try:
+        adminMessagesCollection.update_one(
+            {"_id": message_id}, {"$set": {"delivery.status": "running"}}
+        )
+        tenants = tenantsCollection.find(query, {"_id": 1}) \
+            .batch_size(FANOUT_BATCH_SIZE)
+        report = inbox.fan_out(
+            message, (tenant["_id"] for tenant in tenants),
+            FANOUT_BATCH_SIZE, progress
+        )
+    except PyMongoError as e:
+        app.logger.error(f"Inbox delivery of {message_id} failed: {e}")
+        try:
+            adminMessagesCollection.update_one(
+                {"_id": message_id},
+                {"$set": {"delivery.status": "failed",
+                          "delivery.error": str(e)}}
+            )
+        except PyMongoError:
+            pass
+        return
+    app.metrics.incr("inbox.delivered", report["delivered"])
+    app.logger.info(
+        f"Inbox delivery of {message_id}: {report['delivered']} tenants "
+        f"in {report['seconds']}s"
+    )
+    try:
+        adminMessagesCollection.update_one(
+            {"_id": message_id},
+            {"$set": {"delivery": dict(report, status="done")}}
+        )
+    except PyMongoError as e:
+        app.logger.warning(f"Delivery report of {message_id} lost: {e}")
 
 # Create Admin Message
 @admin_message_bp.route('/api/admin/messages', methods=['POST', 'OPTIONS'])
+@jwt_required()
+@response_cache.invalidates("adminMessages")
+@validate_json(ADMIN_MESSAGE_CREATE_SCHEMA)
+@bulkheads.guard("writes")
 def create_message():
     """Create an admin message.
-       POST message to MongoDB database.
+       POST message to MongoDB database, then deliver it in the background
+       to the inbox of its audience: all tenants, the tenants of one
+       property (propertyId) or the listed tenants (tenantIds).
        Return: "msg": "Message created successfully" and success status
     """
-    data = request.json
+    if get_jwt_identity().get('role') != 'admin':
+        return jsonify({"msg": "Admins only"}), 403
+    payload = dict(g.payload)
+    audience = payload.pop("audience")
+    property_id = payload.pop("property_id", None)
+    tenant_ids = payload.pop("tenant_ids", None)
     try:
-        message = AdminMessage(
-            message=data['message'],
-            title=data['title'],
-        )
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
+        query = audience_query(audience, property_id, tenant_ids)
+    except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    message = AdminMessage(**payload)
+    document = message.to_dict()
+    document["audience"] = {
+        "type": audience, "property_id": property_id,
+        "tenant_ids": tenant_ids
+    }
+    document["delivery"] = {"status": "pending", "delivered": 0}
 
     try:
-        insert_result = adminMessagesCollection.insert_one(message.to_dict())
+        insert_result = adminMessagesCollection.insert_one(document)
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
     message_id = insert_result.inserted_id
+    socketio.start_background_task(
+        deliver, current_app._get_current_object(), document, query
+    )
     return jsonify(
         {"msg": "Message created successfully", "messageId": str(message_id)}
     ), 201
@@ -41,45 +127,45 @@ def create_message():
 
 # Get all Admin Messages
 @admin_message_bp.route('/api/admin/messages', methods=['GET', 'OPTIONS'])
+@response_cache.cached("adminMessages")
+@singleflight.coalesce("adminMessages")
+@bulkheads.guard("bulk_reads")
 def get_all_messages():
     """Find all messages from MongoDB and return list of all the messages"""
     try:
-        messages = adminMessagesCollection.find()
-        messages_list = [{
-            "messageId": str(message['_id']),
-            "dateCreated": message['date_created'],
-            "message": message['message'],
-            "title": message['title']
-        } for message in messages]
+        fields = requested_fields(ADMIN_MESSAGE_FIELDS)
+        messages = adminMessagesCollection.find(
+            {}, ADMIN_MESSAGE_FIELDS.projection(fields)
+        )
+        serialize = ADMIN_MESSAGE_FIELDS.serializer(fields)
+        messages_list = [serialize(message) for message in messages]
         return jsonify(messages_list), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
 
 # Update Specific Admin Message
 @admin_message_bp.route('/api/admin/messages/<message_id>', methods=['PUT', 'OPTIONS'])
+@response_cache.invalidates("adminMessages")
+@validate_json(ADMIN_MESSAGE_SCHEMA)
+@bulkheads.guard("writes")
 def update_message(message_id):
     """Update a specific admin message with a message_id.
     Args:
         message_id  (str): message unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "message": data['message'],
-            "title": data['title']
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
+        message_id = ObjectId(message_id)
         result = adminMessagesCollection.update_one(
-            {"_id": ObjectId(message_id)}, {"$set": update_data}
+            {"_id": message_id}, {"$set": update_data}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "Message not found"}), 404
+        inbox.update_message(message_id, update_data)
         return jsonify({"msg": "Message updated successfully"}), 200
     except InvalidId:
         return jsonify({"error": "Invalid tenant ID format"}), 404
@@ -89,19 +175,137 @@ def update_message(message_id):
 
 # Delete Admin Message
 @admin_message_bp.route('/api/admin/messages/<message_id>', methods=['DELETE', 'OPTIONS'])
+@response_cache.invalidates("adminMessages")
+@bulkheads.guard("writes")
 def delete_message(message_id):
     """Delete a specific admin message with a message_id
     Args:
     message_id  (str): message unique id
     """
     try:
-        result = adminMessagesCollection.delete_one(
-            {"_id": ObjectId(message_id)}
-        )
+        message_id = ObjectId(message_id)
+        result = adminMessagesCollection.delete_one({"_id": message_id})
         if result.deleted_count == 0:
             return jsonify({"error": "Message not found"}), 404
+        inbox.delete_message(message_id)
         return jsonify({"msg": "Message deleted successfully"}), 204
     except InvalidId:
         return jsonify({"error": "Invalid tenant ID format"}), 404
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
+
+
+def campaign_recipients(query, after=None):
+    """Stream (tenant_id, email) of the tenants matching ``query``, in _id
+    order, after the tenant ``after`` if set
+    """
+    if after is not None:
+        query = {"$and": [query, {"_id": {"$gt": after}}]}
+    tenants = tenantsCollection.find(
+        query, {"contact_details.email": 1}
+    ).sort("_id", 1).batch_size(CAMPAIGN_BATCH_SIZE)
+    for tenant in tenants:
+        email = (tenant.get("contact_details") or {}).get("email")
+        if email:
+            yield tenant["_id"], email
+
+
+def run_campaign(app, campaign, message, query):
+    """Send ``campaign`` of ``message`` to the tenants matching ``query``,
+    resuming after the last tenant it recorded
+    """
+    with app.app_context():
+        try:
+            campaign_sender.run(
+                campaign, message.get("title"), message.get("message"),
+                campaign_recipients(query, campaign.get("last_tenant_id"))
+            )
+        except PyMongoError as e:
+            app.logger.error(
+                f"Campaign {campaign['_id']} not tracked: {e}"
+            )
+
+
+# Email an Admin Message to its audience
+@admin_message_bp.route('/api/admin/messages/<message_id>/campaign', methods=['POST', 'OPTIONS'])
+@jwt_required()
+@bulkheads.guard("writes")
+def create_campaign(message_id):
+    """Start emailing a specific admin message to its audience, in the
+    background. Progress is read with GET /api/admin/campaigns/<id>.
+    A campaign of the message left running by a dead worker is resumed.
+    Args:
+        message_id  (str): message unique id
+    """
+    if get_jwt_identity().get('role') != 'admin':
+        return jsonify({"msg": "Admins only"}), 403
+    try:
+        message = adminMessagesCollection.find_one(
+            {"_id": ObjectId(message_id)}
+        )
+        if message is None:
+            return jsonify({"msg": "Message not found"}), 404
+        audience = message.get("audience") or {}
+        query = audience_query(
+            audience.get("type", "all"), audience.get("property_id"),
+            audience.get("tenant_ids")
+        )
+        try:
+            campaign = campaigns.create(message)
+        except DuplicateKeyError:
+            campaign = campaigns.take_over(
+                message["_id"], CAMPAIGN_STALE_SECONDS
+            )
+            if campaign is None:
+                active = campaigns.active(message["_id"])
+                return jsonify({
+                    "msg": "A campaign of this message is already running",
+                    "campaignId": str(active["_id"]) if active else None
+                }), 409
+    except InvalidId:
+        return jsonify({"error": "Invalid message ID format"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+    socketio.start_background_task(
+        run_campaign, current_app._get_current_object(), campaign,
+        message, query
+    )
+    return jsonify(
+        {"msg": "Campaign started", "campaignId": str(campaign["_id"])}
+    ), 202
+
+
+# Get the progress of an email campaign
+@admin_message_bp.route('/api/admin/campaigns/<campaign_id>', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_campaign(campaign_id):
+    """Return the status, counters and last failures of a campaign.
+    Args:
+        campaign_id  (str): campaign unique id
+    """
+    if get_jwt_identity().get('role') != 'admin':
+        return jsonify({"msg": "Admins only"}), 403
+    try:
+        campaign = campaigns.get(ObjectId(campaign_id))
+        if campaign is None:
+            return jsonify({"msg": "Campaign not found"}), 404
+    except InvalidId:
+        return jsonify({"error": "Invalid campaign ID format"}), 404
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "campaignId": campaign["_id"],
+        "messageId": campaign["message_id"],
+        "title": campaign.get("title"),
+        "status": campaign["status"],
+        "sent": campaign.get("sent", 0),
+        "failed": campaign.get("failed", 0),
+        "failures": campaign.get("failures", []),
+        "dateCreated": campaign.get("date_created"),
+        "started": campaign.get("started"),
+        "finished": campaign.get("finished"),
+        "seconds": campaign.get("seconds"),
+        "error": campaign.get("error")
+    }), 200
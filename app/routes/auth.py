@@ -6,31 +6,44 @@ from flask_mail import Message
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
 import uuid
+from pymongo.errors import PyMongoError
+from app.models.identity import IdentityDirectory, AUTH_PROJECTION
+from app.utils.ratelimit import by_ip, by_json_field, by_view_arg
+# the blocklist checked by the JWT manager and the socket handlers
+from app import revoked_tokens
 
 
 auth_bp = Blueprint('auth_bp', __name__)
 reset_tokens = {}
-revoked_tokens = set()  # Move this to a shared location if needed
 
 logger = current_app.logger
 mail = current_app.mail
 tenantsCollection = current_app.tenantsCollection
 adminsCollection = current_app.adminsCollection
+response_cache = current_app.response_cache
+directory = IdentityDirectory(current_app.identitiesCollection)
+rate_limiter = current_app.rate_limiter
+bulkheads = current_app.bulkheads
 
 # Utility functions
 def authenticate(email, password, role):
     email = email.strip().lower()
     logger.debug(f"Authenticating user with email: {email} and role: {role}")
     
-    if role == 'admin':
-        user = adminsCollection.find_one({"contact_details.email": email})
-    elif role == 'tenant':
-        user = tenantsCollection.find_one({"contact_details.email": email})
-    else:
+    if role not in ('admin', 'tenant'):
         logger.debug("Invalid role provided")
         return None
-    
-    if user and check_password_hash(user["password"], password):
+
+    # one indexed lookup in the identity directory, whatever the role
+    user = directory.find_by_email(email, AUTH_PROJECTION)
+    if user is None:
+        # users not backfilled into the directory yet
+        collection = adminsCollection if role == 'admin' \
+            else tenantsCollection
+        legacy = collection.find_one({"contact_details.email": email})
+        user = IdentityDirectory.entry(legacy, role) if legacy else None
+    if user and user.get("role") == role and user.get("password") \
+            and check_password_hash(user["password"], password):
         logger.debug("Password match!")
         return user
     
@@ -38,6 +51,9 @@ def authenticate(email, password, role):
     return None
 
 @auth_bp.route('/api/login', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit("login-ip", "20/minute", by_ip)
+@rate_limiter.limit("login-account", "5/minute", by_json_field('email'))
+@bulkheads.guard("auth")
 def login():
     if not request.is_json:
         logger.debug("Request missing JSON")
@@ -65,7 +81,12 @@ def login():
         return jsonify({"msg": "Account is not active"}), 403
     
     expires = datetime.timedelta(days=7) if remember_me else datetime.timedelta(hours=1)
-    access_token = create_access_token(identity={"email": email, "role": role}, expires_delta=expires)
+    # stable claims, so hot paths do not resolve the identity again
+    claims = {"uid": str(user["_id"]), "name": user.get("name", "")}
+    access_token = create_access_token(
+        identity={"email": email, "role": role}, expires_delta=expires,
+        additional_claims=claims
+    )
     response = jsonify(msg="You have successfully logged in", access_token=access_token)
     set_access_cookies(response, access_token)
 
@@ -74,6 +95,11 @@ def login():
 
 
 @auth_bp.route('/api/forgot_password', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit("forgot-password-ip", "10/hour", by_ip)
+@rate_limiter.limit(
+    "forgot-password-account", "3/hour", by_json_field('email')
+)
+@bulkheads.guard("auth")
 def forgot_password():
     if not request.is_json:
         return jsonify({"msg": "Missing JSON in request"}), 400
@@ -84,7 +110,7 @@ def forgot_password():
     if not email:
         return jsonify({"msg": "Missing email"}), 400
     
-    user = tenantsCollection.find_one({"contact_details.email": email}) or adminsCollection.find_one({"contact_details.email": email})
+    user = directory.find_by_email(email, {"_id": 1})
     if not user:
         return jsonify({"msg": "Email not found"}), 404
     
@@ -105,6 +131,9 @@ def forgot_password():
         return jsonify({"msg": f"Failed to send email: {str(e)}"}), 500
 
 @auth_bp.route('/api/reset_password/<token>', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit("reset-password-ip", "10/hour", by_ip)
+@rate_limiter.limit("reset-password-token", "5/hour", by_view_arg('token'))
+@bulkheads.guard("auth")
 def reset_password(token):
     if not request.is_json:
         return jsonify({"msg": "Missing JSON in request"}), 400
@@ -123,20 +152,26 @@ def reset_password(token):
     if not email:
         return jsonify({"msg": "Invalid or expired token"}), 400
     
-    user = tenantsCollection.find_one({"contact_details.email": email}) or adminsCollection.find_one({"contact_details.email": email})
+    user = directory.find_by_email(email, {"role": 1})
     if not user:
         return jsonify({"msg": "User not found"}), 404
     
     new_hashed_password = generate_password_hash(new_password)
     user_role = user.get('role')  # check user role
 
-    logging.debug(f"Resseting password for user with role: {user_role}")
+    logger.debug(f"Resseting password for user with role: {user_role}")
 
     if user_role not in ['tenant', 'admin']:
         return jsonify({"msg": "Invalid user role"}), 400
 
     collection = tenantsCollection if user.get('role') == 'tenant' else adminsCollection
-    result = collection.update_one({"contact_details.email": email}, {"$set": {"password": new_hashed_password}})
+    result = collection.update_one({"_id": user['_id']}, {"$set": {"password": new_hashed_password}})
+    try:
+        directory.update(user['_id'], {"password": new_hashed_password})
+    except PyMongoError as e:
+        logger.error(f"Identity directory out of sync for {user['_id']}: {e}")
+    # drop the cached identity and profile of the user on every worker
+    response_cache.invalidate("tenants" if user_role == 'tenant' else "admins")
     
     if result.modified_count == 1:
         logger.debug("Password updated successfully")
@@ -1,43 +1,341 @@
 #!/usr/bin/env python3
 """Communication routes module"""
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, session
+from flask_jwt_extended import (
+    jwt_required, get_jwt_identity, get_jwt, decode_token
+)
 from datetime import datetime
-from bson import ObjectId
-from app import socketio
-from app.models.communication import CommunicationModel
-from flask_socketio import emit
+from urllib.parse import urlsplit
+import time
+from app import socketio, revoked_tokens
+from app.models.communication import (
+    CommunicationModel, MessageArchive, GENERAL_ROOM, ADMINS_ROOM,
+    ANNOUNCEMENTS_ROOM, user_rooms, can_access
+)
+from app.models.unread import UnreadCounters, user_key, key_uid
+from app.models.inbox import Inbox
+from flask_socketio import (
+    emit, join_room, disconnect, ConnectionRefusedError
+)
+from pymongo.errors import PyMongoError
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from app.utils.streaming import stream_documents
+from app.utils.validation import datetime_value
+from app.utils.write_behind import BufferFull
+from app.utils.emit_scheduler import batch_room
 
 communication_bp = Blueprint('communication_bp', __name__)
 
 tenantsCollection = current_app.tenantsCollection
 adminsCollection = current_app.adminsCollection
 messagesCollection = current_app.messagesCollection
+identity_cache = current_app.identity_cache
+emit_scheduler = current_app.emit_scheduler
+bulkheads = current_app.bulkheads
 
-communication_model = CommunicationModel(messagesCollection)
+communication_model = CommunicationModel(
+    messagesCollection, current_app.message_writer
+)
+message_archive = MessageArchive(current_app.messagesArchiveCollection)
+unread_counters = UnreadCounters(
+    current_app.roomCountersCollection, current_app.readCursorsCollection
+)
+inbox = Inbox(current_app.inboxCollection)
+# messages per page of the history, by default and at most
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def current_rooms(identity, claims):
+    """Return (rooms, user) of the JWT identity, user None if unknown.
+
+    Tenants are resolved through the per-worker identity cache for the
+    property they rent; admins need no lookup.
+    """
+    role = identity['role']
+    if role == 'admin':
+        return user_rooms(role, claims.get('uid')), {}
+    user = identity_cache.resolve(identity['email'], role)
+    if not user:
+        return [GENERAL_ROOM], None
+    return user_rooms(role, user['uid'], user.get('property_id')), user
+
+
+def current_user_key(identity, claims, user=None):
+    """Return the unread counters key of the JWT identity, None if unknown"""
+    uid = claims.get('uid') or (user or {}).get('uid')
+    if not uid:
+        resolved = identity_cache.resolve(identity['email'], identity['role'])
+        uid = resolved['uid'] if resolved else None
+    return user_key(identity['role'], uid) if uid else None
+
+
+def sender_name(identity, claims, user=None):
+    """Return the display name of a sender: tokens issued at login carry
+    it, older ones are resolved through the per-worker identity cache
+    """
+    name = claims.get('name')
+    if name:
+        return name
+    user = user or identity_cache.resolve(identity['email'], identity['role'])
+    return user['name'] if user else None
+
+
+def cookie_origin_allowed():
+    """Return True if the handshake may authenticate with the access
+    cookie: sent by the app's own pages or an origin of
+    SOCKETIO_COOKIE_ORIGINS. Browsers send the Origin of cross-site
+    requests, a request without one is not cross-site.
+    """
+    origin = request.headers.get('Origin')
+    if not origin or urlsplit(origin).netloc == request.host:
+        return True
+    return origin in current_app.config['SOCKETIO_COOKIE_ORIGINS']
+
+
+def socket_token(auth):
+    """Return the JWT of a socket handshake: the ``token`` of the auth
+    payload, else the access cookie, if its origin is allowed, or bearer
+    header of the request
+    """
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    token = request.cookies.get(current_app.config['JWT_ACCESS_COOKIE_NAME'])
+    if token and cookie_origin_allowed():
+        return token
+    header = request.headers.get('Authorization', '')
+    return header[7:] if header.startswith('Bearer ') else None
+
+
+def unread_post(room_id, role, sender):
+    """Return the unread counters post of a new message: counted in its
+    room, and in the admins room when a tenant posts it outside general;
+    read by its sender
+    """
+    rooms = [room_id]
+    if role != 'admin' and room_id != GENERAL_ROOM:
+        rooms.append(ADMINS_ROOM)
+    return rooms, sender, room_id
+
+
+def count_posts(posts):
+    """Count messages written synchronously in the unread counters"""
+    try:
+        unread_counters.count(posts)
+    except PyMongoError as e:
+        current_app.logger.warning(f"Unread counters not updated: {e}")
+
+
+def post_message(name, role, rooms, room_id, message, sender=None):
+    """Store a chat message and emit it to its room and the admins.
+    Return (body, status), shared by the REST route and the socket event.
+    """
+    if not message or not isinstance(room_id, str):
+        return {"msg": "Invalid data"}, 400
+    if not can_access(role, rooms, room_id):
+        return {"msg": "Not a member of this room"}, 403
+
+    # a datetime, so the history is sorted and paged on the index
+    msg = {
+        'name': name,
+        'message': message,
+        'room_id': room_id,
+        'timestamp': datetime.utcnow()
+    }
+
+    # Add message to the collection, the JSON provider serializes _id;
+    # the write-behind buffer counts it once written
+    post = unread_post(room_id, role, sender)
+    try:
+        inserted_id = communication_model.add_message(msg, post)
+    except BufferFull:
+        return {"msg": "Chat is busy, please retry shortly"}, 503
+    msg['_id'] = inserted_id
+    if communication_model.writer is None:
+        count_posts([post])
+
+    # only the members of the room, and the admins, receive it
+    emit_scheduler.emit('receive_message', msg, to=[room_id, ADMINS_ROOM])
+    return msg, 201
+
+
+@socketio.on('connect')
+def connect(auth=None):
+    """Verify the JWT of the handshake once, join the rooms of its user and
+    keep the identity in the socket session for the events. Clients
+    sending ``"batch": true`` in the auth payload join the batch rooms.
+    """
+    token = socket_token(auth)
+    if not token:
+        raise ConnectionRefusedError("Missing token")
+    try:
+        claims = decode_token(token)
+    except Exception as e:
+        current_app.logger.debug(f"Socket refused: {e}")
+        raise ConnectionRefusedError("Invalid token")
+    if claims.get('type') != 'access':
+        raise ConnectionRefusedError("Invalid token")
+    if claims['jti'] in revoked_tokens:
+        raise ConnectionRefusedError("Token has been revoked")
+    identity = claims[current_app.config['JWT_IDENTITY_CLAIM']]
+    try:
+        rooms, user = current_rooms(identity, claims)
+        name = sender_name(identity, claims, user) if user is not None \
+            else None
+        user_id = current_user_key(identity, claims, user)
+    except PyMongoError as e:
+        current_app.logger.error(f"Socket identity not resolved: {e}")
+        raise ConnectionRefusedError("Service unavailable")
+    if user is None or not name:
+        raise ConnectionRefusedError("User not found")
+    if identity['role'] == 'tenant' and not user.get('active', False):
+        raise ConnectionRefusedError("Account is not active")
+    # Flask-SocketIO keeps a session per connection, apart from the
+    # cookie session of HTTP requests
+    session['chat'] = {
+        "role": identity['role'], "email": identity['email'],
+        "name": name, "rooms": rooms, "user": user_id,
+        "jti": claims['jti'], "exp": claims.get('exp')
+    }
+    # clients handling "batch" frames get bursts coalesced
+    batched = isinstance(auth, dict) and auth.get('batch') is True
+    for room in rooms:
+        join_room(batch_room(room) if batched else room)
+
+
+def socket_session():
+    """Return the identity of the socket, None after disconnecting it if
+    its token has expired or been revoked, or its tenant deactivated,
+    since the connection
+    """
+    chat = session['chat']
+    expires = chat.get('exp')
+    if chat['jti'] in revoked_tokens or \
+            (expires is not None and expires < time.time()):
+        disconnect()
+        return None
+    if chat['role'] == 'tenant':
+        try:
+            user = identity_cache.resolve(chat['email'], 'tenant')
+        except PyMongoError:
+            # cannot tell, the event reports the outage itself
+            return chat
+        if user is None or not user.get('active', False):
+            disconnect()
+            return None
+    return chat
+
+
+@socketio.on('send_message')
+def send_socket_message(data):
+    """Post a message over the socket, acknowledged with the stored
+    message or an error. The token was verified at connect, only its
+    expiry and revocation are checked here.
+    """
+    chat = socket_session()
+    if chat is None:
+        return {"msg": "Token has expired or been revoked"}
+    if not isinstance(data, dict):
+        return {"msg": "Invalid data"}
+    try:
+        body, _ = post_message(
+            chat['name'], chat['role'], chat['rooms'],
+            data.get('room_id') or GENERAL_ROOM, data.get('message'),
+            chat['user']
+        )
+        return body
+    except PyMongoError as e:
+        current_app.logger.error(f"Socket message not stored: {e}")
+        return {"msg": "An error occurred"}
+
+
+def message_id_arg(name):
+    """Return the ObjectId of the query argument ``name``, None if absent.
+    Raises:
+        ValueError: if it is not an ObjectId
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        raise ValueError(f"Invalid {name}")
 
-def convert_objectid(obj):
-    """Recursively convert ObjectIds to strings in a given object."""
-    if isinstance(obj, list):
-        return [convert_objectid(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: convert_objectid(value) for key, value in obj.items()}
-    elif isinstance(obj, ObjectId):
-        return str(obj)
-    else:
-        return obj
 
 @communication_bp.route('/api/messages', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@bulkheads.guard("chat")
 def get_messages():
-    messages = list(messagesCollection.find())
-    messages = convert_objectid(messages)  # Convert ObjectId to string
-    return jsonify(messages), 200
+    """Return a page of the messages of the room_id argument (general by
+    default): the last ``limit`` ones, the ones ``before`` a timestamp to
+    scroll back, or the ones ``since`` a timestamp to catch up. Passing
+    the _id of the boundary message as ``before_id`` / ``since_id`` keeps
+    the messages sharing its timestamp from being skipped.
+    """
+    room_id = request.args.get('room_id', GENERAL_ROOM)
+    try:
+        before = request.args.get('before')
+        since = request.args.get('since')
+        before = datetime_value(before) if before else None
+        since = datetime_value(since) if since else None
+        before_id = message_id_arg('before_id')
+        since_id = message_id_arg('since_id')
+        limit = int(request.args.get('limit', PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    identity = get_jwt_identity()
+    claims = get_jwt()
+    try:
+        rooms, user = current_rooms(identity, claims)
+        if not can_access(identity['role'], rooms, room_id):
+            return jsonify({"msg": "Not a member of this room"}), 403
+        messages = communication_model.page(
+            room_id, before, since, limit, before_id, since_id
+        )
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+    if before is None and since is None:
+        # the latest page was read
+        try:
+            reader = current_user_key(identity, claims, user)
+            if reader:
+                unread_counters.mark_read(reader, room_id)
+        except PyMongoError as e:
+            current_app.logger.warning(f"Read cursor not updated: {e}")
+    return stream_documents(messages)
+
+
+@communication_bp.route('/api/messages/archive', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@bulkheads.guard("bulk_reads")
+def get_archived_messages():
+    """Return the messages of the room_id argument (general by default)
+    archived for the month argument, "YYYY-MM"
+    """
+    room_id = request.args.get('room_id', GENERAL_ROOM)
+    try:
+        month = datetime.strptime(request.args.get('month', ''), '%Y-%m') \
+            .strftime('%Y-%m')
+    except ValueError:
+        return jsonify({"error": "Invalid month, expected YYYY-MM"}), 400
+    identity = get_jwt_identity()
+    try:
+        rooms, _ = current_rooms(identity, get_jwt())
+        if not can_access(identity['role'], rooms, room_id):
+            return jsonify({"msg": "Not a member of this room"}), 403
+        messages = message_archive.find_month(room_id, month)
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+    return stream_documents(messages)
 
 from datetime import datetime
 
 @communication_bp.route('/api/send_message', methods=['POST', 'OPTIONS'])
 @jwt_required()
+@bulkheads.guard("chat")
 def send_message():
     try:
         identity = get_jwt_identity()
@@ -47,34 +345,98 @@ def send_message():
             print("Invalid token data")
             return jsonify({"msg": "Invalid token data"}), 400
 
-        user_collection = adminsCollection if identity['role'] == 'admin' else tenantsCollection
-        user = user_collection.find_one({"contact_details.email": identity['email']})
-        if not user:
-            print("User not found")
-            return jsonify({"msg": "User not found"}), 404
-
         message = request.json.get('message')
-        if not message:
+        room_id = request.json.get('room_id') or GENERAL_ROOM
+        if not message or not isinstance(room_id, str):
             print("Invalid data")
             return jsonify({"msg": "Invalid data"}), 400
 
-        # Format the timestamp to a readable format
-        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        full_name = f"{user['name']['fname']} {user['name']['lname']}"
-        msg = {
-            'name': full_name,
-            'message': message,
-            'timestamp': timestamp
-        }
-
-        # Add message to the collection and convert the ObjectId to string
-        inserted_id = communication_model.add_message(msg)
-        msg['_id'] = str(inserted_id)  # Ensure the _id is a string
+        claims = get_jwt()
+        rooms, user = current_rooms(identity, claims)
+        if user is None:
+            print("User not found")
+            return jsonify({"msg": "User not found"}), 404
 
-        # Emit the message to the 'receive_message' event without 'broadcast=True'
-        socketio.emit('receive_message', msg)
+        full_name = sender_name(identity, claims, user)
+        if not full_name:
+            print("User not found")
+            return jsonify({"msg": "User not found"}), 404
 
-        return jsonify(msg), 201
+        body, status = post_message(
+            full_name, identity['role'], rooms, room_id, message,
+            current_user_key(identity, claims, user)
+        )
+        return jsonify(body), status
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({"msg": "An error occurred"}), 500
+
+
+def unread_summary(role, rooms, user):
+    """Return {"rooms": {room_id: unread}, "total": unread}. The
+    announcements of a tenant are its unread inbox entries, whatever
+    the audience of the admin messages.
+    """
+    counts = unread_counters.unread(user, list(rooms))
+    if role != 'admin':
+        counts[ANNOUNCEMENTS_ROOM] = inbox.unread_count(
+            ObjectId(key_uid(user))
+        )
+    return {"rooms": counts, "total": sum(counts.values())}
+
+
+@communication_bp.route('/api/unread', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_unread():
+    """Return the unread messages of the user, per room"""
+    identity = get_jwt_identity()
+    claims = get_jwt()
+    try:
+        rooms, user = current_rooms(identity, claims)
+        reader = current_user_key(identity, claims, user)
+        if user is None or not reader:
+            return jsonify({"msg": "User not found"}), 404
+        return jsonify(unread_summary(identity['role'], rooms, reader)), 200
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@communication_bp.route('/api/unread/read', methods=['POST', 'OPTIONS'])
+@jwt_required()
+def mark_read():
+    """Mark the room_id of the JSON body read; "announcements" marks the
+    inbox of the tenant read once the admin messages are shown
+    """
+    room_id = (request.get_json(silent=True) or {}).get('room_id')
+    identity = get_jwt_identity()
+    claims = get_jwt()
+    try:
+        rooms, user = current_rooms(identity, claims)
+        reader = current_user_key(identity, claims, user)
+        if user is None or not reader:
+            return jsonify({"msg": "User not found"}), 404
+        tenant = identity['role'] != 'admin'
+        if not isinstance(room_id, str) or not (
+                (tenant and room_id == ANNOUNCEMENTS_ROOM)
+                or can_access(identity['role'], rooms, room_id)):
+            return jsonify({"msg": "Not a member of this room"}), 403
+        if room_id == ANNOUNCEMENTS_ROOM:
+            inbox.mark_all_read(ObjectId(key_uid(reader)))
+        else:
+            unread_counters.mark_read(reader, room_id)
+        return jsonify(unread_summary(identity['role'], rooms, reader)), 200
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@socketio.on('unread')
+def get_socket_unread(data=None):
+    """Acknowledge with the unread messages of the socket user, per room"""
+    chat = socket_session()
+    if chat is None:
+        return {"msg": "Token has expired or been revoked"}
+    try:
+        return unread_summary(chat['role'], chat['rooms'], chat['user'])
+    except PyMongoError as e:
+        current_app.logger.error(f"Unread counters not read: {e}")
+        return {"msg": "An error occurred"}
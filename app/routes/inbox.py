@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tenant inbox routes: the admin messages delivered to the tenant"""
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import PyMongoError
+from app.models.inbox import Inbox
+from app.utils.validation import datetime_value
+
+inbox_bp = Blueprint('inbox', __name__)
+
+identity_cache = current_app.identity_cache
+inbox = Inbox(current_app.inboxCollection)
+# entries per page of the inbox, by default and at most
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def current_tenant_id():
+    """Return the ObjectId of the tenant of the JWT, None if not a tenant"""
+    identity = get_jwt_identity()
+    if identity.get('role') != 'tenant':
+        return None
+    user = identity_cache.resolve(identity['email'], 'tenant')
+    return ObjectId(user['uid']) if user else None
+
+
+@inbox_bp.route('/api/inbox', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_inbox():
+    """Return the latest ``limit`` inbox entries of the tenant, or the ones
+    ``before`` a dateCreated to scroll back, with the unread count. The
+    entryId of the last entry as ``before_id`` keeps the entries of one
+    date from being skipped or repeated.
+    """
+    try:
+        before = request.args.get('before')
+        before = datetime_value(before) if before else None
+        before_id = request.args.get('before_id')
+        before_id = ObjectId(before_id) if before_id else None
+        limit = int(request.args.get('limit', PAGE_SIZE))
+    except InvalidId:
+        return jsonify({"error": "Invalid before_id"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        tenant_id = current_tenant_id()
+        if tenant_id is None:
+            return jsonify({"msg": "Tenant not found"}), 404
+        entries = inbox.page(tenant_id, before, limit, before_id)
+        unread = inbox.unread_count(tenant_id)
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "entries": [{
+            "entryId": entry["_id"],
+            "messageId": entry["message_id"],
+            "title": entry.get("title"),
+            "message": entry.get("message"),
+            "dateCreated": entry.get("date_created"),
+            "read": entry.get("read", False)
+        } for entry in entries],
+        "unread": unread
+    }), 200
+
+
+@inbox_bp.route('/api/inbox/<entry_id>/read', methods=['POST', 'OPTIONS'])
+@jwt_required()
+def mark_entry_read(entry_id):
+    """Mark an inbox entry of the tenant read.
+    Args:
+        entry_id  (str): inbox entry unique id
+    """
+    try:
+        tenant_id = current_tenant_id()
+        if tenant_id is None:
+            return jsonify({"msg": "Tenant not found"}), 404
+        if not inbox.mark_read(tenant_id, ObjectId(entry_id)):
+            return jsonify({"msg": "Entry not found"}), 404
+        return jsonify({"unread": inbox.unread_count(tenant_id)}), 200
+    except InvalidId:
+        return jsonify({"error": "Invalid entry ID format"}), 404
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
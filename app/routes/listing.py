@@ -1,36 +1,47 @@
 #!/usr/bin/env python3
 """All routes for property listing CRUD operations"""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from bson.objectid import ObjectId
-from app.models.listing import Listing
+from app.models.listing import Listing, LISTING_FIELDS
 from pymongo.errors import PyMongoError
 from bson.errors import InvalidId
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.schemas import PROPERTY_SCHEMA
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 listing_bp = Blueprint('listing', __name__)
 
 listingCollection = current_app.listingCollection
+response_cache = current_app.response_cache
+singleflight = current_app.singleflight
+bulkheads = current_app.bulkheads
+
+# keep the catalog up through short database incidents
+STALE_POLICY = {
+    "stale_while_revalidate":
+        current_app.config['CACHE_STALE_WHILE_REVALIDATE'],
+    "stale_if_error": current_app.config['CACHE_STALE_IF_ERROR']
+}
 
 
 # Create listing
 @listing_bp.route('/api/admin/properties-listing', methods=['POST', 'OPTIONS'])
+@response_cache.invalidates("listing")
+@validate_json(PROPERTY_SCHEMA)
+@bulkheads.guard("writes")
 def create_property_listing():
     """Create a new property listing instance and store it in the database.
        Return: "msg": "listing created successfully"
        and success status
     """
-    data = request.json
-    try:
-        listing = Listing(
-            address=data['address'],
-            property_type=data['type'],
-            unit_availability=data['unitAvailability'],
-            rental_fees=data['rentalFees']
-        )
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    data = g.payload
+    listing = Listing(
+        address=data['address'],
+        property_type=data['type'],
+        unit_availability=data['unit_availability'],
+        rental_fees=data['rental_fees']
+    )
 
     try:
         insert_result = listingCollection.insert_one(listing.to_dict())
@@ -49,22 +60,27 @@ def create_property_listing():
 
 # Get All Listed Properties
 @listing_bp.route('/api/admin/properties-listing', methods=['GET', 'OPTIONS'])
+@response_cache.cached("listing", **STALE_POLICY)
+@singleflight.coalesce("listing")
+@bulkheads.guard("bulk_reads")
 def get_all_listed_properties():
     """Retrieve all properties listed from the database.
     Return: List of listed properties
     """
 
     try:
-        listed_properties = listingCollection.find()
-        listed_properties_list = [{
-            "propertyId": str(listed_property['_id']),
-            "dateCreated": listed_property['date_created'],
-            "address": listed_property['address'],
-            "type": listed_property['type'],
-            "unitAvailability": listed_property['unit_availability'],
-            "rentalFees": listed_property['rental_fees']
-        } for listed_property in listed_properties]
+        fields = requested_fields(LISTING_FIELDS)
+        listed_properties = listingCollection.find(
+            {}, LISTING_FIELDS.projection(fields)
+        )
+        serialize = LISTING_FIELDS.serializer(fields)
+        listed_properties_list = [
+            serialize(listed_property)
+            for listed_property in listed_properties
+        ]
         return jsonify(listed_properties_list), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
@@ -73,22 +89,19 @@ def get_all_listed_properties():
 @listing_bp.route(
     '/api/admin/properties-listing/<listing_id>', methods=['GET', 'OPTIONS']
 )
+@response_cache.cached("listing")
 def get_listed_property(listing_id):
     """Retrieve details of a specific listed property by ID.
     """
     try:
+        fields = requested_fields(LISTING_FIELDS)
         listed_property = listingCollection.find_one(
-            {"_id": ObjectId(listing_id)}
+            {"_id": ObjectId(listing_id)}, LISTING_FIELDS.projection(fields)
         )
-        if listed_property:
-            return jsonify({
-                "propertyId": str(listed_property['_id']),
-                "dateCreated": listed_property['date_created'],
-                "address": listed_property['address'],
-                "type": listed_property['type'],
-                "unitAvailability": listed_property['unit_availability'],
-                "rentalFees": listed_property['rental_fees']
-            }), 200
+        if listed_property is not None:
+            return jsonify(
+                LISTING_FIELDS.to_api(listed_property, fields)
+            ), 200
         else:
             return jsonify({"error": "Property not found"}), 404
     except InvalidId:
@@ -103,20 +116,12 @@ def get_listed_property(listing_id):
 @listing_bp.route(
     '/api/admin/properties-listing/<listing_id>', methods=['PUT', 'OPTIONS']
 )
+@response_cache.invalidates("listing")
+@validate_json(PROPERTY_SCHEMA)
+@bulkheads.guard("writes")
 def update_property(listing_id):
     """Update a specific listed property by ID."""
-    data = request.json
-    try:
-        update_data = {
-            "address": data['address'],
-            "type": data['type'],
-            "unit_availability": data['unitAvailability'],
-            "rental_fees": data['rentalFees']
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
         result = listingCollection.update_one(
@@ -135,6 +140,8 @@ def update_property(listing_id):
 @listing_bp.route(
     '/api/admin/properties-listing/<listing_id>', methods=['DELETE', 'OPTIONS']
 )
+@response_cache.invalidates("listing")
+@bulkheads.guard("writes")
 def delete_listed_property(listing_id):
     """Delete a specific listed property by ID."""
     try:
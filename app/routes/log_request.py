@@ -1,34 +1,46 @@
 #!/usr/bin/env python3
 """All routes for log request CRUD operations"""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from bson.objectid import ObjectId
-from app.models.log_request import LogRequest
+from app.models.log_request import LogRequest, LOG_REQUEST_FIELDS
 from pymongo.errors import PyMongoError
 from bson.errors import InvalidId
+from app.utils.streaming import stream_documents
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.utils.conditional import (
+    conditional, update_versioned, versioned_response, precondition_failed
+)
+from app.schemas import (
+    LOG_REQUEST_CREATE_SCHEMA, LOG_REQUEST_UPDATE_SCHEMA,
+    LOG_REQUEST_STATUS_SCHEMA, LOG_REQUEST_CLOSE_SCHEMA,
+    LOG_REQUEST_ARCHIVE_SCHEMA
+)
 
 
 log_request_bp = Blueprint('log_request', __name__)
 logRequestsCollection = current_app.logRequestsCollection
+response_cache = current_app.response_cache
+singleflight = current_app.singleflight
+bulkheads = current_app.bulkheads
+
+
+# get_all_log_requests has always called the id "requestedId"
+LOG_REQUEST_LIST_FIELDS = LOG_REQUEST_FIELDS.renamed(requestId='requestedId')
+
 
 # Create Log Request
 @log_request_bp.route('/api/admin/log-requests', methods=['POST', 'OPTIONS'])
+@response_cache.invalidates("logRequests")
+@validate_json(LOG_REQUEST_CREATE_SCHEMA)
+@bulkheads.guard("writes")
 def create_log_request():
     """Create log request as instance of LogRequest.
        Post log request to MongoDB database.
        Return: "msg": "Log request created successfully"
        and success status
     """
-    data = request.json
-    try:
-        log_request_instance = LogRequest(
-            request_type=data.get('requestType', ''),
-            urgency_level=data.get('urgencyLevel', ''),
-            property_address=data.get('propertyAddress', ''),
-            description=data.get('description', ''),
-            logged_by=data.get('loggedBy', '')
-        )
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    log_request_instance = LogRequest(**g.payload)
 
     try:
         insert_result = logRequestsCollection.insert_one(
@@ -48,48 +60,41 @@ def create_log_request():
 
 # Get All Open Log Requests
 @log_request_bp.route('/api/admin/log-requests', methods=['GET', 'OPTIONS'])
+@conditional("logRequests")
+@singleflight.coalesce("logRequests")
+@bulkheads.guard("bulk_reads")
 def get_all_log_requests():
     """Find all open log requests from MongoDB and
     return list of all the open log requests
     """
 
     try:
+        fields = requested_fields(LOG_REQUEST_LIST_FIELDS)
         log_requests = logRequestsCollection.find(
-            {"status": {"$ne": "resolved"}, "archive": False}
+            {"status": {"$ne": "resolved"}, "archive": False},
+            LOG_REQUEST_LIST_FIELDS.projection(fields)
+        )
+        return stream_documents(
+            log_requests, LOG_REQUEST_LIST_FIELDS.serializer(fields)
         )
-        log_requests_list = [{
-            "requestedId": str(log_request['_id']),
-            "loggedBy": log_request['logged_by'],
-            "submittedDate": log_request['submitted_date'],
-            "requestType": log_request['request_type'],
-            "urgencyLevel": log_request['urgency_level'],
-            "propertyAddress": log_request['property_address'],
-            "description": log_request['description'],
-            "status": log_request['status']
-        } for log_request in log_requests]
-        return jsonify(log_requests_list), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
 
 # Get Specific Log Request Details
 @log_request_bp.route('/api/admin/log-requests/<request_id>', methods=['GET', 'OPTIONS'])
+@conditional("logRequests", logRequestsCollection, "request_id")
 def get_log_request(request_id):
     try:
+        fields = requested_fields(LOG_REQUEST_FIELDS)
         log_request = logRequestsCollection.find_one(
-            {"_id": ObjectId(request_id)}
+            {"_id": ObjectId(request_id)},
+            LOG_REQUEST_FIELDS.projection(fields)
         )
-        if log_request:
-            return jsonify({
-                "requestId": str(log_request['_id']),
-                "loggedBy": log_request['logged_by'],
-                "submittedDate": log_request['submitted_date'],
-                "requestType": log_request['request_type'],
-                "urgencyLevel": log_request['urgency_level'],
-                "propertyAddress": log_request['property_address'],
-                "description": log_request['description'],
-                "status": log_request['status']
-            }), 200
+        if log_request is not None:
+            return jsonify(LOG_REQUEST_FIELDS.to_api(log_request, fields)), 200
         else:
             return jsonify({"error": "Log request not found"}), 404
     except InvalidId:
@@ -102,31 +107,28 @@ def get_log_request(request_id):
 
 # Update Log Request
 @log_request_bp.route('/api/admin/log-requests/<request_id>', methods=['PUT', 'OPTIONS'])
+@response_cache.invalidates("logRequests")
+@validate_json(LOG_REQUEST_UPDATE_SCHEMA)
+@bulkheads.guard("writes")
 def update_log_request(request_id):
     """Update a specific log request with a request_id.
     Args:
         request_id  (str): Log request unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "request_type": data.get('requestType', ''),
-            "logged_by": data.get('loggedBy', ''),
-            "urgency_level": data.get('urgencyLevel', ''),
-            "property_address": data.get('propertyAddress', ''),
-            "description": data.get('description', ''),
-            "status": data.get('status', 'pending')
-        }
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
-        result = logRequestsCollection.update_one(
-            {"_id": ObjectId(request_id)}, {"$set": update_data}
+        status, version = update_versioned(
+            logRequestsCollection, {"_id": ObjectId(request_id)},
+            {"$set": update_data}
         )
-        if result.matched_count == 0:
+        if status == 404:
             return jsonify({"msg": "Log request not found"}), 404
-        return jsonify({"msg": "Log request updated successfully"}), 200
+        if status == 412:
+            return precondition_failed(version)
+        return versioned_response(
+            {"msg": "Log request updated successfully"}, version
+        )
     except InvalidId:
         return jsonify({"error": "Invalid tenant ID format"}), 404
     except PyMongoError as e:
@@ -137,22 +139,20 @@ def update_log_request(request_id):
 @log_request_bp.route(
     '/api/admin/log-requests/<request_id>/status', methods=['PUT', 'OPTIONS']
 )
+@response_cache.invalidates("logRequests")
+@validate_json(LOG_REQUEST_STATUS_SCHEMA)
+@bulkheads.guard("writes")
 def update_log_request_status(request_id):
     """Update the status of a specific log request with a request_id.
     Args:
         request_id (str): Log request unigue id
     """
-    data = request.json
-    try:
-        update_data = {
-            "status": data.get('status', 'pendimg')
-        }
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
         result = logRequestsCollection.update_one(
-            {"_id": ObjectId(request_id)}, {"$set": update_data}
+            {"_id": ObjectId(request_id)},
+            {"$set": update_data, "$inc": {"version": 1}}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "Log request not found"}), 404
@@ -167,29 +167,27 @@ def update_log_request_status(request_id):
 @log_request_bp.route(
     '/api/admin/log-requests/<request_id>/archive', methods=['PUT', 'OPTIONS']
 )
+@response_cache.invalidates("logRequests")
+@validate_json(LOG_REQUEST_ARCHIVE_SCHEMA)
+@bulkheads.guard("writes")
 def archive_log_request(request_id):
     """Archive a specific log request with a request_id.
     Args:
         request_id (str): Log request unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "archive": data.get('archive', False)
-        }
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
         result = logRequestsCollection.update_one(
-            {"_id": ObjectId(request_id)}, {"$set": update_data}
+            {"_id": ObjectId(request_id)},
+            {"$set": update_data, "$inc": {"version": 1}}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "Log request not found"}), 404
         return jsonify({"msg": "Log request archived successfully"}), 200
     except InvalidId:
         return jsonify({"error": "Invalid tenant ID format"}), 404
-    except PymongoError as e:
+    except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
 
@@ -197,22 +195,20 @@ def archive_log_request(request_id):
 @log_request_bp.route(
     '/api/admin/log-requests/<request_id>/close', methods=['PUT', 'OPTIONS']
 )
+@response_cache.invalidates("logRequests")
+@validate_json(LOG_REQUEST_CLOSE_SCHEMA)
+@bulkheads.guard("writes")
 def close_log_request(request_id):
     """Close a specific log request with a request_id.
     Args:
         request_id (str): Log request unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "status": data.get('status', 'resolved')
-        }
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
         result = logRequestsCollection.update_one(
-            {"_id": ObjectId(request_id)}, {"$set": update_data}
+            {"_id": ObjectId(request_id)},
+            {"$set": update_data, "$inc": {"version": 1}}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "Log request not found"}), 404
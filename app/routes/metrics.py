@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Route exposing the in-process metrics of the worker"""
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+# Get Worker Metrics
+@metrics_bp.route('/api/admin/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """Return the counters of the worker serving the request.
+    Each worker keeps its own, poll several times to see them all.
+    """
+    identity = get_jwt_identity()
+    if identity.get('role') != 'admin':
+        return jsonify({"msg": "Admins only"}), 403
+    return jsonify(current_app.metrics.snapshot()), 200
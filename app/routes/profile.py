@@ -3,46 +3,65 @@ from bson.objectid import ObjectId
 from app import mail
 from app.models.admin import Admin
 from pymongo.errors import PyMongoError
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_mail import Mail, Message
 import uuid
+from app.utils.fields import FieldMap, requested_fields
 
 profile_bp = Blueprint('profile_bp', __name__)
 # logger = current_app.logger
 adminsCollection = current_app.adminsCollection
 tenantsCollection = current_app.tenantsCollection
+response_cache = current_app.response_cache
+
+# API field name -> document path of the profile view
+PROFILE_FIELDS = FieldMap({
+    "first_name": "name.fname",
+    "last_name": "name.lname",
+    "Date of Birth": "dob",
+    "Sex": "sex",
+    "email": "contact_details.email",
+    "phone_number": "contact_details.phone",
+    "address": "contact_details.address",
+    "Rentage_fees": "tenancy_info.fees",
+    "Rentage_Paid": "tenancy_info.paid",
+    "Rentage_Date_Paid": "tenancy_info.datePaid",
+    "Rentage_Start": "tenancy_info.start",
+    "Rentage_Expires": "tenancy_info.expires",
+    "role": "role"
+})
 
 @profile_bp.route('/api/profile', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@response_cache.cached(
+    "tenants", per_identity=True,
+    stale_while_revalidate=current_app.config['CACHE_STALE_WHILE_REVALIDATE'],
+    stale_if_error=current_app.config['CACHE_STALE_IF_ERROR']
+)
 def get_profile():
     identity = get_jwt_identity()
     email = identity.get('email')
     role = identity.get('role')
     
+    try:
+        fields = requested_fields(PROFILE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Assuming you have separate collections for admins and tenants
     collection = tenantsCollection
-    user = collection.find_one({"contact_details.email": email})
-    
-    if not user:
+    # the user id claim of the token avoids the email lookup
+    uid = get_jwt().get('uid')
+    query = {"_id": ObjectId(uid)} if uid else {"contact_details.email": email}
+    user = collection.find_one(query, PROFILE_FIELDS.projection(fields))
+
+    if user is None:
         return jsonify({"msg": "User not found"}), 404
-    
-    # Exclude sensitive fields if necessary before returning the user document
-    profile_data = {
-        "first_name": user["name"]["fname"],
-        "last_name": user["name"]["lname"],
-        "Date of Birth": user["dob"],
-        "Sex": user["sex"],
-        "email": user["contact_details"]["email"],
-        "phone_number": user["contact_details"]["phone"],
-        "address": user["contact_details"]["address"],
-        "Rentage_fees": user["tenancy_info"]["fees"],
-        "Rentage_Paid": user["tenancy_info"]["paid"],
-        "Rentage_Date_Paid": user["tenancy_info"]["datePaid"],
-        "Rentage_Start": user["tenancy_info"]["start"],
-        "Rentage_Expires": user["tenancy_info"]["expires"],
-        "role": user.get("role", role)  # Assuming role might differ in some cases
-        # Add more fields as needed
-    }
-    
+
+    # Only the profile fields are loaded, the password hash never is
+    profile_data = PROFILE_FIELDS.to_api(user, fields)
+    if "role" in profile_data and profile_data["role"] is None:
+        profile_data["role"] = role
+
     return jsonify(profile_data), 200
@@ -1,35 +1,49 @@
 #!/usr/bin/env python3
 """All routes for property CRUD operations"""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from bson.objectid import ObjectId
-from app.models.property import Property
+from app.models.property import Property, PROPERTY_FIELDS
 from pymongo.errors import PyMongoError
 from bson.errors import InvalidId
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.utils.conditional import (
+    conditional, update_versioned, versioned_response, precondition_failed
+)
+from app.schemas import PROPERTY_SCHEMA
 
 
 property_bp = Blueprint('property', __name__)
 
 propertiesCollection = current_app.propertiesCollection
+response_cache = current_app.response_cache
+singleflight = current_app.singleflight
+bulkheads = current_app.bulkheads
+
+# keep the catalog up through short database incidents
+STALE_POLICY = {
+    "stale_while_revalidate":
+        current_app.config['CACHE_STALE_WHILE_REVALIDATE'],
+    "stale_if_error": current_app.config['CACHE_STALE_IF_ERROR']
+}
 
 # Create Property
 @property_bp.route('/api/admin/properties', methods=['POST', 'OPTIONS'])
+@response_cache.invalidates("properties")
+@validate_json(PROPERTY_SCHEMA)
+@bulkheads.guard("writes")
 def create_property():
     """Create a new property instance and store it in the database.
        Return: "msg": "Property created successfully"
        and success status
     """
-    data = request.json
-    try:
-        property = Property(
-            address=data['address'],
-            property_type=data['type'],
-            unit_availability=data['unitAvailability'],
-            rental_fees=data['rentalFees']
-        )
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    data = g.payload
+    property = Property(
+        address=data['address'],
+        property_type=data['type'],
+        unit_availability=data['unit_availability'],
+        rental_fees=data['rental_fees']
+    )
 
     try:
         insert_result = propertiesCollection.insert_one(property.to_dict())
@@ -44,44 +58,43 @@ def create_property():
 
 # Get All Properties
 @property_bp.route('/api/admin/properties', methods=['GET', 'OPTIONS'])
+@conditional("properties")
+@response_cache.cached("properties", **STALE_POLICY)
+@singleflight.coalesce("properties")
+@bulkheads.guard("bulk_reads")
 def get_all_properties():
     """Retrieve all properties from the database.
     Return: List of properties
     """
 
     try:
-        properties = propertiesCollection.find()
-        properties_list = [{
-            "propertyId": str(property['_id']),
-            "dateCreated": property['date_created'],
-            "address": property['address'],
-            "type": property['type'],
-            "unitAvailability": property['unit_availability'],
-            "rentalFees": property['rental_fees']
-        } for property in properties]
+        fields = requested_fields(PROPERTY_FIELDS)
+        properties = propertiesCollection.find(
+            {}, PROPERTY_FIELDS.projection(fields)
+        )
+        serialize = PROPERTY_FIELDS.serializer(fields)
+        properties_list = [serialize(property) for property in properties]
         return jsonify(properties_list), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
 
 # Get Specific Property Details
 @property_bp.route('/api/admin/properties/<property_id>', methods=['GET', 'OPTIONS'])
+@conditional("properties", propertiesCollection, "property_id")
+@response_cache.cached("properties")
 def get_specific_property(property_id):
     """Retrieve details of a specific property by ID.
     """
     try:
+        fields = requested_fields(PROPERTY_FIELDS)
         property = propertiesCollection.find_one(
-            {"_id": ObjectId(property_id)}
+            {"_id": ObjectId(property_id)}, PROPERTY_FIELDS.projection(fields)
         )
-        if property:
-            return jsonify({
-                "propertyId": str(property['_id']),
-                "dateCreated": property['date_created'],
-                "address": property['address'],
-                "type": property['type'],
-                "unitAvailability": property['unit_availability'],
-                "rentalFees": property['rental_fees']
-            }), 200
+        if property is not None:
+            return jsonify(PROPERTY_FIELDS.to_api(property, fields)), 200
         else:
             return jsonify({"error": "Property not found"}), 404
     except InvalidId:
@@ -94,28 +107,25 @@ def get_specific_property(property_id):
 
 # Update Property Details
 @property_bp.route('/api/admin/properties/<property_id>', methods=['PUT', 'OPTIONS'])
+@response_cache.invalidates("properties")
+@validate_json(PROPERTY_SCHEMA)
+@bulkheads.guard("writes")
 def update_property(property_id):
     """Update a specific property by ID."""
-    data = request.json
-    try:
-        update_data = {
-            "address": data['address'],
-            "type": data['type'],
-            "unit_availability": data['unitAvailability'],
-            "rental_fees": data['rentalFees']
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
-        result = propertiesCollection.update_one(
-            {"_id": ObjectId(property_id)}, {"$set": update_data}
+        status, version = update_versioned(
+            propertiesCollection, {"_id": ObjectId(property_id)},
+            {"$set": update_data}
         )
-        if result.matched_count == 0:
+        if status == 404:
             return jsonify({"msg": "Property not found"}), 404
-        return jsonify({"msg": "Property updated successfully"}), 200
+        if status == 412:
+            return precondition_failed(version)
+        return versioned_response(
+            {"msg": "Property updated successfully"}, version
+        )
     except InvalidId:
         return jsonify({"error": "Invalid Property ID format"}), 404
     except PyMongoError as e:
@@ -124,6 +134,8 @@ def update_property(property_id):
 
 # Delete Property
 @property_bp.route('/api/admin/properties/<property_id>', methods=['DELETE', 'OPTIONS'])
+@response_cache.invalidates("properties")
+@bulkheads.guard("writes")
 def delete_property(property_id):
     """Dlete a specific property by ID."""
     try:
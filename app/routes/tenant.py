@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 """All routes for tenant CRUD operations"""
-from flask import Blueprint, request, jsonify, url_for, current_app
+from flask import Blueprint, request, jsonify, url_for, current_app, g
 from bson.objectid import ObjectId
 from flask_mail import Message
-from app.models.tenant import Tenant
-from pymongo.errors import PyMongoError
+from app.models.tenant import Tenant, TENANT_FIELDS
+from app.models.identity import IdentityDirectory
+from pymongo.errors import PyMongoError, DuplicateKeyError
 from werkzeug.security import generate_password_hash
 from bson.errors import InvalidId
 import uuid
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.streaming import stream_documents
+from app.utils.fields import requested_fields
+from app.utils.validation import validate_json
+from app.utils.conditional import (
+    conditional, update_versioned, versioned_response, precondition_failed
+)
+from app.schemas import (
+    TENANT_CREATE_SCHEMA, TENANT_UPDATE_SCHEMA,
+    TENANT_EMERGENCY_CONTACT_SCHEMA
+)
+from datetime import datetime
 
 
 tenant_bp = Blueprint('tenant', __name__)
@@ -16,6 +28,15 @@ logger = current_app.logger
 mail = current_app.mail
 reset_tokens = {}
 tenantsCollection = current_app.tenantsCollection
+directory = IdentityDirectory(current_app.identitiesCollection)
+response_cache = current_app.response_cache
+singleflight = current_app.singleflight
+bulkheads = current_app.bulkheads
+
+# get_tenant has always named this one field in snake_case
+TENANT_DETAIL_FIELDS = TENANT_FIELDS.renamed(
+    leaseAgreementDetails='lease_agreement_details'
+)
 
 # Utility function to send emails
 def send_email(subject, recipients, body):
@@ -26,51 +47,62 @@ def send_email(subject, recipients, body):
     except Exception as e:
         logger.error(f"Failed to send email to {recipients}: {e}")
 
+
+def sync_identity(tenant_id, update_data):
+    """Mirror a tenant update in the identity directory.
+    A failure leaves the tenant updated, `flask identities backfill`
+    repairs the directory.
+    """
+    try:
+        if 'contact_details' in update_data:
+            directory.update_contact(tenant_id, update_data)
+        else:
+            directory.update(tenant_id, update_data)
+    except PyMongoError as e:
+        logger.error(f"Identity directory out of sync for {tenant_id}: {e}")
+
+
 # Create Tenant Account
 @tenant_bp.route('/api/admin/tenants', methods=['POST', 'OPTIONS'])
+@response_cache.invalidates("tenants")
 @jwt_required()
+@validate_json(TENANT_CREATE_SCHEMA)
+@bulkheads.guard("writes")
 def create_tenant():
     """Create tenant as instance of Tenant, post tenant to MongoDB database,
        and send notification email with a reset password link.
     """
-    data = request.json
+    data = g.payload
+    contact_details = data['contact_details']
     try:
-        # Check if a tenant with same email or phone number already exist
-        if tenantsCollection.find_one({
-            "$or": [
-                {"contact_details.email": data['contactDetails']['email']},
-                {"contact_details.phone": data['contactDetails']['phone']}
-            ]
-        }):
+        # Check if a user of any role with same email or phone already exist
+        if directory.exists(
+            contact_details['email'], contact_details['phone']
+        ):
             return jsonify(
                 {"error": "Tenant with same email or phone exist"}
-            )
+            ), 409
 
         tenant = Tenant(
-            name=data['name'],
-            password=generate_password_hash(data['password']),
-            dob=data['DoB'],
-            sex=data['sex'],
-            contact_details=data['contactDetails'],
-            emergency_contact=data['emergencyContact'],
-            tenancy_info=data['tenancyInfo'],
-            lease_agreement_details=data['leaseAgreementDetails'],
-            role=data['role']
+            password=generate_password_hash(data.pop('password')), **data
         )
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        # the unique email index of the directory settles concurrent creates
+        directory.add(tenant.to_dict(), "tenant")
+    except DuplicateKeyError:
+        return jsonify({"error": "Tenant with same email or phone exist"}), 409
+    except PyMongoError as e:
+        return jsonify({"error": str(e)}), 500
 
     try:
         insert_result = tenantsCollection.insert_one(tenant.to_dict())
-    except Exception as e:
+    except PyMongoError as e:
+        directory.remove(tenant.tenant_id)
         return jsonify({"error": str(e)}), 500
 
     tenant_id = insert_result.inserted_id
 
     # Send notification email with a reset password link
-    email = data['contactDetails']['email']
+    email = contact_details['email']
     reset_token = str(uuid.uuid4())
     reset_tokens[reset_token] = email
     reset_url = url_for('main.auth_bp.reset_password', token=reset_token, _external=True)
@@ -83,67 +115,35 @@ def create_tenant():
 # Get all tenants
 @tenant_bp.route('/api/admin/tenants', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@conditional("tenants")
+@singleflight.coalesce("tenants")
+@bulkheads.guard("bulk_reads")
 def get_all_tenants():
     """Find all tenants from MongoDB and return a list of all the tenants."""
     try:
-        tenants = tenantsCollection.find({"active": True})
-        tenants_list = [{
-            "tenantId": str(tenant['_id']),
-            "dateCreated": tenant['date_created'],
-            "lastUpdated": tenant['date_updated'],
-            "fname": tenant['name']['fname'],
-            "lname": tenant['name']['lname'],
-            "sex": tenant['sex'],
-            "DoB": tenant['dob'],
-            "phone": tenant['contact_details']['phone'],
-            "email": tenant['contact_details']['email'],
-            "address": tenant['contact_details']['address'],
-            "rentageFee": tenant['tenancy_info']['fees'],
-            "rentagePaid": tenant['tenancy_info']['paid'],
-            "datePaid": tenant['tenancy_info']['datePaid'],
-            "rantageStarted": tenant['tenancy_info']['start'],
-            "rantageExpires": tenant['tenancy_info']['expires'],
-            "rentageArrears": tenant['tenancy_info']['arrears'],
-            "emergencyContactName": tenant['emergency_contact']['name'],
-            "emergencyContactPhone": tenant['emergency_contact']['phone'],
-            "emergencyContactAddress": tenant['emergency_contact']['address'],
-            "leaseAgreementDetails": tenant['lease_agreement_details']
-        } for tenant in tenants]
-        return jsonify(tenants_list), 200
+        fields = requested_fields(TENANT_FIELDS)
+        tenants = tenantsCollection.find(
+            {"active": True}, TENANT_FIELDS.projection(fields)
+        )
+        return stream_documents(tenants, TENANT_FIELDS.serializer(fields))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except PyMongoError as e:
         return jsonify({"error": str(e)}), 500
 
 
 # Get a Specific Tenant Details
 @tenant_bp.route('/api/admin/tenants/<tenant_id>', methods=['GET', 'OPTIONS'])
+@conditional("tenants", tenantsCollection, "tenant_id")
 def get_tenant(tenant_id):
     try:
+        fields = requested_fields(TENANT_DETAIL_FIELDS)
         tenant = tenantsCollection.find_one(
-            {"_id": ObjectId(tenant_id), "active": True}
+            {"_id": ObjectId(tenant_id), "active": True},
+            TENANT_DETAIL_FIELDS.projection(fields)
         )
-        if tenant:
-            return jsonify({
-                "tenantId": str(tenant['_id']),
-                "dateCreated": tenant['date_created'],
-                "lastUpdated": tenant['date_updated'],
-                "fname": tenant['name']['fname'],
-                "lname": tenant['name']['lname'],
-                "sex": tenant['sex'],
-                "DoB": tenant['dob'],
-                "phone": tenant['contact_details']['phone'],
-                "email": tenant['contact_details']['email'],
-                "address": tenant['contact_details']['address'],
-                "rentageFee": tenant['tenancy_info']['fees'],
-                "rentagePaid": tenant['tenancy_info']['paid'],
-                "datePaid": tenant['tenancy_info']['datePaid'],
-                "rantageStarted": tenant['tenancy_info']['start'],
-                "rantageExpires": tenant['tenancy_info']['expires'],
-                "rentageArrears": tenant['tenancy_info']['arrears'],
-                "emergencyContactName": tenant['emergency_contact']['name'],
-                "emergencyContactPhone": tenant['emergency_contact']['phone'],
-                "emergencyContactAddress": tenant['emergency_contact']['address'],
-                "lease_agreement_details": tenant['lease_agreement_details']
-            }), 200
+        if tenant is not None:
+            return jsonify(TENANT_DETAIL_FIELDS.to_api(tenant, fields)), 200
         else:
             return jsonify({"error": "Tenant not found"}), 404
     except InvalidId:
@@ -156,36 +156,38 @@ def get_tenant(tenant_id):
 
 # Update Specific Tenant Details
 @tenant_bp.route('/api/admin/tenants/<tenant_id>', methods=['PUT', 'OPTIONS'])
+@response_cache.invalidates("tenants")
 @jwt_required()
+@validate_json(TENANT_UPDATE_SCHEMA)
+@bulkheads.guard("writes")
 def update_tenant(tenant_id):
     """Update a specific tenant with a tenant_id.
     Args:
         tenant_id (str): tenant unique id
     """
-    data = request.json
-    try:
-        update_data = {
-            "date_updated": data['lastUpdated'],
-            "name": data['name'],
-            "dob": data['DoB'],
-            "sex": data['sex'],
-            "contact_details": data['contactDetails'],
-            "emergency_contact": data['emergencyContact'],
-            "tenancy_info": data['tenancyInfo'],
-            "lease_agreement_details": data['leaseAgreementDetails']
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = dict(g.payload, date_updated=datetime.now())
+    contact_details = update_data['contact_details']
 
     try:
-        result = tenantsCollection.update_one(
-            {"_id": ObjectId(tenant_id)}, {"$set": update_data}
+        if directory.exists(
+            contact_details['email'], contact_details['phone'],
+            exclude_id=ObjectId(tenant_id)
+        ):
+            return jsonify(
+                {"error": "Tenant with same email or phone exist"}
+            ), 409
+        status, version = update_versioned(
+            tenantsCollection, {"_id": ObjectId(tenant_id)},
+            {"$set": update_data}
         )
-        if result.matched_count == 0:
+        if status == 404:
             return jsonify({"msg": "Tenant not found"}), 404
-        return jsonify({"msg": "Tenant updated successfully"}), 200
+        if status == 412:
+            return precondition_failed(version)
+        sync_identity(ObjectId(tenant_id), update_data)
+        return versioned_response(
+            {"msg": "Tenant updated successfully"}, version
+        )
     except InvalidId:
         return jsonify({"error": "Invalid tenant ID format"}), 400
     except PyMongoError as e:
@@ -194,7 +196,9 @@ def update_tenant(tenant_id):
 
 # Deactivate/Delete Tenant Account
 @tenant_bp.route('/api/admin/tenants/<tenant_id>', methods=['DELETE', 'OPTIONS'])
+@response_cache.invalidates("tenants")
 @jwt_required()
+@bulkheads.guard("writes")
 def delete_tenant(tenant_id):
     """Update a specific tenant with a tenant_id, setting the active attribute to False.
     Args:
@@ -202,9 +206,11 @@ def delete_tenant(tenant_id):
     """
     try:
         result = tenantsCollection.update_one(
-            {"_id": ObjectId(tenant_id)}, {"$set": {"active": False}}
+            {"_id": ObjectId(tenant_id)},
+            {"$set": {"active": False}, "$inc": {"version": 1}}
         )
         if result.matched_count:
+            sync_identity(ObjectId(tenant_id), {"active": False})
             return jsonify({"msg": "Tenant deactivated"}), 204
         return jsonify({"error": "Tenant not found"}), 404
     except InvalidId:
@@ -217,21 +223,17 @@ def delete_tenant(tenant_id):
 @tenant_bp.route(
     '/api/tenants/<tenant_id>/emergencycontacts', methods=['PUT', 'OPTIONS']
 )
+@response_cache.invalidates("tenants")
+@validate_json(TENANT_EMERGENCY_CONTACT_SCHEMA)
+@bulkheads.guard("writes")
 def update_tenant_contact(tenant_id):
     """Update contact information for a specific tenant"""
-    data = request.json
-    try:
-        update_data = {
-            "emergency_contact": data['emergencyContact'],
-        }
-    except KeyError as e:
-        return jsonify({"error": f"Missing field {str(e)}"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+    update_data = g.payload
 
     try:
         result = tenantsCollection.update_one(
-            {"_id": ObjectId(tenant_id)}, {"$set": update_data}
+            {"_id": ObjectId(tenant_id)},
+            {"$set": update_data, "$inc": {"version": 1}}
         )
         if result.matched_count == 0:
             return jsonify({"msg": "Tenant not found"}), 404
@@ -250,7 +252,8 @@ def get_lease_agreements(tenant_id):
     """Get lease agreements for a specific tenant"""
     try:
         tenant = tenantsCollection.find_one(
-            {"_id": ObjectId(tenant_id), "active": True}
+            {"_id": ObjectId(tenant_id), "active": True},
+            {"lease_agreement_details": 1}
         )
         if tenant:
             return jsonify({
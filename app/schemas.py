@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""request payload schemas of the routes, compiled once at import.
+
+Output keys are the document keys, so a loaded payload can be passed to
+``$set`` as is.
+"""
+from app.utils.validation import (
+    Schema, Field, string, optional_string, email, phone, number, boolean,
+    date_string, choice, list_of
+)
+
+NAME_SCHEMA = Schema({
+    "fname": Field(string),
+    "lname": Field(string)
+})
+
+CONTACT_DETAILS_SCHEMA = Schema({
+    "email": Field(email),
+    "phone": Field(phone),
+    "address": Field(string)
+})
+
+EMERGENCY_CONTACT_SCHEMA = Schema({
+    "name": Field(string),
+    "phone": Field(phone),
+    "address": Field(string)
+})
+
+TENANCY_INFO_SCHEMA = Schema({
+    "fees": Field(number),
+    "paid": Field(number),
+    "datePaid": Field(date_string),
+    "start": Field(date_string),
+    "expires": Field(date_string),
+    "arrears": Field(number),
+    # the property whose chat room the tenant joins
+    "propertyId": Field(string, required=False)
+})
+
+# fields shared by tenant and admin accounts
+_PERSON_FIELDS = {
+    "name": Field(NAME_SCHEMA),
+    "DoB": Field(date_string, key="dob"),
+    "sex": Field(string),
+    "contactDetails": Field(CONTACT_DETAILS_SCHEMA, key="contact_details"),
+    "emergencyContact": Field(
+        EMERGENCY_CONTACT_SCHEMA, key="emergency_contact"
+    )
+}
+
+_TENANT_FIELDS = dict(_PERSON_FIELDS, **{
+    "tenancyInfo": Field(TENANCY_INFO_SCHEMA, key="tenancy_info"),
+    "leaseAgreementDetails": Field(string, key="lease_agreement_details")
+})
+
+TENANT_CREATE_SCHEMA = Schema(dict(_TENANT_FIELDS, **{
+    "password": Field(string),
+    "role": Field(choice("tenant"), required=False, default="tenant")
+}))
+
+TENANT_UPDATE_SCHEMA = Schema(_TENANT_FIELDS)
+
+TENANT_EMERGENCY_CONTACT_SCHEMA = Schema({
+    "emergencyContact": Field(
+        EMERGENCY_CONTACT_SCHEMA, key="emergency_contact"
+    )
+})
+
+ADMIN_CREATE_SCHEMA = Schema(dict(_PERSON_FIELDS, **{
+    "password": Field(string),
+    "role": Field(choice("admin"), required=False, default="admin")
+}))
+
+ADMIN_UPDATE_SCHEMA = Schema(_PERSON_FIELDS)
+
+# properties and listings share the same payload
+PROPERTY_SCHEMA = Schema({
+    "address": Field(string),
+    "type": Field(string),
+    "unitAvailability": Field(boolean, key="unit_availability"),
+    "rentalFees": Field(number, key="rental_fees")
+})
+
+ADMIN_MESSAGE_SCHEMA = Schema({
+    "message": Field(string),
+    "title": Field(string)
+})
+
+# a new admin message also says which tenants receive it in their inbox
+ADMIN_MESSAGE_CREATE_SCHEMA = Schema({
+    "message": Field(string),
+    "title": Field(string),
+    "audience": Field(
+        choice("all", "property", "tenants"), required=False, default="all"
+    ),
+    "propertyId": Field(string, required=False, key="property_id"),
+    "tenantIds": Field(list_of(string), required=False, key="tenant_ids")
+})
+
+_LOG_REQUEST_FIELDS = {
+    "requestType": Field(
+        optional_string, required=False, default="", key="request_type"
+    ),
+    "urgencyLevel": Field(
+        optional_string, required=False, default="", key="urgency_level"
+    ),
+    "propertyAddress": Field(
+        optional_string, required=False, default="", key="property_address"
+    ),
+    "description": Field(optional_string, required=False, default=""),
+    "loggedBy": Field(
+        optional_string, required=False, default="", key="logged_by"
+    )
+}
+
+LOG_REQUEST_CREATE_SCHEMA = Schema(_LOG_REQUEST_FIELDS)
+
+LOG_REQUEST_UPDATE_SCHEMA = Schema(dict(_LOG_REQUEST_FIELDS, **{
+    "status": Field(string, required=False, default="pending")
+}))
+
+
+def status_schema(default):
+    """Schema of the log request status endpoints"""
+    return Schema({
+        "status": Field(string, required=False, default=default)
+    })
+
+
+LOG_REQUEST_STATUS_SCHEMA = status_schema("pending")
+LOG_REQUEST_CLOSE_SCHEMA = status_schema("resolved")
+
+LOG_REQUEST_ARCHIVE_SCHEMA = Schema({
+    "archive": Field(boolean, required=False, default=False)
+})
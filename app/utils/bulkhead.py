@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Admission control: concurrency limits per route group (bulkheads).
+
+Each group admits ``limit`` requests at once and queues up to ``queue``
+more for at most ``timeout`` seconds; anything beyond is shed at once with
+a 503, so a saturated group (a login storm, a wave of list scans) cannot
+take the worker threads of the others.
+"""
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from werkzeug.wsgi import ClosingIterator
+
+
+def parse_bulkhead(spec):
+    """Parse "limit:queue" into (limit, queue)"""
+    limit, _, queue = spec.partition(":")
+    return int(limit), int(queue or 0)
+
+
+class Bulkhead:
+    """Counting semaphore with a bounded, time-limited wait queue"""
+    def __init__(self, limit, queue=0, timeout=1.0):
+        """Initializer/object constructor.
+        Args:
+            limit (int): requests running at once
+            queue (int): requests allowed to wait for a slot
+            timeout (float): seconds a queued request waits at most
+        """
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self._cond = threading.Condition()
+
+    def _release_once(self):
+        """Return a callable releasing the slot at its first call"""
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                self.release()
+        return release
+
+    def acquire(self):
+        """Take a slot, return False if the request has to be shed"""
+        with self._cond:
+            # queued requests go first
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit, "queue": self.queue,
+                "active": self.active, "waiting": self.waiting,
+                "admitted": self.admitted, "shed": self.shed
+            }
+
+
+class Bulkheads:
+    """The bulkheads of the route groups"""
+    def __init__(self, groups, timeout=1.0, enabled=True):
+        """Initializer/object constructor.
+        Args:
+            groups (dict): group name -> (limit, queue)
+            timeout (float): seconds a queued request waits at most
+            enabled (bool): False admits every request
+        """
+        self.enabled = enabled
+        self.groups = {
+            name: Bulkhead(limit, queue, timeout)
+            for name, (limit, queue) in groups.items()
+        }
+
+    def stats(self):
+        """Live occupancy of every group"""
+        return {name: group.stats() for name, group in self.groups.items()}
+
+    def guard(self, name):
+        """Decorator running a view inside the bulkhead of group ``name``.
+
+        The slot of a streamed response is held until its body iterator is
+        closed, by the WSGI server or by a singleflight producer.
+        """
+        group = self.groups[name]
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method == 'OPTIONS':
+                    return view(*args, **kwargs)
+                if not group.acquire():
+                    response = jsonify(
+                        {"msg": "Service busy, please retry shortly"}
+                    )
+                    response.status_code = 503
+                    response.headers['Retry-After'] = '1'
+                    return response
+                try:
+                    response = current_app.make_response(
+                        view(*args, **kwargs)
+                    )
+                except BaseException:
+                    group.release()
+                    raise
+                if response.is_streamed:
+                    response.response = ClosingIterator(
+                        response.response, group._release_once()
+                    )
+                else:
+                    group.release()
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Response cache of the read-heavy catalog routes.
+
+Entries live in a per-worker TTL/LRU cache keyed by namespace, path and
+query parameters, and remember the namespace version they were built at.
+Write handlers bump the version of their namespace in MongoDB (see
+app.utils.versions), which makes every worker miss on its old entries at
+its next version check.
+
+Routes may also opt into serving an entry past its freshness:
+stale-while-revalidate answers from a recently expired entry while a
+background thread rebuilds it, stale-if-error answers from the last good
+entry when MongoDB fails (RFC 5861). Stale responses carry ``Age`` and
+``Warning`` headers.
+"""
+import json
+import threading
+import time
+from functools import wraps
+from cachetools import TTLCache
+from flask import copy_current_request_context, current_app, g, request
+from flask_jwt_extended import get_jwt_identity
+from pymongo.errors import PyMongoError
+
+STALE_WARNING = '110 - "Response is Stale"'
+REVALIDATION_FAILED_WARNING = '111 - "Revalidation Failed"'
+
+
+class _Entry:
+    """A cached response and the namespace version it was built at"""
+    __slots__ = ("version", "body", "status", "content_type", "stored_at")
+
+    def __init__(self, version, body, status, content_type):
+        self.version = version
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.stored_at = time.monotonic()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+
+class ResponseCache:
+    """TTL/LRU cache of successful GET responses"""
+    def __init__(self, versions, maxsize=256, ttl=60, stale_ttl=300,
+                 logger=None):
+        """Initializer/object constructor.
+        Args:
+            versions (CollectionVersions): namespace version counters
+            maxsize (int): number of responses kept per worker
+            ttl (float): seconds a response is fresh
+            stale_ttl (float): seconds a response is kept past its
+                freshness for the routes allowed to serve it stale
+            logger: logger for MongoDB failures
+        """
+        self.versions = versions
+        self.ttl = ttl
+        self.logger = logger
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl + stale_ttl)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    @staticmethod
+    def key(namespace, per_identity=False):
+        """Cache key of the current request"""
+        key = (
+            namespace, request.path,
+            tuple(sorted(request.args.items(multi=True)))
+        )
+        if per_identity:
+            key += (json.dumps(get_jwt_identity(), sort_keys=True),)
+        return key
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def invalidate(self, *namespaces):
+        """Bump the version of ``namespaces`` so every worker misses.
+
+        If MongoDB cannot be reached the local entries are dropped, other
+        workers catch up when their entries expire.
+        """
+        for namespace in namespaces:
+            try:
+                self.versions.bump(namespace)
+            except PyMongoError as e:
+                if self.logger:
+                    self.logger.warning(
+                        f"Invalidation of {namespace} failed: {e}"
+                    )
+                self.clear()
+
+    @staticmethod
+    def _respond(entry, state, warning=None):
+        response = current_app.response_class(
+            entry.body, status=entry.status, content_type=entry.content_type
+        )
+        response.headers['X-Cache'] = state
+        if warning:
+            response.headers['Age'] = str(int(entry.age))
+            response.headers['Warning'] = warning
+        return response
+
+    def _store(self, key, version, response):
+        """Cache ``response`` if it is a complete 200"""
+        if response.status_code == 200 and not response.is_streamed:
+            self.set(key, _Entry(
+                version, response.get_data(), response.status_code,
+                response.content_type
+            ))
+
+    def _revalidate(self, key, version, view, args, kwargs):
+        """Rebuild the entry of ``key`` in a background thread"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        # the view runs in a copy of the request context, with the same g
+        # (the JWT of the request lives there)
+        saved_g = dict(g.__dict__)
+
+        @copy_current_request_context
+        def refresh():
+            try:
+                g.__dict__.update(saved_g)
+                self._store(key, version, current_app.make_response(
+                    view(*args, **kwargs)
+                ))
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Revalidation of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def cached(self, namespace, stale_while_revalidate=0, stale_if_error=0,
+               per_identity=False):
+        """Decorator caching the 200 GET responses of a view.
+
+        Args:
+            namespace (str): versioned namespace the view reads
+            stale_while_revalidate (float): seconds past its freshness an
+                entry is served while it is rebuilt in the background
+            stale_if_error (float): seconds past its freshness the last
+                good entry is served when MongoDB fails
+            per_identity (bool): the response depends on the JWT identity
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+                key = self.key(namespace, per_identity)
+                entry = self.get(key)
+
+                def serve_stale():
+                    return stale_if_error > 0 and entry is not None \
+                        and entry.age < self.ttl + stale_if_error
+
+                try:
+                    version = self.versions.get(namespace)
+                except PyMongoError:
+                    if serve_stale():
+                        return self._respond(
+                            entry, 'STALE', REVALIDATION_FAILED_WARNING
+                        )
+                    return view(*args, **kwargs)
+                if entry is not None and entry.version == version:
+                    if entry.age < self.ttl:
+                        return self._respond(entry, 'HIT')
+                    if entry.age < self.ttl + stale_while_revalidate:
+                        self._revalidate(key, version, view, args, kwargs)
+                        return self._respond(entry, 'STALE', STALE_WARNING)
+                try:
+                    response = current_app.make_response(
+                        view(*args, **kwargs)
+                    )
+                except PyMongoError:
+                    if serve_stale():
+                        return self._respond(
+                            entry, 'STALE', REVALIDATION_FAILED_WARNING
+                        )
+                    raise
+                if response.status_code >= 500 and serve_stale():
+                    return self._respond(
+                        entry, 'STALE', REVALIDATION_FAILED_WARNING
+                    )
+                self._store(key, version, response)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidates(self, *namespaces):
+        """Decorator invalidating ``namespaces`` after a successful write.
+
+        The version bump also changes the ETags of the namespace, see
+        app.utils.conditional.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                response = current_app.make_response(view(*args, **kwargs))
+                if request.method != 'OPTIONS' \
+                        and response.status_code < 400:
+                    self.invalidate(*namespaces)
+                return response
+            return wrapper
+        return decorator
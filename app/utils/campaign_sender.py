@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Throttled batch sending of email campaigns.
+
+Recipients are consumed from an iterator, ``batch_size`` at a time: each
+batch is sent over one SMTP connection and its progress written to the
+campaign once. Emails are paced to ``rate`` per second across batches.
+A recipient the server refuses is recorded and skipped; a connection
+lost mid-batch fails the rest of the batch, and a batch that cannot
+send a single email stops the campaign. A sender whose campaign was
+taken over stops at its next batch.
+
+The rate is the one of the SMTP account, shared by all the campaigns a
+sender runs at once: each email reserves the next send slot under a lock.
+"""
+import smtplib
+import socket
+import threading
+import time
+from itertools import islice
+from flask_mail import Message
+
+# errors of the connection rather than of one recipient; every
+# SMTPException is an OSError, a refused recipient is not one of them
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+    smtplib.SMTPAuthenticationError, ConnectionError, socket.timeout
+)
+
+
+class CampaignSender:
+    """Sends the emails of a campaign, recording progress and failures"""
+    def __init__(self, mail, campaigns, batch_size=50, rate=10.0,
+                 sleep=time.sleep, logger=None):
+        """Initializer/object constructor.
+        Args:
+            mail (Mail): Flask-Mail extension opening the connections
+            campaigns (Campaigns): model tracking the campaign
+            batch_size (int): emails per SMTP connection and progress write
+            rate (float): emails per second at most over all campaigns,
+                0 for no limit
+            sleep (callable): sleep of the background task
+            logger: logger of the failed batches
+        """
+        self.mail = mail
+        self.campaigns = campaigns
+        self.batch_size = batch_size
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.sleep = sleep
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._next_send = 0.0
+
+    def run(self, campaign, subject, body, recipients):
+        """Email ``subject`` and ``body`` to ``recipients``, an iterable of
+        (tenant_id, email) in tenant_id order, then close ``campaign``.
+        Must run in an app context.
+        """
+        campaign_id = campaign["_id"]
+        started = time.monotonic()
+        if not self.campaigns.start(campaign):
+            return
+        error = None
+        recipients = iter(recipients)
+        try:
+            while True:
+                batch = list(islice(recipients, self.batch_size))
+                if not batch:
+                    break
+                sent, failures, lost = self._send_batch(
+                    subject, body, batch
+                )
+                if not self.campaigns.progress(
+                        campaign, sent, failures, batch[-1][0]):
+                    if self.logger:
+                        self.logger.warning(
+                            f"Campaign {campaign_id} was taken over"
+                        )
+                    return
+                if lost and not sent:
+                    error = lost
+                    break
+        except Exception as e:
+            error = str(e)
+        if error and self.logger:
+            self.logger.error(f"Campaign {campaign_id} stopped: {error}")
+        self.campaigns.finish(campaign, time.monotonic() - started, error)
+
+    def _pace(self):
+        """Reserve the next send slot of the rate limit and wait for it"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_send, now)
+            self._next_send = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+    def _send_batch(self, subject, body, batch):
+        """Send one email per recipient of ``batch`` over one connection,
+        return (sent, failures, connection error)
+        """
+        sent = 0
+        failures = []
+        index = 0
+        try:
+            with self.mail.connect() as connection:
+                for index, (tenant_id, email) in enumerate(batch):
+                    self._pace()
+                    try:
+                        connection.send(Message(
+                            subject=subject, recipients=[email], body=body
+                        ))
+                        sent += 1
+                    except CONNECTION_ERRORS:
+                        raise
+                    except Exception as e:
+                        failures.append({
+                            "tenant_id": tenant_id, "email": email,
+                            "error": str(e)
+                        })
+                index = len(batch)
+        except CONNECTION_ERRORS as e:
+            # the current recipient and the rest of the batch
+            failures.extend(
+                {"tenant_id": tenant_id, "email": email, "error": str(e)}
+                for tenant_id, email in batch[index:]
+            )
+            return sent, failures, str(e)
+        return sent, failures, None
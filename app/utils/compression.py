@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Negotiated gzip/brotli compression of responses.
+
+A strong ETag covers one byte sequence: an encoded body gets the coding
+appended to its strong ETag, weak ETags are left as they are.
+"""
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# content codings, their name is the suffix of the strong ETags they encode
+ENCODINGS = ('br', 'gzip')
+
+
+def encoded_etag(etag, encoding):
+    """Return the strong ETag of the ``encoding`` of the ``etag`` body"""
+    return f"{etag}-{encoding}"
+
+
+class _GzipEncoder:
+    """Incremental gzip encoder"""
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    """Incremental brotli encoder"""
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def process(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _choose_encoding():
+    """Return the best encoding the client accepts, or None"""
+    accept = request.accept_encodings
+    if brotli is not None and accept['br'] and \
+            accept['br'] >= accept['gzip']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def _encoder(encoding, config):
+    if encoding == 'br':
+        return _BrotliEncoder(config['COMPRESS_BR_LEVEL'])
+    return _GzipEncoder(config['COMPRESS_LEVEL'])
+
+
+def _compress_stream(chunks, encoder, close=None):
+    """Compress an iterable of chunks, flushing after every chunk so each
+    batch reaches the client as soon as it is produced.
+    """
+    try:
+        for chunk in chunks:
+            data = encoder.process(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    """Register the response compression hook on ``app``.
+
+    Config:
+        COMPRESS_MIN_SIZE (int): bodies smaller than this are sent as is
+        COMPRESS_LEVEL (int): gzip level, 1-9
+        COMPRESS_BR_LEVEL (int): brotli quality, 0-11
+        COMPRESS_MIMETYPES (list): mimetypes worth compressing
+    """
+    config = app.config
+    config.setdefault('COMPRESS_MIN_SIZE', 500)
+    config.setdefault('COMPRESS_LEVEL', 6)
+    config.setdefault('COMPRESS_BR_LEVEL', 4)
+    config.setdefault('COMPRESS_MIMETYPES', [
+        'application/json', 'application/x-ndjson', 'text/html',
+        'text/plain', 'text/css', 'application/javascript'
+    ])
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+        if request.method == 'HEAD' or response.direct_passthrough or \
+                response.status_code < 200 or \
+                response.status_code in (204, 304) or \
+                'Content-Encoding' in response.headers:
+            return response
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+        min_size = config['COMPRESS_MIN_SIZE']
+
+        if response.is_streamed:
+            source = response.response
+            chunks = response.iter_encoded()
+            first = next(chunks, b'')
+            if len(first) < min_size:
+                # a tiny first chunk usually means the whole body is tiny,
+                # peek one more to find out before committing to compress
+                second = next(chunks, None)
+                if second is None:
+                    if hasattr(source, 'close'):
+                        source.close()
+                    response.set_data(first)
+                    return response
+                first += second
+            response.response = _compress_stream(
+                _prepend(first, chunks), _encoder(encoding, config),
+                getattr(source, 'close', None)
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            encoder = _encoder(encoding, config)
+            compressed = encoder.process(data) + encoder.finish()
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compress_response
+
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Conditional requests: ETag, Last-Modified, 304 Not Modified, If-Match.
+
+List validators are derived from the collection version counters
+maintained by the write handlers (see app.utils.versions), so an unchanged
+list is answered with a 304 after a single counter lookup, before the view
+fetches or serializes any document.
+
+Versions are read through the per-worker copy of CollectionVersions,
+at most check_interval old, so a response cache hit costs no database
+round trip; when MongoDB is unreachable the view answers, from the stale
+cache entries if it has them.
+
+Documents carry their own ``version`` field, incremented atomically by
+every write. Detail routes use it as a strong ETag, which update routes
+accept in If-Match to turn a blind ``$set`` into a conditional update.
+Compression appends the coding to the strong ETag of an encoded body
+(app.utils.compression), the If-None-Match of detail routes matches
+those tags too.
+"""
+import hashlib
+from functools import wraps
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from flask import current_app, jsonify, request
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from app.utils.streaming import wants_ndjson
+from app.utils.compression import ENCODINGS, encoded_etag
+
+VERSION_PROJECTION = {"_id": 0, "version": 1}
+
+
+def _query_string():
+    return "&".join(sorted(
+        f"{key}={value}" for key, value in request.args.items(multi=True)
+    ))
+
+
+def make_etag(namespace, version):
+    """Weak ETag value of the current request at ``version``.
+
+    Path, query parameters (?fields=) and the negotiated format are part
+    of the tag, since each gives a different representation.
+    """
+    parts = "|".join((
+        namespace, str(version), request.path, _query_string(),
+        "ndjson" if wants_ndjson() else "json"
+    ))
+    return hashlib.blake2b(parts.encode(), digest_size=12).hexdigest()
+
+
+def document_etag(version):
+    """Strong ETag value of a document at ``version``.
+
+    The full representation is tagged with the bare version, the one
+    If-Match expects; ``?fields=`` subsets get a suffix.
+    """
+    query = _query_string()
+    if not query:
+        return str(version)
+    digest = hashlib.blake2b(query.encode(), digest_size=4).hexdigest()
+    return f"{version}-{digest}"
+
+
+def _not_modified(etag, updated_at, variants=()):
+    """Return the ETag of the representation the request validators
+    match, ``etag`` or one of its ``variants``, None if they do not.
+
+    If-Modified-Since is only looked at without If-None-Match (RFC 9110).
+    """
+    if request.if_none_match:
+        for tag in (etag, *variants):
+            if request.if_none_match.contains_weak(tag):
+                return tag
+        return None
+    if request.if_modified_since and updated_at is not None and \
+            updated_at.replace(microsecond=0) \
+            <= request.if_modified_since.replace(tzinfo=None):
+        return etag
+    return None
+
+
+def conditional(namespace, collection=None, id_arg=None):
+    """Decorator adding ETag/Last-Modified to the 200 GET responses of a
+    view, and answering matching If-None-Match/If-Modified-Since requests
+    with 304 without calling it.
+
+    List routes are tagged with the version of ``namespace``. Detail
+    routes pass their ``collection`` and the name of the id URL argument,
+    and are tagged with the version of the document, read alone by _id.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            variants = ()
+            try:
+                version, updated_at = \
+                    current_app.versions.get_dated(namespace)
+                if collection is not None:
+                    doc = collection.find_one(
+                        {"_id": ObjectId(kwargs[id_arg])}, VERSION_PROJECTION
+                    )
+                    if doc is None:
+                        return view(*args, **kwargs)
+                    etag = document_etag(doc.get("version") or 0)
+                    variants = [encoded_etag(etag, encoding)
+                                for encoding in ENCODINGS]
+                else:
+                    etag = make_etag(namespace, version)
+            except (InvalidId, PyMongoError):
+                # let the view report the error, or its cache answer stale
+                return view(*args, **kwargs)
+            matched = _not_modified(etag, updated_at, variants)
+            if matched:
+                # the 304 confirms the representation the client holds
+                etag = matched
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=collection is None)
+            if updated_at is not None:
+                response.last_modified = updated_at
+            # let clients keep the body but revalidate on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def expected_version():
+    """Return the document version named by If-Match.
+
+    None without If-Match or with ``*``, -1 (never matches) when no strong
+    tag of the request is a version.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    for tag in if_match.as_set():
+        try:
+            return int(tag.split("-", 1)[0])
+        except ValueError:
+            continue
+    return -1
+
+
+def update_versioned(collection, query, update):
+    """Apply ``update`` to the document matching ``query`` and increment
+    its version, in one round trip. With If-Match, only the version named
+    by the request is updated.
+
+    Return (status, version):
+        200 and the new version,
+        404 and None if no document matches ``query``,
+        412 and the current version if If-Match does not match it.
+    """
+    expected = expected_version()
+    conditional_query = query
+    if expected is not None:
+        # documents written before versioning have no version field
+        conditional_query = dict(query, version=expected or None)
+    doc = collection.find_one_and_update(
+        conditional_query, dict(update, **{"$inc": {"version": 1}}),
+        projection=VERSION_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    if doc is not None:
+        return 200, doc["version"]
+    if expected is None:
+        return 404, None
+    current = collection.find_one(query, VERSION_PROJECTION)
+    if current is None:
+        return 404, None
+    return 412, current.get("version") or 0
+
+
+def versioned_response(body, version, status=200):
+    """Return a JSON response carrying ``version`` in its body and ETag"""
+    response = jsonify(dict(body, version=version))
+    response.status_code = status
+    response.set_etag(str(version))
+    return response
+
+
+def precondition_failed(version):
+    """412 response telling the client the current version"""
+    return versioned_response(
+        {"error": "Version mismatch, the resource was modified"},
+        version, 412
+    )
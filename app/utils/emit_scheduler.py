@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Coalescing of Socket.IO emits under bursts.
+
+Clients opt in at connect (``auth={"batch": true}``) and join the
+``batch:`` twin of each of their rooms instead of the room itself. For
+them, events emitted to the same recipients within ``window`` seconds
+are sent as one ``batch`` frame, ``[{"event": ..., "data": ...}, ...]``
+in emit order, instead of one frame per event and client; they handle
+``batch`` by dispatching every item to the handler of its event. An
+event alone in its window is emitted as is. Every other client is in
+the plain rooms and receives each event at once, as before.
+"""
+import threading
+
+BATCH_EVENT = 'batch'
+BATCH_ROOM_PREFIX = 'batch:'
+
+
+def batch_room(room):
+    """Room of the clients of ``room`` receiving batch frames"""
+    return BATCH_ROOM_PREFIX + room
+
+
+class EmitScheduler:
+    """Per-recipient buffers of events flushed at the end of a window"""
+    def __init__(self, socketio, app, window=0.02, max_batch=100,
+                 logger=None):
+        """Initializer/object constructor.
+        Args:
+            socketio (SocketIO): the Socket.IO server
+            app (Flask): application whose context serializes the events
+            window (float): seconds an event waits for others, 0 emits at
+                once
+            max_batch (int): events flushed at once when reached
+            logger: logger of the failed flushes
+        """
+        self.socketio = socketio
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.logger = logger
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(to):
+        if isinstance(to, (list, tuple, set)):
+            return tuple(sorted(to))
+        return to
+
+    def emit(self, event, data, to):
+        """Emit ``event`` to the room(s) ``to``: at once to their plain
+        members, within the window to their batching members
+        """
+        rooms = list(to) if isinstance(to, (list, tuple, set)) else [to]
+        batch_rooms = [batch_room(room) for room in rooms]
+        if self.window <= 0:
+            self.socketio.emit(event, data, to=rooms + batch_rooms)
+            return
+        self.socketio.emit(event, data, to=to)
+        if len(batch_rooms) == 1:
+            batch_rooms = batch_rooms[0]
+        key = self._key(batch_rooms)
+        with self._lock:
+            events = self._pending.get(key)
+            first = events is None
+            if first:
+                events = self._pending[key] = []
+            events.append({"event": event, "data": data})
+            full = len(events) >= self.max_batch
+            if full:
+                del self._pending[key]
+        if full:
+            self._send(batch_rooms, events)
+        elif first:
+            self.socketio.start_background_task(
+                self._flush_later, key, batch_rooms, events
+            )
+
+    def _flush_later(self, key, to, events):
+        """Send ``events`` at the end of their window, unless they were
+        sent when full
+        """
+        self.socketio.sleep(self.window)
+        with self._lock:
+            if self._pending.get(key) is not events:
+                return
+            del self._pending[key]
+        self._send(to, events)
+
+    def _send(self, to, events):
+        try:
+            # the app JSON provider serializes ObjectId and datetime
+            with self.app.app_context():
+                if len(events) == 1:
+                    self.socketio.emit(
+                        events[0]["event"], events[0]["data"], to=to
+                    )
+                else:
+                    self.socketio.emit(BATCH_EVENT, events, to=to)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Emit of {len(events)} events failed: {e}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""API field name to MongoDB document path mapping and projections"""
+from functools import lru_cache
+from flask import request
+
+
+_EMPTY = {}
+
+
+def _compile_serializer(fields):
+    """Compile a function mapping a document to an API dict.
+
+    Generates straight-line code like the hand written mappings it
+    replaces, with every intermediate subdocument looked up only once:
+
+        def serialize(doc):
+            get = doc.get
+            _0 = get('name')
+            if not isinstance(_0, dict):
+                _0 = _EMPTY
+            return {'fname': _0.get('fname'), 'sex': get('sex')}
+
+    Missing paths, and paths under a value that is not a subdocument,
+    serialize as None.
+    Args:
+        fields (dict): API field name -> dotted document path
+    """
+    lines = ["def serialize(doc):", "    get = doc.get"]
+    parents = {}
+    items = []
+    for name, path in fields.items():
+        keys = path.split('.')
+        source = "get"
+        for depth in range(1, len(keys)):
+            prefix = tuple(keys[:depth])
+            if prefix not in parents:
+                var = parents[prefix] = f"_{len(parents)}"
+                lines.append(f"    {var} = {source}({keys[depth - 1]!r})")
+                lines.append(f"    if not isinstance({var}, dict):")
+                lines.append(f"        {var} = _EMPTY")
+            source = f"{parents[prefix]}.get"
+        items.append(f"{name!r}: {source}({keys[-1]!r})")
+    lines.append("    return {" + ", ".join(items) + "}")
+    namespace = {"_EMPTY": _EMPTY}
+    exec("\n".join(lines), namespace)
+    return namespace["serialize"]
+
+
+class FieldMap:
+    """Ordered mapping of API field names to document paths.
+
+    The serializer and projection of the full field set are compiled
+    once, those of the subsets asked for with ``?fields=`` on first use
+    and kept in a bounded cache.
+    """
+    def __init__(self, fields):
+        """Initializer/object constructor.
+        Args:
+            fields (dict): API field name -> dotted document path
+        """
+        self.fields = dict(fields)
+        self._projection = self._build_projection(self.fields)
+        self._serializer = _compile_serializer(self.fields)
+        self._subset_serializer = lru_cache(maxsize=128)(
+            self._compile_subset
+        )
+
+    @staticmethod
+    def _build_projection(fields):
+        projection = {path: 1 for path in fields.values()}
+        if '_id' not in projection:
+            projection['_id'] = 0
+        return projection
+
+    def renamed(self, **aliases):
+        """Return a copy with API fields renamed, ``old_name=new_name``"""
+        return FieldMap({
+            aliases.get(name, name): path
+            for name, path in self.fields.items()
+        })
+
+    def projection(self, names=None):
+        """Return the MongoDB projection loading only ``names``"""
+        if names is None:
+            return self._projection
+        return self._build_projection({
+            name: self.fields[name] for name in names
+        })
+
+    def _compile_subset(self, names):
+        return _compile_serializer({
+            name: self.fields[name] for name in names
+        })
+
+    def serializer(self, names=None):
+        """Return a function mapping a document to its API dict"""
+        if names is None:
+            return self._serializer
+        return self._subset_serializer(tuple(names))
+
+    def to_api(self, doc, names=None):
+        """Map a document to its API dict"""
+        return self.serializer(names)(doc)
+
+
+def requested_fields(field_map):
+    """Return the field names asked for with ``?fields=``, None for all.
+
+    Raises:
+        ValueError: if a requested field is not part of ``field_map``
+    """
+    value = request.args.get('fields')
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in field_map.fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return names
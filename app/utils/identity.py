@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Per-worker cache resolving a JWT identity to its user"""
+import threading
+from cachetools import TTLCache
+from pymongo.errors import PyMongoError
+
+# the only fields the hot paths need from the user document
+IDENTITY_PROJECTION = {
+    "name": 1, "active": 1, "tenancy_info.propertyId": 1
+}
+
+
+def display_name(user):
+    """Return "fname lname" of a user document"""
+    name = user.get("name") or {}
+    return f"{name.get('fname', '')} {name.get('lname', '')}".strip()
+
+
+class IdentityCache:
+    """TTL/LRU cache of (email, role) ->
+    {"uid", "name", "active", "property_id"}.
+
+    Entries remember the version of the tenants/admins namespace they were
+    read at (see app.utils.versions). Updates, deactivations and password
+    resets bump it, so a worker drops its entries at its next version
+    check; the TTL bounds staleness if a bump is lost.
+    """
+    NAMESPACES = {"admin": "admins", "tenant": "tenants"}
+
+    def __init__(self, versions, collections, maxsize=1024, ttl=30):
+        """Initializer/object constructor.
+        Args:
+            versions (CollectionVersions): namespace version counters
+            collections (dict): role -> users Collection
+            maxsize (int): number of identities kept per worker
+            ttl (float): seconds an identity is kept at most
+        """
+        self.versions = versions
+        self.collections = collections
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def resolve(self, email, role):
+        """Return the identity of ``email`` as ``role``, None if unknown.
+        Raises:
+            PyMongoError: if the user has to be read and MongoDB fails
+        """
+        collection = self.collections.get(role)
+        if collection is None:
+            return None
+        try:
+            version = self.versions.get(self.NAMESPACES[role])
+        except PyMongoError:
+            version = None
+        key = (email, role)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and version is not None \
+                and entry[0] == version:
+            return entry[1]
+        user = collection.find_one(
+            {"contact_details.email": email}, IDENTITY_PROJECTION
+        )
+        identity = None if user is None else {
+            "uid": str(user["_id"]),
+            "name": display_name(user),
+            "active": user.get("active", True),
+            "property_id": (user.get("tenancy_info") or {}).get("propertyId")
+        }
+        with self._lock:
+            self._cache[key] = (version, identity)
+        return identity
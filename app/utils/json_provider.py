@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""JSON provider with native support for MongoDB types"""
+import json
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def default(obj):
+    """Convert objects the JSON encoders do not know about.
+
+    ObjectIds and decimals become strings, dates become ISO 8601 strings.
+    orjson serializes datetime and UUID itself, so this only runs for them
+    on the stdlib fallback path.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    raise TypeError(
+        f"Object of type {type(obj).__name__} is not JSON serializable"
+    )
+
+
+class MongoJSONProvider(JSONProvider):
+    """JSON provider backed by orjson when it is installed.
+
+    Serializes ObjectId, datetime, date, Decimal and Decimal128 natively,
+    so routes can return MongoDB documents without converting fields.
+    """
+
+    sort_keys = False
+    """Sorting keys costs time on every response and buys nothing, since
+    documents and API dicts already have a stable insertion order.
+    """
+
+    compact = None
+    """Same meaning as :attr:`flask.json.provider.DefaultJSONProvider.compact`.
+    """
+
+    mimetype = "application/json"
+
+    def dumpb(self, obj, indent=False):
+        """Serialize data as JSON to UTF-8 bytes.
+
+        Args:
+            obj: the data to serialize
+            indent (bool): pretty print with two space indentation
+        """
+        if orjson is not None:
+            option = 0
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=default, option=option)
+        if indent:
+            text = json.dumps(
+                obj, default=default, sort_keys=self.sort_keys, indent=2
+            )
+        else:
+            text = json.dumps(
+                obj, default=default, sort_keys=self.sort_keys,
+                separators=(",", ":")
+            )
+        return text.encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON to a string.
+
+        Keyword arguments meant for :func:`json.dumps` are accepted for
+        compatibility (Socket.IO passes ``separators``), only ``indent``
+        is honoured.
+        """
+        return self.dumpb(obj, indent=bool(kwargs.get("indent"))).decode(
+            "utf-8"
+        )
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON from a string or bytes."""
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Serialize the arguments as JSON and return a response with it.
+
+        The body is built as bytes directly, skipping the str round trip
+        of the default provider.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or \
+            self.compact is False
+        return self._app.response_class(
+            self.dumpb(obj, indent=indent) + b"\n", mimetype=self.mimetype
+        )
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Lease documents electing one worker for a shared background job.
+
+A lease is ``{_id: name, owner, expires}``. Acquiring it succeeds for its
+owner, or for anyone once it has expired; the upsert of a contender
+finding it held fails on the _id unique index, so only one worker holds
+it at a time. The holder renews it by acquiring it again, a dead holder
+loses it when it expires.
+"""
+import os
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+
+
+class Lease:
+    """A named lease held for ``ttl`` seconds from each acquisition"""
+    def __init__(self, collection: Collection, name, ttl):
+        """Initializer/object constructor.
+        Args:
+            collection (Collection): collection of the lease documents
+            name (str): lease _id, one per job
+            ttl (float): seconds the lease is held after an acquisition
+        """
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self._owner = None
+
+    @property
+    def owner(self):
+        """Owner id, made at first use so forked workers differ"""
+        if self._owner is None:
+            self._owner = f"{os.getpid()}:{ObjectId()}"
+        return self._owner
+
+    def acquire(self) -> bool:
+        """Take or renew the lease, False if another worker holds it"""
+        now = datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {"_id": self.name,
+                 "$or": [{"owner": self.owner}, {"expires": {"$lt": now}}]},
+                {"$set": {"owner": self.owner,
+                          "expires": now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""In-process counters and gauges reported by the admin metrics route"""
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Per-worker counters plus gauges read from registered providers"""
+    def __init__(self):
+        """Initializer/object constructor."""
+        self._counters = defaultdict(int)
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        """Add ``amount`` to the counter ``name``"""
+        with self._lock:
+            self._counters[name] += amount
+
+    def register(self, name, provider):
+        """Report the dict returned by ``provider()`` under ``name``"""
+        self._providers[name] = provider
+
+    def snapshot(self):
+        """Return every counter and provider value"""
+        with self._lock:
+            result = {"counters": dict(self._counters)}
+        for name, provider in self._providers.items():
+            result[name] = provider()
+        return result
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Socket.IO message queue on a MongoDB capped collection.
+
+Emits are inserted into a capped collection of the application database
+and every worker tails it with a tailable, awaitable cursor, so events
+reach the clients of all workers and nodes without a Redis or RabbitMQ
+deployment. The capped collection keeps the bus bounded in size; the
+await time bounds the delivery latency when the bus is idle.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo import CursorType
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid, PyMongoError
+from socketio import PubSubManager
+
+
+class MongoManager(PubSubManager):
+    """Client manager sharing events through a MongoDB capped collection.
+
+    Usage::
+
+        manager = MongoManager(database, "socketioQueue")
+        socketio.init_app(app, client_manager=manager)
+    """
+    name = 'mongodb'
+    # events re-read after a cursor restart are recognized by their _id
+    SEEN_SIZE = 1000
+    # how far back a restarted cursor looks, covers clock skew of nodes
+    RESUME_GRACE = timedelta(seconds=2)
+
+    def __init__(self, database: Database, collection='socketioQueue',
+                 size=16 * 1024 * 1024, await_ms=1000, channel='socketio',
+                 write_only=False, logger=None, json=None):
+        """Initializer/object constructor.
+        Args:
+            database (Database): database holding the queue
+            collection (str): name of the capped collection
+            size (int): bytes kept by the capped collection
+            await_ms (int): milliseconds a tailing read waits for events
+            channel (str): channel name, the same in all the servers
+        """
+        super().__init__(channel=channel, write_only=write_only,
+                         logger=logger, json=json)
+        self.database = database
+        self.collection_name = collection
+        self.size = size
+        self.await_ms = await_ms
+        self.collection = database.get_collection(collection)
+        self._created = False
+
+    def _ensure_capped(self):
+        """Create the capped collection, an insert would create a plain
+        one. Done at first use, so an unreachable database does not block
+        the application start.
+        """
+        if self._created:
+            return
+        try:
+            self.database.create_collection(
+                self.collection_name, capped=True, size=self.size
+            )
+        except CollectionInvalid:
+            # created by another worker
+            pass
+        self._created = True
+
+    def _publish(self, data):
+        for retries_left in range(1, -1, -1):  # 2 attempts
+            try:
+                self._ensure_capped()
+                return self.collection.insert_one({
+                    "channel": self.channel,
+                    "ts": datetime.now(timezone.utc),
+                    "data": self.json.dumps(data)
+                })
+            except PyMongoError as exc:
+                self._get_logger().error(
+                    'Cannot publish to mongodb... ' +
+                    ('retrying' if retries_left else 'giving up'),
+                    extra={"mongodb_exception": str(exc)}
+                )
+
+    def _tail(self, since):
+        return self.collection.find(
+            {"channel": self.channel, "ts": {"$gte": since}},
+            cursor_type=CursorType.TAILABLE_AWAIT
+        ).max_await_time_ms(self.await_ms)
+
+    def _listen(self):
+        seen = OrderedDict()
+        since = datetime.now(timezone.utc)
+        retry_sleep = 1
+        while True:
+            try:
+                self._ensure_capped()
+                cursor = self._tail(since - self.RESUME_GRACE)
+                while cursor.alive:
+                    for doc in cursor:
+                        retry_sleep = 1
+                        since = max(since, doc["ts"].replace(
+                            tzinfo=timezone.utc
+                        ))
+                        if doc["_id"] in seen:
+                            continue
+                        seen[doc["_id"]] = True
+                        if len(seen) > self.SEEN_SIZE:
+                            seen.popitem(last=False)
+                        yield doc["data"]
+                # a tailable cursor dies when nothing matched yet or when
+                # the capped collection overwrote its position
+                time.sleep(self.await_ms / 1000)
+            except PyMongoError as exc:
+                self._get_logger().error(
+                    'Cannot receive from mongodb... retrying in '
+                    f'{retry_sleep} secs',
+                    extra={"mongodb_exception": str(exc)}
+                )
+                time.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 60)
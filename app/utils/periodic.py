@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Background task run at a fixed interval in a daemon thread"""
+import threading
+
+
+class PeriodicTask:
+    """Run ``task()`` every ``interval`` seconds until stopped"""
+    def __init__(self, name, interval, task, logger=None):
+        """Initializer/object constructor.
+        Args:
+            name (str): thread name, used in the logs
+            interval (float): seconds between the end of a run and the
+                start of the next
+            task (callable): the work, exceptions are logged
+            logger: logger of the failed runs
+        """
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self.logger = logger
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.task()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"{self.name} failed: {e}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Token-bucket rate limiting of the routes.
+
+Every (scope, key) pair has a bucket of ``capacity`` tokens refilled at
+``capacity / period`` tokens per second; a request takes one token or is
+answered 429 with Retry-After. Buckets are first checked in process, so a
+burst is rejected without any I/O. When a MongoDB collection is given,
+requests passing the local bucket also take a token from a bucket shared
+by all workers, updated atomically by a single pipeline update.
+"""
+import math
+import threading
+import time
+from functools import wraps
+from cachetools import TTLCache
+from flask import jsonify, request
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(limit):
+    """Parse "10/minute" into (capacity, period in seconds)"""
+    count, _, period = limit.partition("/")
+    return int(count), _PERIODS[period.strip().rstrip("s")]
+
+
+def by_ip():
+    """Key requests by client address"""
+    return request.remote_addr
+
+
+def by_json_field(name):
+    """Return a key function reading ``name`` from the JSON body, for
+    per-account limits. Requests without it are not limited by the key.
+    """
+    def key():
+        data = request.get_json(silent=True) or {}
+        value = data.get(name)
+        return value.strip().lower() if isinstance(value, str) else None
+    return key
+
+
+def by_view_arg(name):
+    """Return a key function reading the URL argument ``name``"""
+    def key():
+        return (request.view_args or {}).get(name)
+    return key
+
+
+class RateLimiter:
+    """Token buckets kept in process, optionally shared through MongoDB"""
+    def __init__(self, collection=None, enabled=True, max_keys=10000,
+                 metrics=None, logger=None):
+        """Initializer/object constructor.
+        Args:
+            collection (Collection): shared buckets, None for per-worker
+                buckets only
+            enabled (bool): False lets every request through
+            max_keys (int): number of local buckets kept per worker
+            metrics (Metrics): counts the rejected requests
+            logger: logger for MongoDB failures
+        """
+        self.collection = collection
+        self.enabled = enabled
+        self.metrics = metrics
+        self.logger = logger
+        # an evicted bucket is a full one, an hour covers every period
+        self._buckets = TTLCache(maxsize=max_keys, ttl=3600)
+        self._lock = threading.Lock()
+        self._indexed = False
+
+    def _take_local(self, bucket_id, capacity, rate):
+        """Take a token from the local bucket, return the wait if empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(bucket_id, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[bucket_id] = (tokens, now)
+                return (1 - tokens) / rate
+            self._buckets[bucket_id] = (tokens - 1, now)
+            return 0
+
+    def _take_shared(self, bucket_id, capacity, rate, period):
+        """Take a token from the shared bucket, return the wait if empty.
+
+        Refill, check and take happen in one pipeline update, timed by
+        the server clock ($$NOW) so worker clocks do not matter.
+        """
+        if not self._indexed:
+            self.collection.create_index(
+                [("expires", ASCENDING)], expireAfterSeconds=0
+            )
+            self._indexed = True
+        elapsed = {"$divide": [
+            {"$subtract": ["$$NOW", {"$ifNull": ["$updated", "$$NOW"]}]},
+            1000
+        ]}
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [elapsed, rate]}
+        ]}]}
+        doc = self.collection.find_one_and_update(
+            {"_id": bucket_id},
+            [
+                {"$set": {"tokens": refilled, "updated": "$$NOW"}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": [
+                        "$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"
+                    ]},
+                    "expires": {"$add": ["$$NOW", period * 1000]}
+                }}
+            ],
+            projection={"tokens": 1, "allowed": 1}, upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return 0
+        return (1 - doc["tokens"]) / rate
+
+    def take(self, scope, key, capacity, period):
+        """Take a token for ``key`` from the ``scope`` bucket holding
+        ``capacity`` tokens per ``period`` seconds.
+        Return the seconds to wait before retrying, 0 if allowed.
+        """
+        rate = capacity / period
+        bucket_id = f"{scope}:{key}"
+        wait = self._take_local(bucket_id, capacity, rate)
+        if wait or self.collection is None:
+            return wait
+        try:
+            return self._take_shared(bucket_id, capacity, rate, period)
+        except PyMongoError as e:
+            # fail open, the local bucket still applies
+            if self.logger:
+                self.logger.warning(f"Shared rate limit unavailable: {e}")
+            return 0
+
+    def limit(self, scope, limit, key=by_ip):
+        """Decorator limiting a route to ``limit`` ("10/minute") requests
+        per key, ``key`` being a function of the current request.
+        """
+        capacity, period = parse_limit(limit)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method == 'OPTIONS':
+                    return view(*args, **kwargs)
+                value = key()
+                if value is None:
+                    return view(*args, **kwargs)
+                wait = self.take(scope, value, capacity, period)
+                if not wait:
+                    return view(*args, **kwargs)
+                if self.metrics:
+                    self.metrics.incr(f"ratelimit.{scope}.rejected")
+                response = jsonify({"msg": "Too many requests"})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(math.ceil(wait))
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Request coalescing for identical concurrent reads.
+
+The first request for a key (the leader) runs the view; requests for the
+same key arriving while it is in flight (followers) wait for it and are
+answered with the same status, headers and serialized body.
+
+A streamed response closes its flight as soon as the view returns. With
+no follower it is passed through untouched, keeping the memory profile
+of streaming. Otherwise it is produced once by a background thread into
+a chunk buffer that the leader and the followers replay at their own
+pace, so a slow client does not hold back the others. A replay whose
+producer fails or stalls raises instead of ending the body cleanly, so
+the client sees a broken transfer rather than a truncated document.
+"""
+import threading
+from collections import defaultdict
+from functools import wraps
+from flask import current_app, request
+from pymongo.errors import PyMongoError
+from werkzeug.datastructures import Headers
+from app.utils.streaming import wants_ndjson
+
+
+class FlightAborted(Exception):
+    """The shared streamed body could not be replayed to the end"""
+
+
+class _Flight:
+    """Response of an in-flight view shared by its leader and followers"""
+    __slots__ = ("ready", "cond", "status", "headers", "chunks", "done",
+                 "failed", "followers")
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.cond = threading.Condition()
+        self.status = None
+        self.headers = None
+        self.chunks = []
+        self.done = False
+        self.failed = False
+        self.followers = 0
+
+    def append(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, failed=False):
+        with self.cond:
+            self.done = True
+            self.failed = failed
+            self.cond.notify_all()
+
+    def replay(self, timeout):
+        """Yield every chunk, waiting up to ``timeout`` for each new one.
+        Raises:
+            FlightAborted: if the producer failed or stalled
+        """
+        index = 0
+        while True:
+            with self.cond:
+                if index >= len(self.chunks) and not self.done:
+                    self.cond.wait(timeout)
+                pending = self.chunks[index:]
+                done = self.done
+                failed = self.failed
+            if not pending and not done:
+                raise FlightAborted(f"No chunk for {timeout}s")
+            if done and failed and index + len(pending) >= len(self.chunks):
+                yield from pending
+                raise FlightAborted("Shared stream failed")
+            yield from pending
+            index += len(pending)
+            if done and index >= len(self.chunks):
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent identical GET requests within a worker"""
+    def __init__(self, timeout=10, logger=None):
+        """Initializer/object constructor.
+        Args:
+            timeout (float): seconds a follower waits for the leader before
+                running the view itself, and for each streamed chunk
+            logger: logger for failures of the background producers
+        """
+        self.timeout = timeout
+        self.logger = logger
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {
+            "leaders": 0, "followers": 0, "fallbacks": 0
+        })
+
+    @staticmethod
+    def key(namespace):
+        """Key of the current request, one per representation.
+
+        The namespace version is part of the key, so a request arriving
+        after a write of this worker never joins a read started before it.
+        """
+        try:
+            version = current_app.versions.get(namespace)
+        except PyMongoError:
+            version = None
+        return (
+            namespace, version, request.path,
+            tuple(sorted(request.args.items(multi=True))), wants_ndjson()
+        )
+
+    def stats(self):
+        """Coalescing counters per namespace, with the hit ratio"""
+        with self._lock:
+            stats = {
+                name: dict(counts) for name, counts in self._stats.items()
+            }
+            in_flight = len(self._flights)
+        for counts in stats.values():
+            total = counts["leaders"] + counts["followers"]
+            counts["coalesced_ratio"] = \
+                round(counts["followers"] / total, 4) if total else 0.0
+        return {"in_flight": in_flight, "namespaces": stats}
+
+    def _join(self, namespace, key):
+        """Return (flight, is_leader) for ``key``"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._stats[namespace]["leaders"] += 1
+                return flight, True
+            flight.followers += 1
+            self._stats[namespace]["followers"] += 1
+            return flight, False
+
+    def _land(self, key, flight):
+        """Close ``flight`` to new followers, return how many joined it"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return flight.followers
+
+    def _produce(self, flight, chunks):
+        """Drain the leader's streamed body into the shared buffer"""
+        failed = False
+        try:
+            for chunk in chunks:
+                flight.append(chunk)
+        except Exception as e:
+            failed = True
+            if self.logger:
+                self.logger.error(f"Coalesced stream aborted: {e}")
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            flight.finish(failed)
+
+    def _response(self, flight):
+        if flight.done and not flight.failed:
+            body = b"".join(flight.chunks)
+        else:
+            body = flight.replay(self.timeout)
+        return current_app.response_class(
+            body, status=flight.status, headers=Headers(flight.headers)
+        )
+
+    def coalesce(self, namespace):
+        """Decorator sharing one execution of a GET view between all
+        identical requests arriving while it runs.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+                key = self.key(namespace)
+                flight, leader = self._join(namespace, key)
+                if not leader:
+                    if flight.ready.wait(self.timeout) and not flight.failed:
+                        return self._response(flight)
+                    with self._lock:
+                        self._stats[namespace]["fallbacks"] += 1
+                    return view(*args, **kwargs)
+                try:
+                    response = current_app.make_response(
+                        view(*args, **kwargs)
+                    )
+                except Exception:
+                    # followers run the view themselves
+                    flight.failed = True
+                    self._land(key, flight)
+                    flight.ready.set()
+                    raise
+                flight.status = response.status_code
+                flight.headers = Headers(response.headers)
+                if not response.is_streamed:
+                    flight.append(response.get_data())
+                    self._land(key, flight)
+                    flight.finish()
+                    flight.ready.set()
+                    return response
+                if not self._land(key, flight):
+                    # nobody to share with, stream it as is
+                    flight.ready.set()
+                    return response
+                flight.ready.set()
+                threading.Thread(
+                    target=self._produce, daemon=True,
+                    args=(flight, response.response)
+                ).start()
+                return self._response(flight)
+            return wrapper
+        return decorator
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Streaming JSON array and NDJSON responses for large collections"""
+from flask import current_app, request
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+JSON_MIMETYPE = "application/json"
+
+
+def wants_ndjson():
+    """Return True if the client prefers NDJSON over a JSON array"""
+    best = request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE, NDJSON_MIMETYPE]
+    )
+    return best == NDJSON_MIMETYPE
+
+
+def iter_json_chunks(documents, transform=None, ndjson=False,
+                     batch_size=500, dumpb=None):
+    """Serialize documents lazily, yielding one bytes chunk per batch.
+
+    Args:
+        documents (iterable): documents, typically a pymongo cursor
+        transform (callable): maps a document to the object to serialize
+        ndjson (bool): one JSON document per line instead of a JSON array
+        batch_size (int): number of documents per yielded chunk
+        dumpb (callable): serializer to bytes, the app provider by default
+    """
+    dumpb = dumpb or current_app.json.dumpb
+    separator = b"\n" if ndjson else b","
+    batch = []
+    started = False
+    for document in documents:
+        if transform is not None:
+            document = transform(document)
+        batch.append(dumpb(document))
+        if len(batch) >= batch_size:
+            chunk = separator.join(batch)
+            if ndjson:
+                yield chunk + b"\n"
+            else:
+                yield (b"," if started else b"[") + chunk
+            started = True
+            batch = []
+    if ndjson:
+        if batch:
+            yield separator.join(batch) + b"\n"
+        return
+    if batch:
+        yield (b"," if started else b"[") + separator.join(batch) + b"]\n"
+    else:
+        yield b"]\n" if started else b"[]\n"
+
+
+def stream_documents(cursor, transform=None, status=200):
+    """Return a response streaming ``cursor`` as it yields documents.
+
+    Clients sending ``Accept: application/x-ndjson`` get one document per
+    line, everyone else a JSON array. The first batch is fetched before the
+    response starts, so query errors still raise in the route handler.
+
+    Args:
+        cursor: pymongo cursor (or any iterable of documents)
+        transform (callable): maps a document to its API representation
+        status (int): HTTP status code of the response
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 500)
+    if hasattr(cursor, 'batch_size'):
+        cursor = cursor.batch_size(batch_size)
+    ndjson = wants_ndjson()
+    chunks = iter_json_chunks(
+        cursor, transform, ndjson, batch_size, current_app.json.dumpb
+    )
+    # an empty NDJSON body has no chunk at all
+    first = next(chunks, b"")
+    logger = current_app.logger
+
+    def generate():
+        yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            # headers are already sent, all we can do is cut the body short
+            logger.error(f"Streaming response aborted: {e}")
+        finally:
+            if hasattr(cursor, 'close'):
+                cursor.close()
+
+    return current_app.response_class(
+        generate(), status=status,
+        mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE
+    )
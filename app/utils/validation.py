@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Declarative request payload validation.
+
+Schemas are compiled once at import and validate, coerce and normalize a
+payload in a single pass, so handlers reject bad input before any I/O.
+"""
+import re
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, g, jsonify, request
+
+MISSING_MSG = "Missing required fields"
+_MISSING = object()
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PHONE_STRIP_RE = re.compile(r"[\s\-().]")
+_PHONE_RE = re.compile(r"^\+?\d{7,15}$")
+
+
+class ValidationError(Exception):
+    """Raised by Schema.load, carries the error message of every field"""
+    def __init__(self, errors):
+        """Initializer/object constructor.
+        Args:
+            errors (dict): dotted field path -> error message
+        """
+        self.errors = errors
+        messages = list(errors.values())
+        if MISSING_MSG in messages:
+            self.msg = MISSING_MSG
+        else:
+            self.msg = messages[0] if messages else "Invalid payload"
+        super().__init__(self.msg)
+
+
+# Coercers take the raw value and return the normalized one,
+# raising ValueError with the message to report.
+def string(value):
+    """Stripped string"""
+    if not isinstance(value, str):
+        raise ValueError("Must be a string")
+    value = value.strip()
+    if not value:
+        raise ValueError("May not be blank")
+    return value
+
+
+def optional_string(value):
+    """Stripped string, blank allowed"""
+    if not isinstance(value, str):
+        raise ValueError("Must be a string")
+    return value.strip()
+
+
+def email(value):
+    """Lowercased email address"""
+    if not isinstance(value, str) or not _EMAIL_RE.match(value.strip()):
+        raise ValueError("Invalid email format")
+    return value.strip().lower()
+
+
+def phone(value):
+    """Phone number with spaces, dashes, dots and brackets removed"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        raise ValueError("Invalid phone number")
+    value = _PHONE_STRIP_RE.sub("", value)
+    if not _PHONE_RE.match(value):
+        raise ValueError("Invalid phone number")
+    return value
+
+
+def number(value):
+    """int or float, numeric strings are converted"""
+    if isinstance(value, bool):
+        raise ValueError("Must be a number")
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    raise ValueError("Must be a number")
+
+
+def boolean(value):
+    """bool, "true"/"false" strings are converted"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError("Must be a boolean")
+
+
+def date_string(value):
+    """Calendar date, kept as a normalized YYYY-MM-DD string"""
+    try:
+        return datetime.strptime(string(value)[:10], "%Y-%m-%d") \
+            .strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError("Invalid date, expected YYYY-MM-DD")
+
+
+def datetime_value(value):
+    """ISO 8601 string parsed to a naive UTC datetime"""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(
+                string(value).replace("Z", "+00:00")
+            )
+        except ValueError:
+            raise ValueError("Invalid datetime, expected ISO 8601")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def choice(*values):
+    """Return a coercer accepting one of ``values``"""
+    allowed = frozenset(values)
+    message = f"Must be one of: {', '.join(values)}"
+
+    def coerce(value):
+        if value not in allowed:
+            raise ValueError(message)
+        return value
+    return coerce
+
+
+def list_of(coerce):
+    """Return a coercer for a list whose items go through ``coerce``"""
+    def coerce_list(value):
+        if not isinstance(value, list):
+            raise ValueError("Must be a list")
+        return [coerce(item) for item in value]
+    return coerce_list
+
+
+class Field:
+    """A payload field"""
+    __slots__ = ("coerce", "required", "default", "key")
+
+    def __init__(self, coerce, required=True, default=_MISSING, key=None):
+        """Initializer/object constructor.
+        Args:
+            coerce (callable): coercer, or a nested Schema
+            required (bool): reject the payload when the field is absent
+            default: value used when an optional field is absent
+            key (str): key of the field in the output, the payload key
+                by default
+        """
+        self.coerce = coerce
+        self.required = required
+        self.default = default
+        self.key = key
+
+
+class Schema:
+    """Ordered set of Fields, compiled to a flat tuple once"""
+    def __init__(self, fields):
+        """Initializer/object constructor.
+        Args:
+            fields (dict): payload key -> Field
+        """
+        self._fields = tuple(
+            (name, field.key or name, field.coerce, field.required,
+             field.default, isinstance(field.coerce, Schema))
+            for name, field in fields.items()
+        )
+
+    def load(self, data):
+        """Validate and normalize ``data``, return the clean dict.
+
+        Unknown keys are dropped.
+        Raises:
+            ValidationError: listing every invalid or missing field
+        """
+        errors = {}
+        result = self._load(data, "", errors)
+        if errors:
+            raise ValidationError(errors)
+        return result
+
+    __call__ = load
+
+    def _load(self, data, prefix, errors):
+        if not isinstance(data, dict):
+            errors[prefix.rstrip(".") or "payload"] = "Must be an object"
+            return None
+        result = {}
+        for name, key, coerce, required, default, nested in self._fields:
+            value = data.get(name, _MISSING)
+            if value is _MISSING or value is None:
+                if required:
+                    errors[prefix + name] = MISSING_MSG
+                elif default is not _MISSING:
+                    result[key] = default() if callable(default) \
+                        else default
+                continue
+            if nested:
+                result[key] = coerce._load(value, f"{prefix}{name}.", errors)
+                continue
+            try:
+                result[key] = coerce(value)
+            except ValueError as e:
+                errors[prefix + name] = str(e)
+        return result
+
+
+def validate_json(schema):
+    """Decorator validating the JSON body of a route against ``schema``.
+
+    The clean payload is available as ``g.payload``. Invalid payloads get
+    a 400 with the first message and every field error, before the view
+    runs. CORS preflight requests are answered without validation.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method == 'OPTIONS':
+                return current_app.make_default_options_response()
+            data = request.get_json(silent=True)
+            if data is None:
+                return jsonify({"msg": "Missing JSON in request"}), 400
+            try:
+                g.payload = schema.load(data)
+            except ValidationError as e:
+                return jsonify({"msg": e.msg, "errors": e.errors}), 400
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
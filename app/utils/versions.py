@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Per-collection version counters shared by all workers through MongoDB"""
+import threading
+import time
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+
+class CollectionVersions:
+    """Version counters of the collections, one document per namespace.
+
+    Every write handler bumps the version of the namespace it changed.
+    Readers compare versions to know whether derived data (cached
+    responses, ETags) is still current. Versions read from MongoDB are
+    remembered for ``check_interval`` seconds, so a busy worker reads each
+    counter at most once per interval.
+    """
+    def __init__(self, collection, check_interval=1.0, logger=None):
+        """Initializer/object constructor.
+        Args:
+            collection (Collection): where the counters are stored
+            check_interval (float): seconds a version read is trusted
+            logger: logger for MongoDB failures
+        """
+        self.collection = collection
+        self.check_interval = check_interval
+        self.logger = logger
+        self._known = {}  # namespace -> (version, updated_at, checked_at)
+        self._lock = threading.Lock()
+
+    def _remember(self, namespace, doc):
+        entry = (
+            doc.get("version", 0) if doc else 0,
+            doc.get("updated_at") if doc else None,
+            time.monotonic()
+        )
+        with self._lock:
+            self._known[namespace] = entry
+        return entry
+
+    def _lookup(self, namespace, max_age):
+        entry = self._known.get(namespace)
+        if entry is not None and time.monotonic() - entry[2] < max_age:
+            return entry
+        try:
+            doc = self.collection.find_one({"_id": namespace})
+        except PyMongoError as e:
+            if entry is None:
+                raise
+            # keep using the last version seen, at worst slightly stale,
+            # and wait an interval before trying again rather than have
+            # every request wait for the server selection timeout
+            if self.logger:
+                self.logger.warning(
+                    f"Version check of {namespace} failed: {e}"
+                )
+            entry = entry[:2] + (time.monotonic(),)
+            with self._lock:
+                self._known[namespace] = entry
+            return entry
+        return self._remember(namespace, doc)
+
+    def get(self, namespace):
+        """Return the version of ``namespace``, at most check_interval old"""
+        return self._lookup(namespace, self.check_interval)[0]
+
+    def get_dated(self, namespace):
+        """Return (version, updated_at) of ``namespace``, at most
+        check_interval old
+        """
+        return self._lookup(namespace, self.check_interval)[:2]
+
+    def bump(self, namespace):
+        """Increment the version of ``namespace`` and return it"""
+        doc = self.collection.find_one_and_update(
+            {"_id": namespace},
+            {
+                "$inc": {"version": 1},
+                "$set": {"updated_at": datetime.now(timezone.utc)}
+            },
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return self._remember(namespace, doc)[0]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Write-behind buffer batching inserts into ``insert_many`` calls.
+
+Documents get their ObjectId client-side and are queued; a background
+thread flushes the queue every ``interval`` seconds or ``batch_size``
+documents, whichever comes first. The queue is bounded: when MongoDB
+cannot keep up, writers wait up to ``put_timeout`` seconds for room and
+then get BufferFull. The remaining documents are flushed at exit.
+
+A document may carry ``meta``, handed to ``on_written`` with the metas
+of its batch once it is written, for the bookkeeping that should follow
+the write without delaying the writer.
+"""
+import atexit
+import queue
+import threading
+import time
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+# duplicate key: already written by an attempt whose reply was lost
+DUPLICATE_KEY = 11000
+
+
+class BufferFull(Exception):
+    """The buffer stayed full for the whole put timeout"""
+
+
+class WriteBehind:
+    """Bounded queue of documents inserted in batches by one thread"""
+    def __init__(self, collection, interval=0.005, batch_size=100,
+                 max_pending=10000, put_timeout=1.0, retries=3,
+                 on_written=None, logger=None):
+        """Initializer/object constructor.
+        Args:
+            collection (Collection): collection written to
+            interval (float): seconds a document waits for its batch
+            batch_size (int): documents per insert_many
+            max_pending (int): documents queued at most
+            put_timeout (float): seconds a writer waits for room
+            retries (int): attempts of a failing batch
+            on_written (callable): called after a flush with the list of
+                the metas of the written documents, in insertion order
+            logger: logger of the failed flushes
+        """
+        self.collection = collection
+        self.interval = interval
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.on_written = on_written
+        self.logger = logger
+        self._meta = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "written": 0, "dropped": 0, "flushes": 0, "rejected": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0
+        }
+
+    def _start(self):
+        """Start the flusher at first use, after any fork of the worker"""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def insert(self, document, meta=None):
+        """Queue ``document`` and return its _id, set if missing.
+        Raises:
+            BufferFull: if no room was made within the put timeout
+        """
+        document.setdefault("_id", ObjectId())
+        if self._thread is None:
+            self._start()
+        if meta is not None:
+            self._meta[document["_id"]] = meta
+        try:
+            # a copy, the caller keeps using its document
+            self._queue.put(dict(document), timeout=self.put_timeout)
+        except queue.Full:
+            self._meta.pop(document["_id"], None)
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            raise BufferFull("Write-behind buffer is full")
+        return document["_id"]
+
+    def _next_batch(self):
+        """Wait for a document, then gather more for up to ``interval``"""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        started = time.monotonic()
+        pending = batch
+        for attempt in range(self.retries):
+            try:
+                self.collection.insert_many(pending, ordered=False)
+                pending = []
+                break
+            except BulkWriteError as e:
+                failed = {
+                    error["index"] for error in e.details["writeErrors"]
+                    if error["code"] != DUPLICATE_KEY
+                }
+                pending = [
+                    doc for index, doc in enumerate(pending)
+                    if index in failed
+                ]
+                if not pending:
+                    break
+            except PyMongoError as e:
+                if self.logger:
+                    self.logger.warning(f"Write-behind flush failed: {e}")
+            if attempt + 1 < self.retries:
+                time.sleep(min(2 ** attempt * 0.1, 2))
+        if pending and self.logger:
+            self.logger.error(
+                f"Write-behind dropped {len(pending)} documents"
+            )
+        elapsed = (time.monotonic() - started) * 1000
+        with self._stats_lock:
+            stats = self._stats
+            stats["written"] += len(batch) - len(pending)
+            stats["dropped"] += len(pending)
+            stats["flushes"] += 1
+            stats["last_flush_ms"] = elapsed
+            stats["max_flush_ms"] = max(stats["max_flush_ms"], elapsed)
+            stats["total_flush_ms"] += elapsed
+        self._written(batch, pending)
+
+    def _written(self, batch, dropped):
+        """Hand the metas of the written documents of ``batch`` over"""
+        dropped = {id(doc) for doc in dropped}
+        metas = []
+        for doc in batch:
+            meta = self._meta.pop(doc["_id"], None)
+            if meta is not None and id(doc) not in dropped:
+                metas.append(meta)
+        if metas and self.on_written is not None:
+            try:
+                self.on_written(metas)
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Write-behind callback failed: {e}")
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._stopping.is_set():
+                return
+
+    def close(self, timeout=10):
+        """Flush every queued document and stop the flusher"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # what a stopped or stuck flusher left behind
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._flush(batch)
+
+    def stats(self):
+        """Counters and flush latency, in milliseconds"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = total / stats["flushes"] \
+            if stats["flushes"] else 0.0
+        stats["pending"] = self._queue.qsize()
+        return stats
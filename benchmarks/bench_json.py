@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark jsonify of tenant list payloads.
+
+Compares Flask's default JSON provider (with the per-row ``str()`` on
+``_id`` the routes used to do) against MongoJSONProvider serializing
+ObjectId and datetime natively.
+
+Usage: python -m benchmarks.bench_json [rows]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import MongoJSONProvider
+
+
+def make_tenants(rows):
+    """Return ``rows`` tenant API dicts shaped like get_all_tenants"""
+    start = datetime(2024, 1, 1)
+    return [{
+        "tenantId": ObjectId(),
+        "dateCreated": start + timedelta(minutes=i),
+        "lastUpdated": start + timedelta(minutes=i, seconds=30),
+        "fname": f"First{i}",
+        "lname": f"Last{i}",
+        "sex": "F" if i % 2 else "M",
+        "DoB": "1990-01-01",
+        "phone": f"080{i:08d}",
+        "email": f"tenant{i}@example.com",
+        "address": f"{i} Main Street",
+        "rentageFee": 1000 + i,
+        "rentagePaid": 500,
+        "datePaid": "2024-01-15",
+        "rantageStarted": "2024-01-01",
+        "rantageExpires": "2024-12-31",
+        "rentageArrears": "0",
+        "emergencyContactName": f"Contact{i}",
+        "emergencyContactPhone": f"070{i:08d}",
+        "emergencyContactAddress": f"{i} Side Street",
+        "leaseAgreementDetails": "http://example.com/lease.pdf"
+    } for i in range(rows)]
+
+
+def bench(label, app, rows, number):
+    """Time ``app.json.response`` over ``rows`` and print the result"""
+    with app.app_context():
+        seconds = min(timeit.repeat(lambda: app.json.response(rows),
+                                    number=number, repeat=5)) / number
+        size = len(app.json.response(rows).get_data())
+    print(f"{label:<28} {seconds * 1000:8.2f} ms/response {size:>10} bytes")
+    return seconds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tenants = make_tenants(count)
+
+    default_app = Flask(__name__)
+    default_app.json = DefaultJSONProvider(default_app)
+    mongo_app = Flask(__name__)
+    mongo_app.json = MongoJSONProvider(mongo_app)
+
+    # the default provider cannot encode ObjectId, routes did str() per row
+    stringified = [dict(row, tenantId=str(row["tenantId"])) for row in tenants]
+
+    print(f"{count} tenants")
+    baseline = bench("jsonify (default provider)", default_app,
+                     stringified, 5)
+    fast = bench("MongoJSONProvider", mongo_app, tenants, 5)
+    print(f"speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
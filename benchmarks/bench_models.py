@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark the per-row cost of the tenant list mapping.
+
+Compares the hand written document -> API dict comprehension the routes
+used to carry with the compiled FieldMap serializer, and the memory of
+model instances with and without ``__slots__``.
+
+Usage: python -m benchmarks.bench_models [rows]
+"""
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from bson.objectid import ObjectId
+from werkzeug.security import generate_password_hash
+from app.models.tenant import Tenant
+
+
+def make_docs(rows):
+    """Return ``rows`` tenant documents as stored by create_tenant"""
+    password = generate_password_hash("password123")
+    return [{
+        "_id": ObjectId(),
+        "date_created": datetime(2024, 1, 1),
+        "date_updated": datetime(2024, 1, 2),
+        "name": {"fname": f"First{i}", "lname": f"Last{i}"},
+        "password": password,
+        "dob": "1990-01-01",
+        "sex": "F",
+        "contact_details": {
+            "email": f"tenant{i}@example.com", "phone": f"080{i:08d}",
+            "address": f"{i} Main Street"
+        },
+        "emergency_contact": {
+            "name": f"Contact{i}", "phone": f"070{i:08d}",
+            "address": f"{i} Side Street"
+        },
+        "tenancy_info": {
+            "fees": 1000, "paid": 500, "datePaid": "2024-01-15",
+            "start": "2024-01-01", "expires": "2024-12-31", "arrears": "0"
+        },
+        "lease_agreement_details": "http://example.com/lease.pdf",
+        "active": True,
+        "role": "tenant"
+    } for i in range(rows)]
+
+
+def hand_written(tenant):
+    """The mapping get_all_tenants used to inline"""
+    return {
+        "tenantId": str(tenant['_id']),
+        "dateCreated": tenant['date_created'],
+        "lastUpdated": tenant['date_updated'],
+        "fname": tenant['name']['fname'],
+        "lname": tenant['name']['lname'],
+        "sex": tenant['sex'],
+        "DoB": tenant['dob'],
+        "phone": tenant['contact_details']['phone'],
+        "email": tenant['contact_details']['email'],
+        "address": tenant['contact_details']['address'],
+        "rentageFee": tenant['tenancy_info']['fees'],
+        "rentagePaid": tenant['tenancy_info']['paid'],
+        "datePaid": tenant['tenancy_info']['datePaid'],
+        "rantageStarted": tenant['tenancy_info']['start'],
+        "rantageExpires": tenant['tenancy_info']['expires'],
+        "rentageArrears": tenant['tenancy_info']['arrears'],
+        "emergencyContactName": tenant['emergency_contact']['name'],
+        "emergencyContactPhone": tenant['emergency_contact']['phone'],
+        "emergencyContactAddress": tenant['emergency_contact']['address'],
+        "leaseAgreementDetails": tenant['lease_agreement_details']
+    }
+
+
+class PlainTenant:
+    """Tenant as it was before __slots__, attributes in __dict__"""
+    def __init__(self, doc):
+        for key, value in doc.items():
+            setattr(self, key, value)
+
+
+def per_row(label, function, docs):
+    seconds = min(timeit.repeat(
+        lambda: [function(doc) for doc in docs], number=3, repeat=5
+    )) / 3
+    print(f"{label:<30} {seconds / len(docs) * 1e6:6.2f} us/row")
+
+
+def memory(label, factory, docs):
+    tracemalloc.start()
+    instances = [factory(doc) for doc in docs]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {size / len(instances):6.0f} bytes/instance")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    docs = make_docs(count)
+    print(f"{count} tenants")
+    per_row("hand written dict", hand_written, docs)
+    per_row("compiled serializer", Tenant.serializer(), docs)
+    per_row("Tenant.from_doc().to_api()",
+            lambda doc: Tenant.from_doc(doc).to_api(), docs)
+    memory("plain instance", PlainTenant, docs)
+    memory("__slots__ instance", Tenant.from_doc, docs)
+
+
+if __name__ == "__main__":
+    main()
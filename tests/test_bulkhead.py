@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+test_bulkhead.py
+
+This module contains unit tests for the admission control of the route
+groups.
+
+Classes:
+    BulkheadTestCase: Unit test case for Bulkhead and Bulkheads.
+"""
+
+import threading
+import unittest
+from flask import Flask, jsonify
+from app.utils.bulkhead import Bulkhead, Bulkheads, parse_bulkhead
+
+
+class BulkheadTestCase(unittest.TestCase):
+    """
+    Unit test case for Bulkhead and Bulkheads.
+
+    Methods:
+        test_parse: "limit:queue" specifications are parsed.
+        test_queue: A queued request takes the slot released in time.
+        test_shed: A saturated group answers 503 with Retry-After.
+        test_streamed: A streamed response holds its slot until closed.
+    """
+
+    def test_parse(self):
+        """"limit:queue" specifications are parsed."""
+        self.assertEqual(parse_bulkhead("4:8"), (4, 8))
+        self.assertEqual(parse_bulkhead("4"), (4, 0))
+
+    def test_queue(self):
+        """A queued request takes the slot released in time."""
+        bulkhead = Bulkhead(1, queue=1, timeout=5)
+        self.assertTrue(bulkhead.acquire())
+        threading.Timer(0.05, bulkhead.release).start()
+        self.assertTrue(bulkhead.acquire())
+        self.assertEqual(bulkhead.stats()["active"], 1)
+        # no slot and no room in the queue
+        bulkhead.queue = 0
+        self.assertFalse(bulkhead.acquire())
+        self.assertEqual(bulkhead.stats()["shed"], 1)
+
+    def test_shed(self):
+        """A saturated group answers 503 with Retry-After."""
+        bulkheads = Bulkheads({"writes": (1, 0)})
+        app = Flask(__name__)
+
+        @app.route('/items', methods=['POST'])
+        @bulkheads.guard("writes")
+        def create_item():
+            return jsonify({"msg": "created"}), 201
+
+        client = app.test_client()
+        self.assertEqual(client.post('/items').status_code, 201)
+        bulkheads.groups["writes"].acquire()
+        response = client.post('/items')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_streamed(self):
+        """A streamed response holds its slot until closed."""
+        bulkheads = Bulkheads({"bulk_reads": (1, 0)})
+        app = Flask(__name__)
+
+        @app.route('/items')
+        @bulkheads.guard("bulk_reads")
+        def list_items():
+            return app.response_class(iter([b"[", b"]"]))
+
+        client = app.test_client()
+        response = client.get('/items', buffered=False)
+        self.assertEqual(bulkheads.stats()["bulk_reads"]["active"], 1)
+        self.assertEqual(client.get('/items').status_code, 503)
+        response.close()
+        self.assertEqual(bulkheads.stats()["bulk_reads"]["active"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
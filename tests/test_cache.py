@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+test_cache.py
+
+This module contains unit tests for the response cache of the catalog
+routes.
+
+Classes:
+    ResponseCacheTestCase: Unit test case for ResponseCache.
+"""
+
+import threading
+import unittest
+from flask import Flask, jsonify, request
+from app.utils.cache import ResponseCache
+
+
+class MemoryVersions:
+    """CollectionVersions stand-in keeping the counters in a dict"""
+    def __init__(self):
+        self.counters = {}
+
+    def get(self, namespace):
+        return self.counters.get(namespace, 0)
+
+    def bump(self, namespace):
+        self.counters[namespace] = self.get(namespace) + 1
+        return self.counters[namespace]
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """
+    Unit test case for ResponseCache.
+
+    Methods:
+        setUp: Create an app with a cached list route and a write route.
+        test_hit: A repeated GET is answered from the cache.
+        test_query_parameters: Query parameters are part of the key.
+        test_invalidation: A successful write invalidates the namespace.
+        test_stale_if_error: The last good response survives failures.
+        test_stale_while_revalidate: Expired entries are served while
+            rebuilt in the background.
+    """
+
+    def setUp(self):
+        """Create an app with a cached list route and a write route."""
+        self.calls = 0
+        self.fail = False
+        self.versions = MemoryVersions()
+        cache = ResponseCache(self.versions)
+        # every entry is expired at once, only the stale policy serves it
+        stale_cache = ResponseCache(self.versions, ttl=0, stale_ttl=60)
+        self.stale_cache = stale_cache
+        app = Flask(__name__)
+
+        @app.route('/items', methods=['GET'])
+        @cache.cached("items")
+        def list_items():
+            self.calls += 1
+            return jsonify({"calls": self.calls, "q": request.args}), 200
+
+        @app.route('/items', methods=['POST'])
+        @cache.invalidates("items")
+        def create_item():
+            if request.args.get("fail"):
+                return jsonify({"error": "failed"}), 500
+            return jsonify({"msg": "created"}), 201
+
+        @app.route('/catalog')
+        @stale_cache.cached(
+            "catalog", stale_while_revalidate=30, stale_if_error=60
+        )
+        def list_catalog():
+            self.calls += 1
+            if self.fail:
+                return jsonify({"error": "database down"}), 500
+            return jsonify({"calls": self.calls}), 200
+
+        @app.route('/catalog-strict')
+        @stale_cache.cached("catalog", stale_if_error=60)
+        def list_catalog_strict():
+            self.calls += 1
+            if self.fail:
+                return jsonify({"error": "database down"}), 500
+            return jsonify({"calls": self.calls}), 200
+
+        self.client = app.test_client()
+
+    def test_hit(self):
+        """A repeated GET is answered from the cache."""
+        first = self.client.get('/items')
+        second = self.client.get('/items')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(self.calls, 1)
+
+    def test_query_parameters(self):
+        """Query parameters are part of the key, not their order."""
+        self.client.get('/items?fields=a&sort=b')
+        self.client.get('/items?sort=b&fields=a')
+        self.client.get('/items?fields=b')
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidation(self):
+        """A successful write invalidates the namespace, a failed one not."""
+        self.client.get('/items')
+        self.client.post('/items?fail=1')
+        self.assertEqual(self.client.get('/items').get_json()["calls"], 1)
+        self.client.post('/items')
+        self.assertEqual(self.versions.get("items"), 1)
+        self.assertEqual(self.client.get('/items').get_json()["calls"], 2)
+
+    def test_stale_if_error(self):
+        """The last good response is served, with a warning, on a 5xx."""
+        self.client.get('/catalog-strict')
+        self.fail = True
+        response = self.client.get('/catalog-strict')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"calls": 1})
+        self.assertEqual(response.headers['X-Cache'], 'STALE')
+        self.assertIn('111', response.headers['Warning'])
+        self.assertIn('Age', response.headers)
+
+    def test_stale_while_revalidate(self):
+        """An expired entry is served while rebuilt in the background."""
+        self.client.get('/catalog')
+        response = self.client.get('/catalog')
+        self.assertEqual(response.headers['X-Cache'], 'STALE')
+        self.assertIn('110', response.headers['Warning'])
+        self.assertEqual(response.get_json(), {"calls": 1})
+        for _ in range(500):
+            if self.calls == 2 and not self.stale_cache._refreshing:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(self.client.get('/catalog').get_json(), {"calls": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+test_campaign_sender.py
+
+This module contains unit tests for the email campaign sender.
+
+Classes:
+    CampaignSenderTestCase: Unit test case for the batched campaign sends.
+"""
+
+import smtplib
+import threading
+import unittest
+from flask import Flask
+from flask_mail import Mail
+from app.utils.campaign_sender import CampaignSender
+
+
+class FakeConnection:
+    """SMTP connection stand-in refusing some addresses"""
+    def __init__(self, mail):
+        self.mail = mail
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message):
+        email = message.recipients[0]
+        if email in self.mail.lost:
+            raise smtplib.SMTPServerDisconnected("Connection lost")
+        if email in self.mail.refused:
+            raise smtplib.SMTPRecipientsRefused({email: (550, b"No")})
+        self.mail.sent.append(email)
+
+
+class FakeMail:
+    """Flask-Mail stand-in counting the connections opened"""
+    def __init__(self, refused=(), lost=()):
+        self.refused = set(refused)
+        self.lost = set(lost)
+        self.sent = []
+        self.connections = 0
+
+    def connect(self):
+        self.connections += 1
+        return FakeConnection(self)
+
+
+class FakeCampaigns:
+    """Campaigns stand-in keeping the progress in memory"""
+    def __init__(self):
+        self.sent = 0
+        self.failures = []
+        self.status = "pending"
+        self.error = None
+        self.taken_over = False
+
+    def start(self, campaign):
+        self.status = "running"
+        return True
+
+    def progress(self, campaign, sent, failures, last_tenant_id):
+        self.sent += sent
+        self.failures.extend(failures)
+        self.last_tenant_id = last_tenant_id
+        return not self.taken_over
+
+    def finish(self, campaign, seconds, error=None):
+        self.status = "failed" if error else "done"
+        self.error = error
+
+
+CAMPAIGN = {"_id": "c1", "runner": "r1"}
+
+
+def recipients(count):
+    return [(i, f"t{i}@example.com") for i in range(count)]
+
+
+class CampaignSenderTestCase(unittest.TestCase):
+    """
+    Unit test case for the batched campaign sends.
+
+    Methods:
+        setUp: Push an app context with a default sender.
+        tearDown: Pop the app context.
+        test_batches: One connection per batch, refused recipients skipped.
+        test_refused_first: A refused first recipient fails alone.
+        test_shared_rate: Concurrent campaigns share the rate.
+        test_connection_lost: A batch that cannot send stops the campaign.
+        test_taken_over: A superseded sender stops without closing.
+    """
+
+    def setUp(self):
+        """Push an app context with a default sender."""
+        app = Flask(__name__)
+        app.config['MAIL_DEFAULT_SENDER'] = 'admin@example.com'
+        Mail(app)
+        self.context = app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        """Pop the app context."""
+        self.context.pop()
+
+    def test_batches(self):
+        """One connection per batch, refused recipients skipped."""
+        mail = FakeMail(refused={"t3@example.com"})
+        campaigns = FakeCampaigns()
+        sleeps = []
+        sender = CampaignSender(mail, campaigns, batch_size=2, rate=1000,
+                                sleep=sleeps.append)
+        sender.run(CAMPAIGN, "Water", "Off", iter(recipients(5)))
+        self.assertEqual(mail.connections, 3)
+        self.assertEqual(campaigns.sent, 4)
+        self.assertEqual(campaigns.failures[0]["tenant_id"], 3)
+        self.assertEqual(campaigns.status, "done")
+        # paced at 1ms per email, time does not pass in the fake sleep
+        self.assertTrue(sleeps)
+        self.assertLessEqual(max(sleeps), 0.005)
+
+    def test_refused_first(self):
+        """A refused recipient first in its batch fails alone, the batch
+        and the campaign go on."""
+        mail = FakeMail(refused={"t0@example.com", "t2@example.com"})
+        campaigns = FakeCampaigns()
+        sender = CampaignSender(mail, campaigns, batch_size=2, rate=0)
+        sender.run(CAMPAIGN, "Water", "Off", recipients(5))
+        self.assertEqual(
+            mail.sent, ["t1@example.com", "t3@example.com", "t4@example.com"]
+        )
+        self.assertEqual(
+            [failure["tenant_id"] for failure in campaigns.failures], [0, 2]
+        )
+        self.assertEqual(campaigns.status, "done")
+
+    def test_shared_rate(self):
+        """Campaigns sending at once reserve distinct send slots."""
+        sleeps = []
+        sender = CampaignSender(FakeMail(), FakeCampaigns(), rate=10,
+                                sleep=sleeps.append)
+        threads = [
+            threading.Thread(target=lambda: [sender._pace() for _ in range(5)])
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # the first slot is now, the others 0.1s apart over both threads
+        self.assertEqual(len(sleeps), 9)
+        self.assertGreater(max(sleeps), 0.8)
+
+    def test_connection_lost(self):
+        """A connection lost mid-batch fails the rest of the batch, a batch
+        that cannot send stops the campaign."""
+        mail = FakeMail(lost={"t1@example.com", "t2@example.com"})
+        campaigns = FakeCampaigns()
+        sender = CampaignSender(mail, campaigns, batch_size=2, rate=0)
+        sender.run(CAMPAIGN, "Water", "Off", recipients(6))
+        self.assertEqual(mail.sent, ["t0@example.com"])
+        self.assertEqual(
+            [failure["tenant_id"] for failure in campaigns.failures],
+            [1, 2, 3]
+        )
+        self.assertEqual(campaigns.status, "failed")
+        self.assertEqual(campaigns.error, "Connection lost")
+
+    def test_taken_over(self):
+        """A superseded sender stops after its batch, without closing."""
+        mail = FakeMail()
+        campaigns = FakeCampaigns()
+        campaigns.taken_over = True
+        sender = CampaignSender(mail, campaigns, batch_size=2, rate=0)
+        sender.run(CAMPAIGN, "Water", "Off", recipients(6))
+        self.assertEqual(len(mail.sent), 2)
+        self.assertEqual(campaigns.last_tenant_id, 1)
+        self.assertEqual(campaigns.status, "running")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+test_communication.py
+
+This module contains unit tests for the chat rooms.
+
+Classes:
+    RoomsTestCase: Unit test case for the room membership helpers.
+    HistoryTestCase: Unit test case for the paged room history.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+from app.models.communication import (
+    CommunicationModel, GENERAL_ROOM, ADMINS_ROOM, user_rooms, can_access
+)
+
+
+class ListCursor:
+    """Cursor stand-in sorting and limiting a list"""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys, direction=None):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for key, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+def matches(doc, query):
+    """Evaluate the equality, $in, $lt, $gt and $or of a query"""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        if "$in" in condition and value not in condition["$in"]:
+            return False
+        if "$lt" in condition and not value < condition["$lt"]:
+            return False
+        if "$gt" in condition and not value > condition["$gt"]:
+            return False
+    return True
+
+
+class MessagesCollection:
+    """Collection stand-in filtering on room_id and timestamp bounds"""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def create_index(self, keys, **kwargs):
+        pass
+
+    def find(self, query):
+        return ListCursor([doc for doc in self.docs if matches(doc, query)])
+
+    def delete_many(self, query):
+        ids = query["_id"]["$in"]
+        self.docs = [doc for doc in self.docs if doc["_id"] not in ids]
+
+
+class MemoryArchive:
+    """MessageArchive stand-in keeping the archived messages in a list"""
+    def __init__(self):
+        self.messages = []
+
+    def add_many(self, messages):
+        self.messages.extend(messages)
+
+
+class RoomsTestCase(unittest.TestCase):
+    """
+    Unit test case for the room membership helpers.
+
+    Methods:
+        test_tenant_rooms: A tenant joins its thread and property room.
+        test_admin_rooms: Admins reach every thread, nothing else.
+    """
+
+    def test_tenant_rooms(self):
+        """A tenant joins its thread and property room."""
+        rooms = user_rooms('tenant', 'u1', 'p1')
+        self.assertEqual(rooms, [GENERAL_ROOM, 'tenant:u1', 'property:p1'])
+        self.assertEqual(user_rooms('tenant', 'u1'), [
+            GENERAL_ROOM, 'tenant:u1'
+        ])
+        self.assertTrue(can_access('tenant', rooms, 'property:p1'))
+        self.assertFalse(can_access('tenant', rooms, 'tenant:u2'))
+
+    def test_admin_rooms(self):
+        """Admins reach every thread, nothing else."""
+        rooms = user_rooms('admin', 'a1')
+        self.assertEqual(rooms, [GENERAL_ROOM, ADMINS_ROOM])
+        self.assertTrue(can_access('admin', rooms, 'tenant:u2'))
+        self.assertTrue(can_access('admin', rooms, 'property:p2'))
+        self.assertFalse(can_access('admin', rooms, 'other'))
+
+
+class HistoryTestCase(unittest.TestCase):
+    """
+    Unit test case for the paged room history.
+
+    Methods:
+        setUp: Store ten messages in a tenant thread, one in another room.
+        test_latest: The last messages come first, in posting order.
+        test_before_since: Pages scroll back and catch up exclusively.
+        test_same_timestamp: Cursors with an _id skip no tied message.
+        test_archive_before: Old messages move to the archive in batches.
+        test_archive_lease_lost: Archiving stops once the lease is lost.
+    """
+
+    def setUp(self):
+        """Store ten messages in a tenant thread, one in another room."""
+        self.start = datetime(2024, 1, 1)
+        docs = [
+            {"_id": i, "room_id": "tenant:u1", "message": str(i),
+             "timestamp": self.start + timedelta(minutes=i)}
+            for i in range(10)
+        ]
+        docs.append({"_id": 10, "room_id": "tenant:u2", "message": "other",
+                     "timestamp": self.start})
+        self.collection = MessagesCollection(docs)
+        self.model = CommunicationModel(self.collection)
+
+    def messages(self, **kwargs):
+        return [doc["message"] for doc in self.model.page(
+            "tenant:u1", **kwargs
+        )]
+
+    def test_latest(self):
+        """The last messages come first, in posting order."""
+        self.assertEqual(self.messages(limit=3), ["7", "8", "9"])
+
+    def test_before_since(self):
+        """Pages scroll back and catch up, bounds excluded."""
+        seventh = self.start + timedelta(minutes=7)
+        self.assertEqual(
+            self.messages(before=seventh, limit=3), ["4", "5", "6"]
+        )
+        self.assertEqual(
+            self.messages(since=seventh, limit=5), ["8", "9"]
+        )
+
+    def test_same_timestamp(self):
+        """Messages sharing the boundary timestamp are not skipped when the
+        cursor carries the _id."""
+        tied = self.start + timedelta(minutes=5)
+        for doc in self.collection.docs:
+            if 4 <= doc["_id"] <= 6:
+                doc["timestamp"] = tied
+        page = self.model.page("tenant:u1", limit=4)
+        self.assertEqual([doc["message"] for doc in page],
+                         ["6", "7", "8", "9"])
+        self.assertEqual(self.messages(
+            before=page[0]["timestamp"], before_id=page[0]["_id"], limit=3
+        ), ["3", "4", "5"])
+        self.assertEqual(self.messages(
+            since=tied, since_id=4, limit=3
+        ), ["5", "6", "7"])
+
+    def test_archive_before(self):
+        """Old messages move to the archive in batches, oldest first."""
+        archive = MemoryArchive()
+        cutoff = self.start + timedelta(minutes=3)
+        moved = self.model.archive_before(cutoff, archive, batch_size=2)
+        self.assertEqual(moved, 4)
+        self.assertEqual(
+            [doc["message"] for doc in archive.messages],
+            ["0", "other", "1", "2"]
+        )
+        self.assertEqual(self.messages(limit=20), [
+            str(i) for i in range(3, 10)
+        ])
+
+    def test_archive_lease_lost(self):
+        """Archiving stops before the batch following a failed renewal."""
+        archive = MemoryArchive()
+        renewals = iter([True, False])
+        cutoff = self.start + timedelta(minutes=5)
+        moved = self.model.archive_before(
+            cutoff, archive, batch_size=2, renew=lambda: next(renewals)
+        )
+        self.assertEqual(moved, 2)
+        self.assertEqual(len(archive.messages), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+test_compression.py
+
+This module contains unit tests for the negotiated response compression.
+
+Classes:
+    CompressionTestCase: Unit test case for init_compression.
+"""
+
+import gzip
+import unittest
+from flask import Flask
+from app.utils import compression
+from app.utils.compression import init_compression
+
+BODY = b'{"n": "' + b"x" * 2000 + b'"}'
+
+
+class CompressionTestCase(unittest.TestCase):
+    """
+    Unit test case for init_compression.
+
+    Methods:
+        setUp: Create an app with plain and streamed JSON routes.
+        get: GET a route with an Accept-Encoding header.
+        test_gzip: gzip is used when it is the only accepted encoding.
+        test_brotli: brotli wins over gzip unless it has a lower q.
+        test_identity: Bodies are left as is without Accept-Encoding.
+        test_min_size: Bodies under COMPRESS_MIN_SIZE are left as is.
+        test_streamed: Streamed bodies are compressed chunk by chunk.
+        test_streamed_small: A small streamed body is sent as is.
+    """
+
+    def setUp(self):
+        """Create an app with plain and streamed JSON routes."""
+        app = Flask(__name__)
+        app.config['COMPRESS_MIN_SIZE'] = 500
+        init_compression(app)
+        self.chunks = []
+
+        @app.route('/plain')
+        def plain():
+            return app.response_class(BODY, mimetype='application/json')
+
+        @app.route('/small')
+        def small():
+            return app.response_class(b'{}', mimetype='application/json')
+
+        @app.route('/streamed')
+        def streamed():
+            return app.response_class(
+                iter(self.chunks), mimetype='application/json'
+            )
+
+        self.client = app.test_client()
+
+    def get(self, path, encoding=None):
+        """GET ``path`` with an Accept-Encoding header if set."""
+        headers = {"Accept-Encoding": encoding} if encoding else {}
+        return self.client.get(path, headers=headers)
+
+    def test_gzip(self):
+        """gzip is used when it is the only accepted encoding."""
+        response = self.get('/plain', 'gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(gzip.decompress(response.data), BODY)
+
+    @unittest.skipIf(compression.brotli is None, "brotli not installed")
+    def test_brotli(self):
+        """brotli wins over gzip unless it has a lower q."""
+        response = self.get('/plain', 'gzip, br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.data), BODY)
+        response = self.get('/plain', 'gzip, br;q=0.5')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+    def test_identity(self):
+        """Bodies are left as is without Accept-Encoding, Vary is set."""
+        response = self.get('/plain')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(response.data, BODY)
+
+    def test_min_size(self):
+        """Bodies under COMPRESS_MIN_SIZE are left as is."""
+        response = self.get('/small', 'gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, b'{}')
+
+    def test_streamed(self):
+        """Streamed bodies are compressed, a small first chunk included."""
+        self.chunks = [b'[', BODY, b',', BODY, b']']
+        response = self.get('/streamed', 'gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(
+            gzip.decompress(response.data), b''.join(self.chunks)
+        )
+
+    def test_streamed_small(self):
+        """A streamed body of one small chunk is sent as is."""
+        self.chunks = [b'[]']
+        response = self.get('/streamed', 'gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, b'[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
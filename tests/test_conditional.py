@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+test_conditional.py
+
+This module contains unit tests for the ETag/Last-Modified validators and
+the 304 Not Modified responses of the polled routes.
+
+Classes:
+    ConditionalTestCase: Unit test case for the conditional decorator.
+    DetailTestCase: Unit test case for the document ETags of detail routes.
+    IfMatchTestCase: Unit test case for the If-Match version parsing.
+    VersionsTestCase: Unit test case for the version reads.
+"""
+
+import unittest
+from datetime import datetime
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+from pymongo.errors import PyMongoError
+from app.utils.compression import init_compression
+from app.utils.conditional import (
+    conditional, document_etag, expected_version
+)
+from app.utils.versions import CollectionVersions
+
+
+class MemoryVersions:
+    """CollectionVersions stand-in keeping the counters in a dict"""
+    def __init__(self):
+        self.counters = {}
+
+    def get_dated(self, namespace):
+        return self.counters.get(namespace, (0, None))
+
+    def bump(self, namespace):
+        version = self.get_dated(namespace)[0] + 1
+        self.counters[namespace] = (version, datetime(2024, 5, 1, 12, 0, 0))
+
+
+class ConditionalTestCase(unittest.TestCase):
+    """
+    Unit test case for the conditional decorator.
+
+    Methods:
+        setUp: Create an app with a conditional list route.
+        test_etag: 200 responses carry the validators.
+        test_not_modified: A matching If-None-Match skips the view.
+        test_modified: A version bump changes the ETag.
+        test_representations: ?fields= changes the ETag.
+    """
+
+    def setUp(self):
+        """Create an app with a conditional list route."""
+        self.calls = 0
+        app = Flask(__name__)
+        app.versions = MemoryVersions()
+        app.versions.bump("items")
+        self.versions = app.versions
+
+        @app.route('/items')
+        @conditional("items")
+        def list_items():
+            self.calls += 1
+            return jsonify([{"n": 1}]), 200
+
+        self.client = app.test_client()
+
+    def test_etag(self):
+        """200 responses carry the validators."""
+        response = self.client.get('/items')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['ETag'].startswith('W/"'))
+        self.assertEqual(
+            response.headers['Last-Modified'],
+            'Wed, 01 May 2024 12:00:00 GMT'
+        )
+
+    def test_not_modified(self):
+        """A matching If-None-Match or If-Modified-Since skips the view."""
+        etag = self.client.get('/items').headers['ETag']
+        response = self.client.get('/items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        response = self.client.get('/items', headers={
+            'If-Modified-Since': 'Wed, 01 May 2024 12:00:00 GMT'
+        })
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+    def test_modified(self):
+        """A version bump changes the ETag."""
+        etag = self.client.get('/items').headers['ETag']
+        self.versions.bump("items")
+        response = self.client.get('/items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_representations(self):
+        """?fields= selects another representation, with its own ETag."""
+        etag = self.client.get('/items').headers['ETag']
+        response = self.client.get(
+            '/items?fields=n', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class DocumentCollection:
+    """Collection stand-in holding one versioned document, failing once
+    ``down`` is set"""
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+
+    def find_one(self, query, projection=None):
+        self.calls += 1
+        if self.down:
+            raise PyMongoError("down")
+        return {"version": 3}
+
+
+class DetailTestCase(unittest.TestCase):
+    """
+    Unit test case for the document ETags of detail routes.
+
+    Methods:
+        setUp: Create an app with a compressed conditional detail route.
+        test_encoded: Encoded bodies get their own strong ETag.
+        test_identity: Bodies sent as is keep the bare version.
+    """
+
+    def setUp(self):
+        """Create an app with a compressed conditional detail route."""
+        app = Flask(__name__)
+        app.versions = MemoryVersions()
+        init_compression(app)
+        collection = DocumentCollection()
+
+        @app.route('/items/<item_id>')
+        @conditional("items", collection, "item_id")
+        def get_item(item_id):
+            return jsonify({"n": "x" * 2000}), 200
+
+        self.client = app.test_client()
+        self.path = f'/items/{ObjectId()}'
+
+    def test_encoded(self):
+        """An encoded body gets the coding appended to its strong ETag,
+        which revalidates to a 304 carrying it."""
+        headers = {'Accept-Encoding': 'gzip'}
+        response = self.client.get(self.path, headers=headers)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['ETag'], '"3-gzip"')
+        response = self.client.get(self.path, headers=dict(
+            headers, **{'If-None-Match': '"3-gzip"'}
+        ))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], '"3-gzip"')
+
+    def test_identity(self):
+        """A body sent as is keeps the bare version, If-Match reads it."""
+        response = self.client.get(self.path)
+        self.assertEqual(response.headers['ETag'], '"3"')
+        response = self.client.get(
+            self.path, headers={'If-None-Match': '"3"'}
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class IfMatchTestCase(unittest.TestCase):
+    """
+    Unit test case for the If-Match version parsing.
+
+    Methods:
+        test_expected_version: Versions are read from strong tags.
+    """
+
+    def test_expected_version(self):
+        """Versions are read from strong tags, ?fields= suffix ignored."""
+        app = Flask(__name__)
+        cases = [
+            ({}, None),
+            ({'If-Match': '*'}, None),
+            ({'If-Match': '"3"'}, 3),
+            ({'If-Match': '"7-1a2b3c4d"'}, 7),
+            ({'If-Match': '"7-gzip"'}, 7),
+            ({'If-Match': 'W/"3"'}, -1),
+            ({'If-Match': '"abc"'}, -1),
+        ]
+        for headers, expected in cases:
+            with app.test_request_context('/items/1', headers=headers):
+                self.assertEqual(expected_version(), expected, headers)
+        with app.test_request_context('/items/1?fields=a'):
+            tag = document_etag(7)
+        with app.test_request_context('/', headers={'If-Match': f'"{tag}"'}):
+            self.assertEqual(expected_version(), 7)
+
+
+class VersionsTestCase(unittest.TestCase):
+    """
+    Unit test case for the version reads.
+
+    Methods:
+        test_outage: A failed check keeps the last version for an interval.
+    """
+
+    def test_outage(self):
+        """A failed check answers the last version seen and is not tried
+        again before the next interval."""
+        collection = DocumentCollection()
+        versions = CollectionVersions(collection, check_interval=60)
+        self.assertEqual(versions.get_dated("items"), (3, None))
+        versions.check_interval = 0
+        collection.down = True
+        self.assertEqual(versions.get_dated("items"), (3, None))
+        versions.check_interval = 60
+        self.assertEqual(versions.get_dated("items"), (3, None))
+        self.assertEqual(collection.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
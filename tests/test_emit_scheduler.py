@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+test_emit_scheduler.py
+
+This module contains unit tests for the coalescing of Socket.IO emits.
+
+Classes:
+    EmitSchedulerTestCase: Unit test case for EmitScheduler.
+"""
+
+import threading
+import time
+import unittest
+from flask import Flask
+from app.utils.emit_scheduler import EmitScheduler, BATCH_EVENT
+
+
+class RecordingSocketIO:
+    """SocketIO stand-in recording the emitted frames"""
+    def __init__(self):
+        self.frames = []
+        self.tasks = []
+
+    def emit(self, event, data, to=None):
+        self.frames.append((event, data, to))
+
+    def start_background_task(self, target, *args):
+        task = threading.Thread(target=target, args=args)
+        task.start()
+        self.tasks.append(task)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def join(self):
+        for task in self.tasks:
+            task.join(5)
+
+
+class EmitSchedulerTestCase(unittest.TestCase):
+    """
+    Unit test case for EmitScheduler.
+
+    Methods:
+        setUp: Create a scheduler with a 20ms window.
+        test_batch: A burst is batched for the batch rooms only.
+        test_single: An event alone in its window is emitted as is.
+        test_disabled: A window of 0 emits every event at once.
+    """
+
+    def setUp(self):
+        """Create a scheduler with a 20ms window."""
+        self.socketio = RecordingSocketIO()
+        self.app = Flask(__name__)
+        self.scheduler = EmitScheduler(self.socketio, self.app, window=0.02)
+
+    def test_batch(self):
+        """A burst leaves at once to the plain rooms and as one ordered
+        batch frame to the batch rooms."""
+        for i in range(3):
+            self.scheduler.emit('receive_message', i, to=['general', 'a'])
+        self.scheduler.emit('receive_message', 'x', to='other')
+        immediate = list(self.socketio.frames)
+        self.assertEqual(immediate, [
+            ('receive_message', 0, ['general', 'a']),
+            ('receive_message', 1, ['general', 'a']),
+            ('receive_message', 2, ['general', 'a']),
+            ('receive_message', 'x', 'other')
+        ])
+        self.socketio.join()
+        frames = sorted(self.socketio.frames[4:], key=lambda f: f[0])
+        self.assertEqual(frames[0], (
+            BATCH_EVENT,
+            [{"event": 'receive_message', "data": i} for i in range(3)],
+            ['batch:general', 'batch:a']
+        ))
+        self.assertEqual(frames[1], ('receive_message', 'x', 'batch:other'))
+
+    def test_single(self):
+        """An event alone in its window reaches the batch room as is."""
+        self.scheduler.emit('receive_message', 'hi', to='general')
+        self.assertEqual(
+            self.socketio.frames, [('receive_message', 'hi', 'general')]
+        )
+        self.socketio.join()
+        self.assertEqual(
+            self.socketio.frames[1], ('receive_message', 'hi', 'batch:general')
+        )
+
+    def test_disabled(self):
+        """A window of 0 emits every event at once to every client."""
+        self.scheduler.window = 0
+        self.scheduler.emit('receive_message', 'hi', to='general')
+        self.assertEqual(self.socketio.frames, [
+            ('receive_message', 'hi', ['general', 'batch:general'])
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+test_fields.py
+
+This module contains unit tests for the API field mapping.
+
+Classes:
+    FieldMapTestCase: Unit test case for the compiled serializers.
+"""
+
+import unittest
+from app.utils.fields import FieldMap
+
+FIELDS = FieldMap({
+    "fname": "name.fname",
+    "lname": "name.lname",
+    "sex": "sex"
+})
+
+
+class FieldMapTestCase(unittest.TestCase):
+    """
+    Unit test case for the compiled serializers.
+
+    Methods:
+        test_serialize: Nested paths map to flat API fields.
+        test_not_a_subdocument: Paths under a scalar serialize as None.
+        test_subset_cached: Subset serializers are compiled once.
+    """
+
+    def test_serialize(self):
+        """Nested paths map to flat API fields, missing ones to None."""
+        self.assertEqual(
+            FIELDS.to_api({"name": {"fname": "Ada"}, "sex": "F"}),
+            {"fname": "Ada", "lname": None, "sex": "F"}
+        )
+
+    def test_not_a_subdocument(self):
+        """Paths under a value that is not a subdocument serialize as None."""
+        self.assertEqual(
+            FIELDS.to_api({"name": "Ada Lovelace"}, ["fname", "sex"]),
+            {"fname": None, "sex": None}
+        )
+
+    def test_subset_cached(self):
+        """Subset serializers are compiled once per field list."""
+        self.assertIs(
+            FIELDS.serializer(["sex", "fname"]),
+            FIELDS.serializer(["sex", "fname"])
+        )
+        self.assertEqual(
+            FIELDS.to_api({"sex": "F"}, ["sex"]), {"sex": "F"}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+test_identity.py
+
+This module contains unit tests for the per-worker cache resolving JWT
+identities to users.
+
+Classes:
+    IdentityCacheTestCase: Unit test case for IdentityCache.
+    IdentityDirectoryTestCase: Unit test case for the directory entries.
+    BackfillTestCase: Unit test case for the directory backfill command.
+"""
+
+import unittest
+from types import SimpleNamespace
+from bson.objectid import ObjectId
+from flask import Flask
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.utils.identity import IdentityCache
+from app.models.identity import IdentityDirectory
+from app.commands import identities_cli
+
+
+class MemoryVersions:
+    """CollectionVersions stand-in keeping the counters in a dict"""
+    def __init__(self):
+        self.counters = {}
+
+    def get(self, namespace):
+        return self.counters.get(namespace, 0)
+
+    def bump(self, namespace):
+        self.counters[namespace] = self.get(namespace) + 1
+
+
+class CountingCollection:
+    """Collection stand-in holding one user, counting find_one calls"""
+    def __init__(self, user):
+        self.user = user
+        self.finds = 0
+
+    def find_one(self, query, projection=None):
+        self.finds += 1
+        if query["contact_details.email"] == \
+                self.user["contact_details"]["email"]:
+            return self.user
+        return None
+
+
+class IdentityCacheTestCase(unittest.TestCase):
+    """
+    Unit test case for IdentityCache.
+
+    Methods:
+        setUp: Create a cache over one tenant.
+        test_resolve: Identities are read once, then cached.
+        test_invalidation: A version bump drops the cached identities.
+    """
+
+    def setUp(self):
+        """Create a cache over one tenant."""
+        self.user = {
+            "_id": ObjectId(), "name": {"fname": "Ada", "lname": "Obi"},
+            "contact_details": {"email": "ada@example.com"}, "active": True
+        }
+        self.tenants = CountingCollection(self.user)
+        self.versions = MemoryVersions()
+        self.cache = IdentityCache(self.versions, {"tenant": self.tenants})
+
+    def test_resolve(self):
+        """Identities are read once, then cached, unknown roles are None."""
+        identity = self.cache.resolve("ada@example.com", "tenant")
+        self.assertEqual(identity, {
+            "uid": str(self.user["_id"]), "name": "Ada Obi", "active": True,
+            "property_id": None
+        })
+        self.cache.resolve("ada@example.com", "tenant")
+        self.assertEqual(self.tenants.finds, 1)
+        self.assertIsNone(self.cache.resolve("ada@example.com", "admin"))
+
+    def test_invalidation(self):
+        """A version bump of the namespace drops the cached identities."""
+        self.cache.resolve("ada@example.com", "tenant")
+        self.user["active"] = False
+        self.versions.bump("tenants")
+        identity = self.cache.resolve("ada@example.com", "tenant")
+        self.assertFalse(identity["active"])
+        self.assertEqual(self.tenants.finds, 2)
+
+
+class IdentityDirectoryTestCase(unittest.TestCase):
+    """
+    Unit test case for the directory entries.
+
+    Methods:
+        test_entry: Entries are compact and normalized.
+    """
+
+    def test_entry(self):
+        """Entries are compact, emails lowercased, versions start at 1."""
+        user_id = ObjectId()
+        entry = IdentityDirectory.entry({
+            "_id": user_id, "name": {"fname": "Ada", "lname": "Obi"},
+            "contact_details": {
+                "email": " Ada@Example.com", "phone": "08012345678",
+                "address": "1 Main Street"
+            },
+            "password": "hash", "dob": "1990-01-01"
+        }, "tenant")
+        self.assertEqual(entry, {
+            "_id": user_id, "email": "ada@example.com",
+            "phone": "08012345678", "role": "tenant", "name": "Ada Obi",
+            "password": "hash", "active": True, "version": 1
+        })
+
+
+class SourceCollection:
+    """Tenants/admins collection stand-in"""
+    def __init__(self, users):
+        self.users = users
+
+    def find(self, query, projection=None):
+        return iter(self.users)
+
+
+class DirectoryCollection:
+    """Directory collection stand-in enforcing the unique email once its
+    index exists, recording the calls"""
+    def __init__(self, entries=()):
+        self.entries = {entry["_id"]: entry for entry in entries}
+        self.calls = []
+
+    def create_index(self, keys, unique=False, **kwargs):
+        self.calls.append("create_index")
+        if unique and self.duplicates():
+            raise OperationFailure("E11000 duplicate key error")
+
+    def duplicates(self):
+        emails = {}
+        for entry in self.entries.values():
+            emails.setdefault(entry["email"], []).append(entry["_id"])
+        return [{"_id": email, "ids": ids}
+                for email, ids in emails.items() if len(ids) > 1]
+
+    def aggregate(self, pipeline):
+        return self.duplicates()
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append("bulk_write")
+        errors = []
+        for index, request in enumerate(requests):
+            entry = request._doc
+            if any(other["email"] == entry["email"]
+                   and other["_id"] != entry["_id"]
+                   for other in self.entries.values()):
+                errors.append({"index": index, "code": 11000,
+                               "errmsg": "E11000 duplicate key error"})
+            else:
+                self.entries[entry["_id"]] = entry
+        upserted = len(requests) - len(errors)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors,
+                                  "nUpserted": upserted, "nModified": 0})
+        return SimpleNamespace(upserted_count=upserted, modified_count=0)
+
+
+def user(email):
+    return {"_id": ObjectId(), "contact_details": {"email": email},
+            "password": "hash"}
+
+
+class BackfillTestCase(unittest.TestCase):
+    """
+    Unit test case for the directory backfill command.
+
+    Methods:
+        run_backfill: Run the command over the given collections.
+        test_conflicts: Users sharing an email are reported, not written.
+        test_index_failure: Existing duplicates stop the backfill.
+    """
+
+    def run_backfill(self, directory, tenants, admins):
+        """Run the backfill command over the given collections."""
+        app = Flask(__name__)
+        app.identitiesCollection = directory
+        app.tenantsCollection = SourceCollection(tenants)
+        app.adminsCollection = SourceCollection(admins)
+        app.cli.add_command(identities_cli)
+        return app.test_cli_runner().invoke(args=['identities', 'backfill'])
+
+    def test_conflicts(self):
+        """The unique index comes first, users sharing an email are
+        reported with their id and not written."""
+        directory = DirectoryCollection()
+        admin = user("ada@example.com")
+        result = self.run_backfill(
+            directory, [user("ada@example.com"), user("bo@example.com")],
+            [admin]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(directory.calls[0], "create_index")
+        self.assertIn(f"admin {admin['_id']}", result.output)
+        self.assertIn("tenants: 2 written, 0 conflicts", result.output)
+        self.assertIn("admins: 0 written, 1 conflicts", result.output)
+        self.assertNotIn(admin["_id"], directory.entries)
+
+    def test_index_failure(self):
+        """Duplicates already in the directory are listed and stop it."""
+        first, second = user("ada@example.com"), user("ada@example.com")
+        directory = DirectoryCollection([
+            IdentityDirectory.entry(first, "tenant"),
+            IdentityDirectory.entry(second, "admin")
+        ])
+        result = self.run_backfill(directory, [], [])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn(str(first["_id"]), result.output)
+        self.assertIn(str(second["_id"]), result.output)
+        self.assertNotIn("bulk_write", directory.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
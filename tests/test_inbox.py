@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+test_inbox.py
+
+This module contains unit tests for the tenant inbox.
+
+Classes:
+    InboxTestCase: Unit test case for the fan-out of admin messages.
+"""
+
+import unittest
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+from app.models.inbox import Inbox, audience_query
+
+
+class InboxCollection:
+    """Collection stand-in recording the insert_many batches and the
+    updates, failing the inserts with the ``codes`` write errors if set"""
+    def __init__(self, codes=()):
+        self.batches = []
+        self.updates = []
+        self.deleted = []
+        self.codes = codes
+
+    def create_index(self, keys, **kwargs):
+        pass
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(documents)
+        if self.codes:
+            raise BulkWriteError({"writeErrors": [
+                {"index": 0, "code": code} for code in self.codes
+            ]})
+
+    def update_many(self, query, update):
+        self.updates.append((query, update))
+
+    def delete_many(self, query):
+        self.deleted.append(query)
+
+    def find(self, query):
+        self.query = query
+        return self
+
+    def sort(self, keys):
+        self.keys = keys
+        return self
+
+    def limit(self, limit):
+        return []
+
+
+class InboxTestCase(unittest.TestCase):
+    """
+    Unit test case for the fan-out of admin messages.
+
+    Methods:
+        test_fan_out: Entries are inserted in batches, one per tenant.
+        test_already_delivered: Duplicate entries count as delivered.
+        test_update_message: Edits are copied to the entries.
+        test_delete_message: Entries go with their message.
+        test_page: The page cursor breaks date ties on _id.
+        test_audience_query: Audiences select active tenants.
+    """
+
+    def test_fan_out(self):
+        """Entries are inserted in batches, one per tenant."""
+        collection = InboxCollection()
+        message = {"_id": ObjectId(), "title": "Water", "message": "Off",
+                   "date_created": datetime(2024, 1, 1)}
+        progress = []
+        report = Inbox(collection).fan_out(
+            message, iter(range(5)), batch_size=2, progress=progress.append
+        )
+        self.assertEqual(report["delivered"], 5)
+        self.assertEqual([len(batch) for batch in collection.batches],
+                         [2, 2, 1])
+        self.assertEqual(progress, [2, 4])
+        entry = collection.batches[2][0]
+        self.assertEqual(entry["tenant_id"], 4)
+        self.assertEqual(entry["message_id"], message["_id"])
+        self.assertFalse(entry["read"])
+
+    def test_already_delivered(self):
+        """Duplicate entries count as delivered, other errors raise."""
+        message = {"_id": ObjectId()}
+        collection = InboxCollection(codes=(11000, 11000))
+        report = Inbox(collection).fan_out(message, iter(range(3)))
+        self.assertEqual(report["delivered"], 3)
+        collection = InboxCollection(codes=(11000, 121))
+        with self.assertRaises(BulkWriteError):
+            Inbox(collection).fan_out(message, iter(range(3)))
+
+    def test_update_message(self):
+        """The edited title and message are copied to the entries."""
+        collection = InboxCollection()
+        message_id = ObjectId()
+        inbox = Inbox(collection)
+        inbox.update_message(message_id, {"title": "Gas", "other": 1})
+        inbox.update_message(message_id, {"other": 1})
+        self.assertEqual(collection.updates, [
+            ({"message_id": message_id}, {"$set": {"title": "Gas"}})
+        ])
+
+    def test_delete_message(self):
+        """The entries of a deleted message are deleted."""
+        collection = InboxCollection()
+        message_id = ObjectId()
+        Inbox(collection).delete_message(message_id)
+        self.assertEqual(collection.deleted, [{"message_id": message_id}])
+
+    def test_page(self):
+        """Entries are sorted and paged on (date_created, _id)."""
+        collection = InboxCollection()
+        tenant_id, entry_id = ObjectId(), ObjectId()
+        date = datetime(2024, 1, 1)
+        Inbox(collection).page(tenant_id, date, 20, entry_id)
+        self.assertEqual(collection.keys, [("date_created", -1), ("_id", -1)])
+        self.assertEqual(collection.query, {"tenant_id": tenant_id, "$or": [
+            {"date_created": {"$lt": date}},
+            {"date_created": date, "_id": {"$lt": entry_id}}
+        ]})
+        Inbox(collection).page(tenant_id, date)
+        self.assertEqual(collection.query, {
+            "tenant_id": tenant_id, "date_created": {"$lt": date}
+        })
+
+    def test_audience_query(self):
+        """Audiences select active tenants, their target is required."""
+        self.assertEqual(audience_query("all"), {"active": True})
+        self.assertEqual(audience_query("property", "p1"), {
+            "active": True, "tenancy_info.propertyId": "p1"
+        })
+        tenant_id = ObjectId()
+        self.assertEqual(
+            audience_query("tenants", tenant_ids=[str(tenant_id)])["_id"],
+            {"$in": [tenant_id]}
+        )
+        with self.assertRaises(ValueError):
+            audience_query("property")
+        with self.assertRaises(ValueError):
+            audience_query("tenants", tenant_ids=["bad"])
+
+
+if __name__ == '__main__':
+    unittest.main()
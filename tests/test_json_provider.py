@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+test_json_provider.py
+
+This module contains unit tests for the MongoDB aware JSON provider.
+
+Classes:
+    MongoJSONProviderTestCase: Unit test case for JSON serialization.
+"""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+from bson.objectid import ObjectId
+from flask import Flask
+from app.utils import json_provider
+from app.utils.json_provider import MongoJSONProvider
+
+
+class MongoJSONProviderTestCase(unittest.TestCase):
+    """
+    Unit test case for the MongoJSONProvider.
+
+    Methods:
+        setUp: Set up a bare Flask app using the provider.
+        test_mongo_types: ObjectId, datetime and Decimal are serialized.
+        test_stdlib_fallback: Output is the same without orjson.
+        test_response: Responses carry the JSON body and mimetype.
+    """
+
+    def setUp(self):
+        """Set up a bare Flask app using the provider."""
+        self.app = Flask(__name__)
+        self.app.json = MongoJSONProvider(self.app)
+        self.oid = ObjectId('66a0c0ffee0000000000abcd')
+        self.doc = {
+            "_id": self.oid,
+            "date_created": datetime(2024, 7, 1, 12, 30, 5),
+            "fees": Decimal('1000.50'),
+        }
+
+    def test_mongo_types(self):
+        """ObjectId, datetime and Decimal are serialized."""
+        data = self.app.json.loads(self.app.json.dumps(self.doc))
+        self.assertEqual(data, {
+            "_id": "66a0c0ffee0000000000abcd",
+            "date_created": "2024-07-01T12:30:05",
+            "fees": "1000.50",
+        })
+
+    def test_stdlib_fallback(self):
+        """Output is the same without orjson."""
+        expected = self.app.json.dumps(self.doc)
+        with mock.patch.object(json_provider, 'orjson', None):
+            self.assertEqual(self.app.json.dumps(self.doc), expected)
+
+    def test_response(self):
+        """Responses carry the JSON body and mimetype."""
+        with self.app.app_context():
+            response = self.app.json.response([self.doc])
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(
+            response.get_json()[0]['_id'], '66a0c0ffee0000000000abcd'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+test_mongo_manager.py
+
+This module contains unit tests for the Socket.IO message queue on a
+MongoDB capped collection.
+
+Classes:
+    MongoManagerTestCase: Unit test case for MongoManager.
+"""
+
+import json
+import unittest
+from bson import ObjectId
+from pymongo.errors import CollectionInvalid
+from app.utils.mongo_manager import MongoManager
+
+
+class MemoryCursor:
+    """Tailable cursor stand-in, dead once its documents are read"""
+    def __init__(self, docs):
+        self.docs = docs
+        self.alive = True
+
+    def max_await_time_ms(self, ms):
+        return self
+
+    def __iter__(self):
+        yield from self.docs
+        self.alive = False
+
+
+class MemoryDatabase:
+    """Database stand-in holding the queue documents in a list"""
+    def __init__(self):
+        self.docs = []
+        self.capped = []
+
+    def create_collection(self, name, capped=False, size=None):
+        if self.capped:
+            raise CollectionInvalid(name)
+        self.capped.append((name, capped, size))
+
+    def get_collection(self, name):
+        return self
+
+    def insert_one(self, doc):
+        self.docs.append(dict(doc, _id=ObjectId()))
+
+    def find(self, query, cursor_type=None):
+        since = query["ts"]["$gte"]
+        return MemoryCursor(
+            [doc for doc in self.docs if doc["ts"] >= since]
+        )
+
+
+class MongoManagerTestCase(unittest.TestCase):
+    """
+    Unit test case for MongoManager.
+
+    Methods:
+        test_publish_listen: Published events are read back once, from a
+            capped collection.
+    """
+
+    def test_publish_listen(self):
+        """Published events are read back once, from a capped collection."""
+        database = MemoryDatabase()
+        manager = MongoManager(database, size=1024, await_ms=0, json=json)
+        listener = manager._listen()
+        manager._publish({"method": "emit", "event": "receive_message"})
+        manager._publish({"method": "emit", "event": "batch"})
+        events = [json.loads(next(listener)) for _ in range(2)]
+        self.assertEqual(
+            [event["event"] for event in events],
+            ["receive_message", "batch"]
+        )
+        self.assertEqual(database.capped, [("socketioQueue", True, 1024)])
+        # a restarted cursor re-reads the grace period, not the events
+        manager._publish({"method": "emit", "event": "next"})
+        self.assertEqual(json.loads(next(listener))["event"], "next")
+
+
+if __name__ == '__main__':
+    unittest.main()
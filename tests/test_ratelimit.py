@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+test_ratelimit.py
+
+This module contains unit tests for the token-bucket rate limiting of
+the authentication routes.
+
+Classes:
+    RateLimitTestCase: Unit test case for RateLimiter.
+"""
+
+import unittest
+from flask import Flask, jsonify
+from app.utils.ratelimit import RateLimiter, by_json_field, parse_limit
+
+
+class RateLimitTestCase(unittest.TestCase):
+    """
+    Unit test case for RateLimiter.
+
+    Methods:
+        setUp: Create an app with a per-account limited route.
+        test_parse_limit: Limits are read as capacity per period.
+        test_limited: The request past the capacity gets a 429.
+        test_per_account: Every account has its own bucket.
+        test_disabled: A disabled limiter lets every request through.
+    """
+
+    def setUp(self):
+        """Create an app with a per-account limited route."""
+        self.limiter = RateLimiter()
+        app = Flask(__name__)
+
+        @app.route('/login', methods=['POST'])
+        @self.limiter.limit("login", "3/minute", by_json_field('email'))
+        def login():
+            return jsonify({"msg": "ok"}), 200
+
+        self.client = app.test_client()
+
+    def login(self, email):
+        return self.client.post('/login', json={"email": email})
+
+    def test_parse_limit(self):
+        """Limits are read as capacity per period."""
+        self.assertEqual(parse_limit("10/minute"), (10, 60))
+        self.assertEqual(parse_limit("5/hours"), (5, 3600))
+
+    def test_limited(self):
+        """The request past the capacity gets a 429 with Retry-After."""
+        for _ in range(3):
+            self.assertEqual(self.login("a@example.com").status_code, 200)
+        response = self.login("A@example.com ")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '20')
+
+    def test_per_account(self):
+        """Every account has its own bucket."""
+        for _ in range(3):
+            self.login("a@example.com")
+        self.assertEqual(self.login("b@example.com").status_code, 200)
+
+    def test_disabled(self):
+        """A disabled limiter lets every request through."""
+        self.limiter.enabled = False
+        for _ in range(5):
+            self.assertEqual(self.login("a@example.com").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
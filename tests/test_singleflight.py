@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+test_singleflight.py
+
+This module contains unit tests for the coalescing of identical
+concurrent reads.
+
+Classes:
+    SingleFlightTestCase: Unit test case for SingleFlight.
+"""
+
+import threading
+import unittest
+from flask import Flask, jsonify
+from app.utils.singleflight import SingleFlight, FlightAborted, _Flight
+
+
+class StaticVersions:
+    """CollectionVersions stand-in, nothing is ever written"""
+    def get(self, namespace):
+        return 0
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    """
+    Unit test case for SingleFlight.
+
+    Methods:
+        setUp: Create an app whose views block until released.
+        test_coalesced: Concurrent requests share one view call.
+        test_streamed: Concurrent requests share one streamed body.
+        test_passthrough: A stream without followers is not buffered.
+        test_stalled_replay: A stalled producer fails the replay.
+        test_sequential: Requests after the flight landed run the view.
+    """
+
+    def setUp(self):
+        """Create an app whose views block until released."""
+        self.calls = 0
+        self.producers = []
+        self.release = threading.Event()
+        self.singleflight = SingleFlight(timeout=5)
+        app = Flask(__name__)
+        app.versions = StaticVersions()
+
+        @app.route('/items')
+        @self.singleflight.coalesce("items")
+        def list_items():
+            self.calls += 1
+            self.release.wait(5)
+            return jsonify([{"n": 1}]), 200
+
+        @app.route('/stream')
+        @self.singleflight.coalesce("stream")
+        def stream_items():
+            self.calls += 1
+            # like stream_documents, the first batch is fetched in the view
+            self.release.wait(5)
+
+            def generate():
+                self.producers.append(threading.current_thread())
+                yield b"["
+                yield b"1,2,3]"
+            return app.response_class(generate(), mimetype="application/json")
+
+        self.app = app
+
+    def concurrent_get(self, path, count=5):
+        """GET ``path`` from ``count`` threads, return the bodies"""
+        bodies = [None] * count
+
+        def get(index):
+            with self.app.test_client() as client:
+                bodies[index] = client.get(path).data
+
+        threads = [
+            threading.Thread(target=get, args=(i,)) for i in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        # let every thread join the flight before releasing the leader
+        for _ in range(500):
+            stats = self.singleflight.stats()["namespaces"]
+            if stats.get(path.strip("/"), {}).get("followers") == count - 1:
+                break
+            threading.Event().wait(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return bodies
+
+    def test_coalesced(self):
+        """Concurrent requests share one view call and one body."""
+        bodies = self.concurrent_get('/items')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(set(bodies)), 1)
+        stats = self.singleflight.stats()["namespaces"]["items"]
+        self.assertEqual(stats["leaders"], 1)
+        self.assertEqual(stats["followers"], 4)
+
+    def test_streamed(self):
+        """Concurrent requests share one streamed body."""
+        bodies = self.concurrent_get('/stream')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(set(bodies), {b"[1,2,3]"})
+        self.assertEqual(len(self.producers), 1)
+
+    def test_passthrough(self):
+        """A stream without followers is served by its own request."""
+        self.release.set()
+        response = self.app.test_client().get('/stream')
+        self.assertEqual(response.data, b"[1,2,3]")
+        self.assertEqual(self.producers, [threading.current_thread()])
+        self.assertEqual(self.singleflight.stats()["in_flight"], 0)
+
+    def test_stalled_replay(self):
+        """A stalled or failed producer fails the replay."""
+        flight = _Flight()
+        flight.append(b"[")
+        replay = flight.replay(0.01)
+        self.assertEqual(next(replay), b"[")
+        with self.assertRaises(FlightAborted):
+            next(replay)
+        flight.finish(failed=True)
+        with self.assertRaises(FlightAborted):
+            list(flight.replay(0.01))
+
+    def test_sequential(self):
+        """Requests after the flight landed run the view again."""
+        self.release.set()
+        client = self.app.test_client()
+        client.get('/items')
+        client.get('/items')
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.singleflight.stats()["in_flight"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
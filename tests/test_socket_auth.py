@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+test_socket_auth.py
+
+This module contains unit tests for the authentication of the chat
+Socket.IO connections.
+
+Classes:
+    SocketAuthTestCase: Unit test case for the handshake and per-event
+        token checks.
+"""
+
+import unittest
+from datetime import timedelta
+from unittest import mock
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token
+)
+from app import create_app, socketio, revoked_tokens
+from app.models.unread import UnreadCounters, user_key
+from tests.test_unread import MemoryCollection
+
+
+class SocketAuthTestCase(unittest.TestCase):
+    """
+    Unit test case for the handshake and per-event token checks.
+
+    Admin tokens carry their name and uid, so no lookup is needed.
+
+    Methods:
+        setUpClass: Create the app once.
+        token: Issue an admin access token.
+        connect: Open a test client with the auth payload.
+        test_missing_token: A handshake without token is refused.
+        test_invalid_token: A malformed token is refused.
+        test_expired_token: An expired token is refused.
+        test_revoked_token: A revoked token is refused.
+        test_connected: A valid token connects the admin.
+        test_revoked_after_connect: Events check revocation and disconnect.
+        test_refresh_token: A refresh token is refused.
+        test_cookie_origin: The cookie only authenticates allowed origins.
+        test_inactive_tenant: An inactive tenant is refused.
+        test_deactivated_after_connect: Events check the tenant is active.
+        test_unread: The unread event acknowledges the summary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the app once."""
+        cls.app = create_app('testing')
+
+    def tearDown(self):
+        revoked_tokens.clear()
+
+    def token(self, expires=None):
+        """Issue an admin access token, expiring in ``expires`` if set."""
+        with self.app.app_context():
+            return create_access_token(
+                identity={"email": "admin@example.com", "role": "admin"},
+                additional_claims={"name": "Admin", "uid": "a1"},
+                expires_delta=expires
+            )
+
+    def jti(self, token):
+        with self.app.app_context():
+            return decode_token(token)['jti']
+
+    def tenant_token(self):
+        """Issue a tenant access token."""
+        with self.app.app_context():
+            return create_access_token(
+                identity={"email": "t@example.com", "role": "tenant"},
+                additional_claims={"name": "Tenant", "uid": "u1"}
+            )
+
+    def tenant_cache(self, active=True):
+        """Patch the identity cache with a tenant, active or not."""
+        cache = mock.Mock()
+        cache.resolve.return_value = {
+            "uid": "u1", "name": "Tenant", "active": active,
+            "property_id": None
+        }
+        patcher = mock.patch('app.routes.communication.identity_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cache
+
+    def connect(self, auth=None, headers=None):
+        """Open a test client with the auth payload and headers."""
+        return socketio.test_client(self.app, auth=auth, headers=headers)
+
+    def test_missing_token(self):
+        """A handshake without token is refused."""
+        client = self.connect()
+        self.assertFalse(client.is_connected())
+
+    def test_invalid_token(self):
+        """A malformed token is refused."""
+        client = self.connect({"token": "not-a-jwt"})
+        self.assertFalse(client.is_connected())
+
+    def test_expired_token(self):
+        """An expired token is refused."""
+        client = self.connect({"token": self.token(timedelta(seconds=-1))})
+        self.assertFalse(client.is_connected())
+
+    def test_revoked_token(self):
+        """A revoked token is refused."""
+        token = self.token()
+        revoked_tokens.add(self.jti(token))
+        client = self.connect({"token": token})
+        self.assertFalse(client.is_connected())
+
+    def test_connected(self):
+        """A valid token connects the admin."""
+        client = self.connect({"token": self.token()})
+        self.assertTrue(client.is_connected())
+        client.disconnect()
+
+    def test_revoked_after_connect(self):
+        """A token revoked after connecting fails the next event and
+        disconnects the socket."""
+        token = self.token()
+        client = self.connect({"token": token})
+        self.assertTrue(client.is_connected())
+        revoked_tokens.add(self.jti(token))
+        ack = client.emit(
+            'send_message', {"message": "hi"}, callback=True
+        )
+        self.assertEqual(ack, {"msg": "Token has expired or been revoked"})
+        self.assertFalse(client.is_connected())
+
+    def test_refresh_token(self):
+        """A refresh token is refused."""
+        with self.app.app_context():
+            token = create_refresh_token(
+                identity={"email": "admin@example.com", "role": "admin"}
+            )
+        client = self.connect({"token": token})
+        self.assertFalse(client.is_connected())
+
+    def test_cookie_origin(self):
+        """The access cookie authenticates the app's own pages and the
+        allowed origins, not other sites."""
+        cookie = f"{self.app.config['JWT_ACCESS_COOKIE_NAME']}={self.token()}"
+        client = self.connect(headers={
+            "Cookie": cookie, "Origin": "https://evil.example"
+        })
+        self.assertFalse(client.is_connected())
+        client = self.connect(headers={
+            "Cookie": cookie, "Origin": "http://localhost"
+        })
+        self.assertTrue(client.is_connected())
+        client.disconnect()
+        origins = ["https://app.example"]
+        with mock.patch.dict(self.app.config,
+                             SOCKETIO_COOKIE_ORIGINS=origins):
+            client = self.connect(headers={
+                "Cookie": cookie, "Origin": "https://app.example"
+            })
+        self.assertTrue(client.is_connected())
+        client.disconnect()
+
+    def test_inactive_tenant(self):
+        """An inactive tenant is refused."""
+        self.tenant_cache(active=False)
+        client = self.connect({"token": self.tenant_token()})
+        self.assertFalse(client.is_connected())
+
+    def test_deactivated_after_connect(self):
+        """A tenant deactivated after connecting fails the next event and
+        is disconnected."""
+        cache = self.tenant_cache()
+        client = self.connect({"token": self.tenant_token()})
+        self.assertTrue(client.is_connected())
+        cache.resolve.return_value = dict(
+            cache.resolve.return_value, active=False
+        )
+        ack = client.emit('unread', callback=True)
+        self.assertEqual(ack, {"msg": "Token has expired or been revoked"})
+        self.assertFalse(client.is_connected())
+
+    def test_unread(self):
+        """The unread event acknowledges the unread messages per room."""
+        counters = UnreadCounters(MemoryCollection(), MemoryCollection())
+        counters.unread(user_key('admin', 'a1'), ['general'])
+        counters.incr('general')
+        client = self.connect({"token": self.token()})
+        with mock.patch('app.routes.communication.unread_counters', counters):
+            ack = client.emit('unread', callback=True)
+        self.assertEqual(ack["rooms"], {"general": 1, "admins": 0})
+        client.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+test_streaming.py
+
+This module contains unit tests for the streamed JSON array and
+NDJSON serialization of large collections.
+
+Classes:
+    StreamingTestCase: Unit test case for iter_json_chunks.
+    StreamDocumentsTestCase: Unit test case for stream_documents.
+"""
+
+import json
+import unittest
+from flask import Flask
+from app.utils.json_provider import MongoJSONProvider
+from app.utils.streaming import iter_json_chunks, stream_documents
+
+
+def dumpb(obj):
+    """Compact stdlib serializer used in place of the app provider"""
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class StreamingTestCase(unittest.TestCase):
+    """
+    Unit test case for iter_json_chunks.
+
+    Methods:
+        test_json_array: Chunks concatenate to a valid JSON array.
+        test_empty: An empty cursor is an empty array / body.
+        test_ndjson: One document per line.
+    """
+
+    def test_json_array(self):
+        """Chunks concatenate to a valid JSON array for any batch size."""
+        documents = [{"n": n} for n in range(7)]
+        for batch_size in (1, 3, 7, 10):
+            chunks = list(iter_json_chunks(
+                documents, batch_size=batch_size, dumpb=dumpb
+            ))
+            self.assertEqual(json.loads(b"".join(chunks)), documents)
+
+    def test_empty(self):
+        """An empty cursor is an empty array / body."""
+        self.assertEqual(
+            b"".join(iter_json_chunks([], dumpb=dumpb)), b"[]\n"
+        )
+        self.assertEqual(
+            b"".join(iter_json_chunks([], ndjson=True, dumpb=dumpb)), b""
+        )
+
+    def test_ndjson(self):
+        """One document per line, transform applied to each."""
+        body = b"".join(iter_json_chunks(
+            [{"n": 1}, {"n": 2}, {"n": 3}], transform=lambda d: d["n"],
+            ndjson=True, batch_size=2, dumpb=dumpb
+        ))
+        self.assertEqual(body, b"1\n2\n3\n")
+
+
+class StreamDocumentsTestCase(unittest.TestCase):
+    """
+    Unit test case for stream_documents.
+
+    Methods:
+        setUp: Create an app with a route streaming a given cursor.
+        test_empty_ndjson: An empty cursor is an empty NDJSON body.
+        test_empty_json: An empty cursor is an empty JSON array.
+    """
+
+    def setUp(self):
+        """Create an app with a route streaming a given cursor."""
+        app = Flask(__name__)
+        app.json = MongoJSONProvider(app)
+        self.documents = []
+
+        @app.route('/documents')
+        def documents():
+            return stream_documents(iter(self.documents))
+
+        self.client = app.test_client()
+
+    def test_empty_ndjson(self):
+        """An empty cursor is an empty 200 NDJSON body."""
+        response = self.client.get(
+            '/documents', headers={"Accept": "application/x-ndjson"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(response.data, b"")
+
+    def test_empty_json(self):
+        """An empty cursor is an empty JSON array."""
+        response = self.client.get('/documents')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
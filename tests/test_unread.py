@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+test_unread.py
+
+This module contains unit tests for the unread message counters.
+
+Classes:
+    UnreadCountersTestCase: Unit test case for UnreadCounters.
+    UnreadRoutesTestCase: Unit test case for the unread routes.
+"""
+
+import unittest
+from unittest import mock
+from bson.objectid import ObjectId
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models.unread import UnreadCounters, user_key
+
+
+class MemoryCollection:
+    """Collection stand-in keyed on _id, applying $inc, $max, $set and
+    $setOnInsert"""
+    def __init__(self):
+        self.docs = {}
+
+    def _apply(self, doc, update, inserted):
+        for key, amount in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + amount
+        for key, value in update.get("$max", {}).items():
+            doc[key] = max(doc.get(key, value), value)
+        doc.update(update.get("$set", {}))
+        if inserted:
+            doc.update(update.get("$setOnInsert", {}))
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query["_id"])
+        inserted = doc is None
+        if inserted:
+            if not upsert:
+                return
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+        self._apply(doc, update, inserted)
+
+    def find_one_and_update(self, query, update, projection=None,
+                            upsert=False, return_document=None):
+        self.update_one(query, update, upsert)
+        return dict(self.docs[query["_id"]])
+
+    def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            self.update_one(
+                operation._filter, operation._doc, operation._upsert
+            )
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    def find(self, query):
+        ids = query["_id"]["$in"]
+        return [self.docs[id_] for id_ in ids if id_ in self.docs]
+
+
+class UnreadCountersTestCase(unittest.TestCase):
+    """
+    Unit test case for UnreadCounters.
+
+    Methods:
+        setUp: Create counters over in-memory collections.
+        test_count: Posts increment their rooms, senders read their own.
+        test_concurrent_post: A sender does not read later messages.
+        test_mark_read: Reading a room clears its unread count.
+        test_first_seen: A new user has read the history of a room.
+    """
+
+    def setUp(self):
+        """Create counters over in-memory collections."""
+        self.counters = UnreadCounters(MemoryCollection(), MemoryCollection())
+        self.tenant = user_key('tenant', 'u1')
+        self.admin = user_key('admin', 'a1')
+        # both users have seen the rooms while they were empty
+        rooms = ['general', 'announcements', 'admins', 'tenant:u1']
+        self.counters.unread(self.tenant, rooms)
+        self.counters.unread(self.admin, rooms)
+
+    def test_count(self):
+        """Posts increment their rooms, senders read up to their own."""
+        self.counters.count([
+            (['tenant:u1', 'admins'], self.tenant, 'tenant:u1'),
+            (['tenant:u1'], self.admin, 'tenant:u1'),
+            (['general'], None, 'general')
+        ])
+        self.assertEqual(
+            self.counters.unread(self.tenant, ['tenant:u1', 'general']),
+            {'tenant:u1': 1, 'general': 1}
+        )
+        self.assertEqual(
+            self.counters.unread(self.admin, ['tenant:u1', 'admins']),
+            {'tenant:u1': 0, 'admins': 1}
+        )
+
+    def test_concurrent_post(self):
+        """A sender's cursor stops at its message, not at later ones in
+        the same batch."""
+        self.counters.count([
+            (['general'], self.tenant, 'general'),
+            (['general'], self.admin, 'general')
+        ])
+        self.assertEqual(
+            self.counters.unread(self.tenant, ['general']), {'general': 1}
+        )
+        self.assertEqual(
+            self.counters.unread(self.admin, ['general']), {'general': 0}
+        )
+
+    def test_mark_read(self):
+        """Reading a room clears its unread count, and only its own."""
+        self.counters.incr('general', 'announcements')
+        self.counters.incr('general')
+        self.counters.mark_read(self.tenant, 'general')
+        self.assertEqual(
+            self.counters.unread(
+                self.tenant, ['general', 'announcements', 'tenant:u1']
+            ),
+            {'general': 0, 'announcements': 1, 'tenant:u1': 0}
+        )
+
+    def test_first_seen(self):
+        """A user without cursor in a room with messages has read them,
+        and only the messages posted afterwards are unread."""
+        newcomer = user_key('tenant', 'u2')
+        self.counters.incr('general')
+        self.counters.incr('general')
+        self.assertEqual(
+            self.counters.unread(newcomer, ['general']), {'general': 0}
+        )
+        self.counters.incr('general')
+        self.assertEqual(
+            self.counters.unread(newcomer, ['general']), {'general': 1}
+        )
+
+
+class UnreadRoutesTestCase(unittest.TestCase):
+    """
+    Unit test case for the unread routes.
+
+    Admin tokens carry their name and uid, so no lookup is needed.
+
+    Methods:
+        setUpClass: Create the app once.
+        setUp: Put in-memory counters with one unread general message.
+        test_get_unread: The route sums the unread messages per room.
+        test_mark_read: Marking a room read returns the new summary.
+        test_announcements: Tenant announcements are their unread inbox.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the app once."""
+        cls.app = create_app('testing')
+        with cls.app.app_context():
+            cls.token = create_access_token(
+                identity={"email": "admin@example.com", "role": "admin"},
+                additional_claims={"name": "Admin", "uid": "a1"}
+            )
+
+    def setUp(self):
+        """Put in-memory counters with one unread general message."""
+        counters = UnreadCounters(MemoryCollection(), MemoryCollection())
+        counters.unread(user_key('admin', 'a1'), ['general'])
+        counters.incr('general')
+        patcher = mock.patch(
+            'app.routes.communication.unread_counters', counters
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def test_get_unread(self):
+        """The route sums the unread messages per room."""
+        response = self.app.test_client().get(
+            '/api/unread', headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {
+            "rooms": {"general": 1, "admins": 0}, "total": 1
+        })
+
+    def test_mark_read(self):
+        """Marking a room read returns the new summary."""
+        response = self.app.test_client().post(
+            '/api/unread/read', headers=self.headers,
+            json={"room_id": "general"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["total"], 0)
+        response = self.app.test_client().post(
+            '/api/unread/read', headers=self.headers,
+            json={"room_id": "other"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_announcements(self):
+        """The announcements of a tenant are its unread inbox entries."""
+        # the routes read the app at import, it exists by now
+        from app.routes import communication
+        tenant_id = ObjectId()
+        inbox = mock.Mock()
+        inbox.unread_count.return_value = 2
+        with mock.patch.object(communication, 'inbox', inbox):
+            summary = communication.unread_summary(
+                'tenant', ['general'], user_key('tenant', str(tenant_id))
+            )
+        inbox.unread_count.assert_called_once_with(tenant_id)
+        self.assertEqual(summary, {
+            "rooms": {"general": 0, "announcements": 2}, "total": 2
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+test_validation.py
+
+This module contains unit tests for the declarative payload schemas
+used by the routes.
+
+Classes:
+    TenantSchemaTestCase: Unit test case for TENANT_CREATE_SCHEMA.
+"""
+
+import unittest
+from app.schemas import TENANT_CREATE_SCHEMA, PROPERTY_SCHEMA
+from app.utils.validation import ValidationError
+
+
+class TenantSchemaTestCase(unittest.TestCase):
+    """
+    Unit test case for the tenant and property payload schemas.
+
+    Methods:
+        setUp: Build a valid tenant payload.
+        test_normalizes: Values are coerced and keyed like the document.
+        test_missing_fields: Missing fields are reported together.
+        test_invalid_email: Malformed emails are rejected.
+        test_property_coercion: Numbers and booleans sent as strings.
+    """
+
+    def setUp(self):
+        """Build a valid tenant payload."""
+        self.tenant_data = {
+            "name": {"fname": "Mike", "lname": "Doe"},
+            "password": "password123",
+            "DoB": "1990-01-01",
+            "sex": "M",
+            "contactDetails": {
+                "email": " Mike.Doe@Example.com",
+                "phone": "(123) 456-7890",
+                "address": "123 Main St"
+            },
+            "emergencyContact": {
+                "name": "Jane Doe", "phone": "0987654321",
+                "address": "457 Sahdai St"
+            },
+            "tenancyInfo": {
+                "fees": 1000, "paid": 500, "datePaid": "2022-01-15",
+                "start": "2022-01-01", "expires": "2022-12-31", "arrears": "0"
+            },
+            "leaseAgreementDetails": "http://example.com/lease.pdf"
+        }
+
+    def test_normalizes(self):
+        """Values are coerced and keyed like the document."""
+        data = TENANT_CREATE_SCHEMA.load(self.tenant_data)
+        self.assertEqual(data['contact_details']['email'],
+                         'mike.doe@example.com')
+        self.assertEqual(data['contact_details']['phone'], '1234567890')
+        self.assertEqual(data['tenancy_info']['arrears'], 0)
+        self.assertEqual(data['dob'], '1990-01-01')
+        self.assertEqual(data['role'], 'tenant')
+
+    def test_missing_fields(self):
+        """Missing fields are reported together."""
+        del self.tenant_data['name']['lname']
+        del self.tenant_data['sex']
+        with self.assertRaises(ValidationError) as context:
+            TENANT_CREATE_SCHEMA.load(self.tenant_data)
+        self.assertEqual(context.exception.msg, 'Missing required fields')
+        self.assertEqual(set(context.exception.errors), {'name.lname', 'sex'})
+
+    def test_invalid_email(self):
+        """Malformed emails are rejected."""
+        self.tenant_data['contactDetails']['email'] = 'jane.doe'
+        with self.assertRaises(ValidationError) as context:
+            TENANT_CREATE_SCHEMA.load(self.tenant_data)
+        self.assertEqual(context.exception.msg, 'Invalid email format')
+
+    def test_property_coercion(self):
+        """Numbers and booleans sent as strings are coerced."""
+        data = PROPERTY_SCHEMA.load({
+            "address": "1 Main St", "type": "flat",
+            "unitAvailability": "true", "rentalFees": "1200.50"
+        })
+        self.assertEqual(data, {
+            "address": "1 Main St", "type": "flat",
+            "unit_availability": True, "rental_fees": 1200.5
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
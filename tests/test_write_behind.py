@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+test_write_behind.py
+
+This module contains unit tests for the write-behind buffer of the chat
+messages.
+
+Classes:
+    WriteBehindTestCase: Unit test case for WriteBehind.
+"""
+
+import threading
+import unittest
+from app.utils.write_behind import WriteBehind, BufferFull
+
+
+class BatchCollection:
+    """Collection stand-in recording the insert_many batches, held at the
+    gate once in flight"""
+    def __init__(self):
+        self.batches = []
+        self.in_flight = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def insert_many(self, documents, ordered=True):
+        self.in_flight.set()
+        self.gate.wait(5)
+        self.batches.append(list(documents))
+
+
+class WriteBehindTestCase(unittest.TestCase):
+    """
+    Unit test case for WriteBehind.
+
+    Methods:
+        test_batches: Queued documents get an _id and are written together.
+        test_back_pressure: A full buffer rejects writers after the timeout.
+        test_on_written: The metas of written documents are handed on.
+    """
+
+    def test_batches(self):
+        """Queued documents get an _id and are written together."""
+        collection = BatchCollection()
+        writer = WriteBehind(collection, interval=0.05, batch_size=10)
+        ids = [writer.insert({"message": str(i)}) for i in range(5)]
+        writer.close()
+        written = [doc for batch in collection.batches for doc in batch]
+        self.assertEqual([doc["_id"] for doc in written], ids)
+        self.assertLess(len(collection.batches), 5)
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 5)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_back_pressure(self):
+        """A full buffer rejects writers after the put timeout."""
+        collection = BatchCollection()
+        collection.gate.clear()
+        writer = WriteBehind(
+            collection, batch_size=1, max_pending=1, put_timeout=0.05
+        )
+        writer.insert({"message": "in flight"})
+        # the flusher holds the first document, the queue is empty again
+        self.assertTrue(collection.in_flight.wait(5))
+        writer.insert({"message": "queued"})
+        with self.assertRaises(BufferFull):
+            writer.insert({"message": "rejected"})
+        collection.gate.set()
+        writer.close()
+        self.assertEqual(writer.stats()["rejected"], 1)
+        self.assertEqual(writer.stats()["written"], 2)
+
+    def test_on_written(self):
+        """The metas of written documents are handed on after the flush,
+        documents without meta are skipped."""
+        collection = BatchCollection()
+        written = []
+        writer = WriteBehind(
+            collection, interval=0.05, batch_size=10,
+            on_written=written.extend
+        )
+        writer.insert({"message": "a"}, meta="a")
+        writer.insert({"message": "b"})
+        writer.insert({"message": "c"}, meta="c")
+        writer.close()
+        self.assertEqual(written, ["a", "c"])
+
+
+if __name__ == '__main__':
+    unittest.main()